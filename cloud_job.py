@@ -6,6 +6,10 @@ from flathunter.googlecloud_idmaintainer import GoogleCloudIdMaintainer
 from flathunter.web_hunter import WebHunter
 from flathunter.config import Config
 from flathunter.logging import configure_logging
+from flathunter.session_pool import configure_session_pool
+from flathunter.html_parser import configure_html_parser
+from flathunter.parse_pool import configure_parse_pool
+from flathunter.geo import configure_geocoder
 
 # load config
 args = parse()
@@ -21,6 +25,10 @@ os.environ['WDM_LOCAL'] = '1'
 id_watch = GoogleCloudIdMaintainer(config)
 
 configure_logging(config)
+configure_session_pool(config)
+configure_html_parser(config)
+configure_parse_pool(config)
+configure_geocoder(config, id_watch)
 
 # initialize search plugins for config
 config.init_searchers()
@@ -4,7 +4,7 @@ Create or edit a basic flathunter configuration
 import sys
 import re
 import os
-from typing import List, Any, Dict, Optional
+from typing import List, Any, Dict, Optional, Union
 from enum import Enum
 from functools import reduce
 
@@ -57,16 +57,20 @@ class UrlsValidator(Validator):
             if len(self.urls) == 0:
                 raise ValidationError(cursor_position=0, message="Supply at least one URL")
             return
-        for searcher in self.config.searchers():
-            if re.search(searcher.URL_PATTERN, document.text):
-                return
+        if self.config.crawler_for_url(document.text) is not None:
+            return
         raise ValidationError(cursor_position=len(document.text),
             message="URL did not match any configured scraper")
 
 
-def gather_urls(config: YamlConfig) -> List[str]:
-    """Get a list of URLs from the user for crawling"""
-    urls = config.target_urls()
+def entry_url(entry: Union[str, Dict[str, Any]]) -> str:
+    """URL of an entry of the 'urls' list, which may be a dict with crawl options"""
+    return entry['url'] if isinstance(entry, dict) else entry
+
+def gather_urls(config: YamlConfig) -> List[Union[str, Dict[str, Any]]]:
+    """Get a list of URLs from the user for crawling. Configured entries are kept as
+    they are, with their crawl options"""
+    urls = config.url_entries()
     result = ""
     first_run = True
     while first_run or len(urls) == 0 or len(result) > 0:
@@ -77,7 +81,7 @@ def gather_urls(config: YamlConfig) -> List[str]:
             "make a search for the flat that you are looking for (e.g. pick a city), and\n"
             "copy the URL here. You can add as many URLs as you like.\n\n")
         if len(urls) > 0:
-            print("\n".join(urls))
+            print("\n".join(entry_url(entry) for entry in urls))
             print("")
         result = prompt("Enter a target URL (or hit enter to continue): ",
             validator=UrlsValidator(urls, config), validate_while_typing=False)
@@ -302,7 +306,7 @@ def main():
         config.set_keys({ "notifiers": [ notifier ]})
         notifier_config = configure_notifier(notifier, config)
         config.set_keys(notifier_config)
-        captcha_config = configure_captcha(urls, config)
+        captcha_config = configure_captcha([entry_url(entry) for entry in urls], config)
         if captcha_config is not None:
             config.set_keys(captcha_config)
         save_config(config.config)
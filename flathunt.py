@@ -4,11 +4,16 @@
    messages about them. This is the main command-line executable, for running on the
    console. To run as a webservice, look at main.py"""
 
+import asyncio
 import time
 from datetime import time as dtime
 
 from flathunter.argument_parser import parse
 from flathunter.logging import logger, configure_logging
+from flathunter.session_pool import configure_session_pool
+from flathunter.html_parser import configure_html_parser
+from flathunter.parse_pool import configure_parse_pool
+from flathunter.geo import configure_geocoder
 from flathunter.idmaintainer import IdMaintainer
 from flathunter.hunter import Hunter
 from flathunter.config import Config
@@ -22,9 +27,17 @@ __email__ = "harrymcfly@protonmail.com"
 __status__ = "Production"
 
 
+def hunt(hunter: Hunter, config):
+    """Run a single crawl with the engine selected in the config"""
+    if config.crawl_engine() == 'async':
+        return asyncio.run(hunter.hunt_flats_async())
+    return hunter.hunt_flats()
+
+
 def launch_flat_hunt(config, heartbeat: Heartbeat):
     """Starts the crawler / notification loop"""
     id_watch = IdMaintainer(f'{config.database_location()}/processed_ids.db')
+    configure_geocoder(config, id_watch)
 
     time_from = dtime.fromisoformat(config.loop_pause_from())
     time_till = dtime.fromisoformat(config.loop_pause_till())
@@ -32,7 +45,7 @@ def launch_flat_hunt(config, heartbeat: Heartbeat):
     wait_during_period(time_from, time_till)
 
     hunter = Hunter(config, id_watch)
-    hunter.hunt_flats()
+    hunt(hunter, config)
     counter = 0
 
     while config.loop_is_active():
@@ -41,7 +54,7 @@ def launch_flat_hunt(config, heartbeat: Heartbeat):
         counter += 1
         counter = heartbeat.send_heartbeat(counter)
         time.sleep(config.loop_period_seconds())
-        hunter.hunt_flats()
+        hunt(hunter, config)
 
 
 def main():
@@ -57,6 +70,11 @@ def main():
     # setup logging
     configure_logging(config)
 
+    # setup shared HTTP sessions
+    configure_session_pool(config)
+    configure_html_parser(config)
+    configure_parse_pool(config)
+
     # initialize search plugins for config
     config.init_searchers()
 
@@ -1,15 +1,21 @@
 """Interface for webcrawlers. Crawler implementations should subclass this"""
 from abc import ABC
+import asyncio
+import hashlib
+import json
+import math
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from time import sleep
-from typing import Optional, Any
+from typing import Optional, Any, Callable, Dict, List, Tuple, Union
 
 import backoff
 import requests
 # pylint: disable=unused-import
 import requests_random_user_agent
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver import Chrome
@@ -19,8 +25,24 @@ from selenium.webdriver.support.wait import WebDriverWait
 
 from flathunter import proxies
 from flathunter.captcha.captcha_solver import CaptchaUnsolvableError
+from flathunter.embedded_json import EmbeddedJson, EmbeddedJsonPage
+from flathunter.expose import Expose
+from flathunter.html_parser import SelectorStrainer, make_soup
+from flathunter.parse_pool import ExtractedPage, parse_pool
 from flathunter.logging import logger
 from flathunter.exceptions import ProxyException
+from flathunter.session_pool import session_pool
+from flathunter.streaming_parser import StreamingResultParser
+from flathunter.utils.list import chunk_list
+from flathunter.utils.url import set_query_param
+
+# The outcome of the last request of each thread, as (url, usable), so that
+# detail pages are only cached if they were loaded successfully
+last_response = threading.local()
+
+# A parsed search result page: a soup, the embedded JSON of the page, or the
+# entries already extracted by a parse worker
+SearchPage = Union[BeautifulSoup, EmbeddedJsonPage, ExtractedPage]
 
 
 class Crawler(ABC):
@@ -28,6 +50,13 @@ class Crawler(ABC):
 
     URL_PATTERN: re.Pattern
 
+    # Maximum number of results collected from a search when no page limit is given
+    RESULT_LIMIT: Optional[int] = None
+
+    # CSS selector of the elements holding the search results, used to detect
+    # unchanged search pages. The whole page is compared if it is not set
+    RESULT_CONTAINER: Optional[str] = None
+
     HEADERS = {
         'Connection': 'keep-alive',
         'Pragma': 'no-cache',
@@ -43,39 +72,167 @@ class Crawler(ABC):
         'Accept-Language': 'en-US,en;q=0.9',
     }
 
+    # Query parameter holding the page number of a search, for portals that
+    # paginate that way
+    PAGE_PARAM: Optional[str] = None
+
+    # CSS selectors of elements outside the result container that are needed to
+    # read a search page, e.g. the result count
+    RESULT_EXTRAS: List[str] = []
+
+    # Simple CSS selector of the listing cards in the result container. If it is
+    # set, streamed search pages are extracted card by card with extract_card,
+    # while they are downloaded
+    RESULT_CARD: Optional[str] = None
+
+    # Script tags holding the search results as JSON. If they are found in the
+    # raw markup, extract_data receives an EmbeddedJsonPage instead of a soup
+    EMBEDDED_JSON: Optional[EmbeddedJson] = None
+
+    # Texts on a page showing that the portal has identified us as a bot
+    BOT_DETECTION_MARKERS: List[str] = []
+
+    # Size of the chunks in which streamed search pages are read
+    STREAM_CHUNK_SIZE = 16384
+
+    # Store for search page fingerprints (a PendingFingerprints), set by the Hunter
+    fingerprints = None
+
+    # Store of crawled expose ids, used to stop paginating early. Set by the Hunter
+    seen_ids = None
+
     def __init__(self, config):
         self.config = config
         if config.captcha_enabled():
             self.captcha_solver = config.get_captcha_solver()
 
     # pylint: disable=unused-argument
-    def get_page(self, search_url, driver=None, page_no=None) -> BeautifulSoup:
+    def get_page(self, search_url, driver=None, page_no=None) -> SearchPage:
         """Applies a page number to a formatted search URL and fetches the exposes at that page"""
-        return self.get_soup_from_url(search_url)
+        if self.streams_results():
+            return self.load_search_page(search_url, self.HEADERS)[1]
+        return self.get_search_page_from_url(search_url)
+
+    def parse_search_page(self, markup) -> SearchPage:
+        """Parses a search page. If the parse pool is running, the page is parsed and
+        extracted in a worker process, and an ExtractedPage is returned"""
+        if parse_pool.enabled():
+            return parse_pool.extract(type(self), markup, digest=self.fingerprints is not None)
+        return self.parse_markup(markup)
+
+    def parse_markup(self, markup) -> Union[BeautifulSoup, EmbeddedJsonPage]:
+        """Parses a search page in this process. Embedded JSON is decoded straight from the markup;
+        otherwise, if the crawler declares a result container, only the container
+        and the extra elements are built into the tree"""
+        if self.EMBEDDED_JSON is not None:
+            page = self.EMBEDDED_JSON.parse(markup)
+            if page is not None:
+                return page
+            logger.debug("No embedded JSON on search page, parsing the DOM instead")
+        if self.RESULT_CONTAINER is None:
+            return make_soup(markup)
+        return make_soup(markup, parse_only=SelectorStrainer(
+            [self.RESULT_CONTAINER] + self.RESULT_EXTRAS))
+
+    def extract_entries(self, page) -> List[Dict]:
+        """Extracts the exposes from a parsed search page"""
+        if isinstance(page, ExtractedPage):
+            return page.entries
+        return self.extract_data(page)
+
+    def streams_results(self) -> bool:
+        """True if search pages are parsed while they are downloaded, keeping only
+        the result container"""
+        return self.RESULT_CONTAINER is not None \
+            and type(self).get_markup_from_url is Crawler.get_markup_from_url \
+            and self.config.stream_search_pages() \
+            and not self.config.use_proxy()
+
+    def load_search_page(self, url: str,
+                         headers: Dict[str, str]) -> Tuple[requests.Response, SearchPage]:
+        """Loads a search page with a plain HTTP request. When streaming, only the
+        result container is parsed, and the download stops at its end"""
+        self.config.rate_limiter().acquire(url)
+        container = self.RESULT_CONTAINER
+        if container is None or not self.streams_results():
+            resp = session_pool.get(url, headers=headers)
+            self.report_response(url, resp.status_code, resp.content, resp.headers)
+            return resp, self.parse_search_page(resp.content)
+
+        with session_pool.get(url, headers=headers, stream=True) as resp:
+            if resp.status_code != 200:
+                self.report_response(url, resp.status_code, resp.content, resp.headers)
+                if resp.status_code not in (304, 405):
+                    logger.error("Got response (%i): %s", resp.status_code, resp.content)
+                return resp, self.parse_search_page(resp.content)
+            return resp, self.stream_search_page(url, resp, container)
+
+    def stream_search_page(self, url: str, resp: requests.Response,
+                           container: str) -> SearchPage:
+        """Parses a search page while it is downloaded. If the crawler declares its
+        listing cards, each card is extracted as soon as it is complete, and an
+        ExtractedPage is returned"""
+        entries: List[Dict] = []
+        digest = hashlib.sha256()
+
+        def read_card(markup: str):
+            card = make_soup(markup)
+            if self.fingerprints is not None:
+                self.update_result_digest(digest, card)
+            entry = self.extract_card(card)
+            if entry is not None:
+                entries.append(entry)
+
+        charset = 'charset' in resp.headers.get('Content-Type', '')
+        parser = StreamingResultParser(container, self.RESULT_EXTRAS,
+                                       card=self.RESULT_CARD, on_card=read_card,
+                                       encoding=resp.encoding if charset else None)
+        blocked = False
+        tail = b''
+        received = 0
+        for chunk in resp.iter_content(chunk_size=self.STREAM_CHUNK_SIZE):
+            blocked = blocked or self.is_blocked_response(200, tail + chunk)
+            tail = chunk[-256:]
+            received += len(chunk)
+            parser.feed(chunk)
+            if parser.done:
+                break
+        if not parser.done:
+            parser.close()
+        logger.debug("Parsed %d bytes of %s", received, url)
+        self.config.rate_limiter().report(url, blocked)
+        soup = parser.soup()
+        if self.RESULT_CARD is None:
+            return soup
+        return ExtractedPage(entries, self.get_result_count(soup),
+                             digest.hexdigest() if self.fingerprints is not None else None)
 
     @backoff.on_exception(wait_gen=backoff.constant,
                           exception=TimeoutException,
                           max_tries=3)
-    def get_soup_from_url(
+    def get_markup_from_url(
             self,
             url: str,
             driver: Optional[Any] = None,
             checkbox: bool = False,
-            afterlogin_string: Optional[str] = None) -> BeautifulSoup:
-        """Creates a Soup object from the HTML at the provided URL"""
-
+            afterlogin_string: Optional[str] = None) -> Union[str, bytes]:
+        """Loads the HTML at the provided URL"""
         if self.config.use_proxy():
-            return self.get_soup_with_proxy(url)
+            return self.get_markup_with_proxy(url)
         if driver is not None:
+            self.config.rate_limiter().acquire(url)
             driver.get(url)
+            self.report_response(url, 200, driver.page_source)
             if re.search("initGeetest", driver.page_source):
                 self.resolve_geetest(driver)
             elif re.search("g-recaptcha", driver.page_source):
                 self.resolve_recaptcha(
                     driver, checkbox, afterlogin_string or "")
-            return BeautifulSoup(driver.page_source, 'lxml')
+            return driver.page_source
 
-        resp = requests.get(url, headers=self.HEADERS, timeout=30)
+        self.config.rate_limiter().acquire(url)
+        resp = session_pool.get(url, headers=self.HEADERS)
+        self.report_response(url, resp.status_code, resp.content, resp.headers)
         if resp.status_code not in (200, 405):
             user_agent = 'Unknown'
             if 'User-Agent' in self.HEADERS:
@@ -83,25 +240,92 @@ class Crawler(ABC):
             logger.error("Got response (%i): %s\n%s",
                          resp.status_code, resp.content, user_agent)
 
-        return BeautifulSoup(resp.content, 'lxml')
+        return resp.content
+
+    def get_soup_from_url(
+            self,
+            url: str,
+            driver: Optional[Any] = None,
+            checkbox: bool = False,
+            afterlogin_string: Optional[str] = None) -> BeautifulSoup:
+        """Creates a Soup object from the HTML at the provided URL"""
+        return make_soup(self.get_markup_from_url(url, driver, checkbox, afterlogin_string))
+
+    def get_search_page_from_url(
+            self,
+            url: str,
+            driver: Optional[Any] = None,
+            checkbox: bool = False,
+            afterlogin_string: Optional[str] = None) -> SearchPage:
+        """Loads and parses the search result page at the provided URL, restricted
+        to the result container"""
+        return self.parse_search_page(
+            self.get_markup_from_url(url, driver, checkbox, afterlogin_string))
+
+    def is_blocked_response(self, status_code: int, content) -> bool:
+        """True if the response shows that the portal is refusing our requests"""
+        if status_code in (403, 429):
+            return True
+        if isinstance(content, bytes):
+            return any(marker.encode('utf-8') in content for marker in self.BOT_DETECTION_MARKERS)
+        return any(marker in content for marker in self.BOT_DETECTION_MARKERS)
+
+    def report_response(self, url: str, status_code: int, content, headers=None,
+                        adapt_rate: bool = True):
+        """Lets the rate limiter adapt to the outcome of a request. Responses through
+        a proxy pass adapt_rate=False, as a failure says more about the proxy than
+        about the portal"""
+        retry_after = (headers or {}).get('Retry-After')
+        blocked = self.is_blocked_response(status_code, content)
+        last_response.outcome = (url, status_code == 200 and not blocked)
+        if not adapt_rate:
+            return
+        self.config.rate_limiter().report(
+            url, blocked,
+            float(retry_after) if retry_after is not None and retry_after.isdigit() else None)
+
+    def get_detail_page(self, url: str,
+                        load: Optional[Callable[[], BeautifulSoup]] = None) -> BeautifulSoup:
+        """Loads an expose detail page, going through the response cache if it is
+        enabled. 'load' fetches the page on a cache miss. Only pages that were
+        loaded with status 200 and were not blocked are cached"""
+        cache = self.config.response_cache()
+        body = cache.get(url) if cache is not None else None
+        if body is not None:
+            logger.debug("Loaded %s from the response cache", url)
+            return make_soup(body)
+        last_response.outcome = None
+        soup = load() if load is not None else self.get_soup_from_url(url)
+        if cache is not None and last_response.outcome == (url, True):
+            cache.put(url, str(soup).encode('utf-8'))
+        return soup
 
     def get_soup_with_proxy(self, url) -> BeautifulSoup:
         """Will try proxies until it's possible to crawl and return a soup"""
+        return make_soup(self.get_markup_with_proxy(url))
+
+    def get_markup_with_proxy(self, url) -> bytes:
+        """Will try proxies until it's possible to crawl and return the HTML"""
         resolved = False
         resp = None
 
+        # A single request to the portal, however many proxies it takes
+        self.config.rate_limiter().acquire(url)
+
         # We will keep trying to fetch new proxies until one works
         while not resolved:
             proxies_list = proxies.get_proxies()
             for proxy in proxies_list:
                 try:
                     # Very low proxy read timeout, or it will get stuck on slow proxies
-                    resp = requests.get(
+                    resp = session_pool.get(
                         url,
                         headers=self.HEADERS,
                         proxies={"http": proxy, "https": proxy},
                         timeout=(20, 0.1)
                     )
+                    self.report_response(url, resp.status_code, resp.content, resp.headers,
+                                         adapt_rate=False)
 
                     if resp.status_code != 200:
                         logger.error("Got response (%i): %s",
@@ -124,34 +348,348 @@ class Crawler(ABC):
             raise ProxyException(
                 "An error occurred while fetching proxies or content")
 
-        return BeautifulSoup(resp.content, 'lxml')
+        return resp.content
 
     def extract_data(self, soup):
         """Should be implemented in subclass"""
         raise NotImplementedError
 
+    def extract_card(self, card) -> Optional[Dict]:
+        """Extracts the expose from a document holding a single listing card, or
+        returns None if the card does not hold one"""
+        entries = self.extract_data(card)
+        return entries[0] if len(entries) > 0 else None
+
+    def get_page_url(self, search_url: str, page_no: int) -> Optional[str]:
+        """Returns the URL of the given page of a search, or None if the portal
+        does not support pagination. Sets PAGE_PARAM in the search URL, unless
+        implemented in subclass"""
+        if self.PAGE_PARAM is None:
+            return None
+        return set_query_param(search_url, self.PAGE_PARAM, page_no)
+
     # pylint: disable=unused-argument
+    def get_result_count(self, soup: Union[BeautifulSoup, EmbeddedJsonPage]) -> Optional[int]:
+        """Returns the total number of results of a search from its first page,
+        or None if the portal does not show it"""
+        return None
+
+    def count_results(self, page: SearchPage) -> Optional[int]:
+        """Total number of results of a search, or None if it is unknown"""
+        if isinstance(page, ExtractedPage):
+            return page.result_count
+        return self.get_result_count(page)
+
+    def can_fetch_pages_concurrently(self) -> bool:
+        """False if result pages have to be loaded one after another, e.g. in a browser"""
+        return True
+
+    def get_remaining_page_urls(self, search_url: str, soup: SearchPage,
+                                page_size: int, max_pages: Optional[int]) -> List[str]:
+        """Lists the URLs of the result pages to load after the first one"""
+        if page_size == 0:
+            return []
+        no_of_results = self.count_results(soup)
+        if max_pages is None:
+            if self.RESULT_LIMIT is None or no_of_results is None:
+                return []
+            max_pages = math.ceil(self.RESULT_LIMIT / page_size)
+        last_page = max_pages
+        if no_of_results is not None:
+            if self.RESULT_LIMIT is not None:
+                no_of_results = min(no_of_results, self.RESULT_LIMIT)
+            last_page = min(last_page, math.ceil(no_of_results / page_size))
+        page_urls = []
+        for page_no in range(2, last_page + 1):
+            page_url = self.get_page_url(search_url, page_no)
+            if page_url is None:
+                break
+            page_urls.append(page_url)
+        return page_urls
+
+    def fetch_pages(self, search_url, page_urls: List[str]) -> List[List[Dict]]:
+        """Loads and extracts the given result pages, concurrently if possible"""
+        def fetch_page(page_url):
+            try:
+                return self.extract_entries(self.get_page(page_url))
+            except requests.exceptions.RequestException:
+                logger.warning("Failed to load result page %s", page_url)
+                self.discard_fingerprint(search_url)
+                return []
+
+        if len(page_urls) < 2 or not self.can_fetch_pages_concurrently():
+            return [fetch_page(page_url) for page_url in page_urls]
+        workers = min(len(page_urls), self.config.crawl_page_concurrency())
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(fetch_page, page_urls))
+
+    def is_seen_page(self, entries: List[Dict]) -> bool:
+        """True if all exposes on a result page were crawled before"""
+        if self.seen_ids is None:
+            return False
+        expose_ids = {entry['id'] for entry in entries}
+        return len(self.seen_ids.get_seen_ids(expose_ids)) >= len(expose_ids)
+
+    def get_seen_page_limit(self, search_url) -> int:
+        """Number of already seen pages in a row after which pagination stops, or 0"""
+        if self.seen_ids is None:
+            return 0
+        return self.config.stop_after_seen_pages(search_url)
+
+    def page_waves(self, search_url, first_page: List[Dict], page_urls: List[str]):
+        """Splits the remaining page URLs into batches that are loaded at the same time.
+        Returns a callback that tells whether a loaded page should end the pagination"""
+        seen_page_limit = self.get_seen_page_limit(search_url)
+        if seen_page_limit == 0:
+            return [page_urls], lambda page: False
+        wave_size = self.config.crawl_page_concurrency() \
+            if self.can_fetch_pages_concurrently() else 1
+        seen_pages = 1 if self.is_seen_page(first_page) else 0
+
+        def stop_after(page):
+            nonlocal seen_pages
+            seen_pages = seen_pages + 1 if self.is_seen_page(page) else 0
+            return seen_pages >= seen_page_limit
+
+        if seen_pages >= seen_page_limit:
+            return [], stop_after
+        return list(chunk_list(page_urls, wave_size)), stop_after
+
+    def fetch_remaining_pages(self, search_url, first_page, page_urls) -> List[List[Dict]]:
+        """Loads the remaining result pages, wave by wave, until a page is reached
+        that only contains exposes that have already been processed"""
+        waves, stop_after = self.page_waves(search_url, first_page, page_urls)
+        pages = []
+        for wave in waves:
+            for page in self.fetch_pages(search_url, wave):
+                pages.append(page)
+                if stop_after(page):
+                    logger.debug("Stopped paginating %s after %d pages of seen exposes",
+                                 search_url, self.get_seen_page_limit(search_url))
+                    return pages
+        return pages
+
+    @staticmethod
+    def merge_pages(pages: List[List[Dict]]) -> List[Dict]:
+        """Joins the entries of several result pages, dropping entries that moved
+        to a later page while paginating"""
+        seen = set()
+        entries = []
+        for page in pages:
+            for entry in page:
+                if entry['id'] in seen:
+                    continue
+                seen.add(entry['id'])
+                entries.append(entry)
+        return entries
+
+    def get_request_headers(self, fingerprint: Optional[Dict]) -> Dict[str, str]:
+        """Request headers for a search page, conditional on its previous fingerprint"""
+        headers = dict(self.HEADERS)
+        if fingerprint is not None:
+            if fingerprint.get('etag'):
+                headers['If-None-Match'] = fingerprint['etag']
+            if fingerprint.get('last_modified'):
+                headers['If-Modified-Since'] = fingerprint['last_modified']
+        return headers
+
+    def get_result_digest(self, soup: Union[SearchPage, Dict, List]) -> Optional[str]:
+        """Hashes the normalized text and links of the search results on a page.
+        Crawlers of JSON APIs return the decoded response, which is hashed as it is"""
+        if isinstance(soup, (EmbeddedJsonPage, ExtractedPage)):
+            return soup.digest
+        if isinstance(soup, (dict, list)):
+            return hashlib.sha256(
+                json.dumps(soup, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        if not isinstance(soup, Tag):
+            return None
+        if self.RESULT_CONTAINER is not None:
+            containers = soup.select(self.RESULT_CONTAINER)
+        else:
+            containers = [soup.body or soup]
+        digest = hashlib.sha256()
+        for container in containers:
+            self.update_result_digest(digest, container)
+        return digest.hexdigest()
+
+    @staticmethod
+    def update_result_digest(digest, container: Tag):
+        """Adds the normalized text and links below an element to a result digest"""
+        for string in container.find_all(string=True):
+            parent = string.parent
+            if parent is not None and parent is not container \
+                    and parent.name in ('script', 'style'):
+                continue
+            digest.update(' '.join(string.split()).encode('utf-8'))
+        for link in container.find_all('a', href=True):
+            digest.update(str(link['href']).encode('utf-8'))
+
+    def discard_fingerprint(self, search_url):
+        """Drops the fingerprint recorded for a search that was not crawled completely"""
+        if self.fingerprints is not None:
+            self.fingerprints.discard(search_url)
+
+    def page_has_changed(self, search_url, fingerprint, soup, response_headers=None) -> bool:
+        """Records the fingerprint of a freshly loaded search page, and compares it
+        with the fingerprint from the previous crawl. The store only saves it once
+        the whole search was crawled and processed"""
+        digest = self.get_result_digest(soup)
+        response_headers = response_headers or {}
+        if self.fingerprints is not None:
+            self.fingerprints.save_fingerprint(search_url,
+                                               response_headers.get('ETag'),
+                                               response_headers.get('Last-Modified'),
+                                               digest)
+        return fingerprint is None or fingerprint['digest'] != digest
+
+    def get_first_page(self, search_url) -> Optional[SearchPage]:
+        """Loads the first page of a search. Returns None if a fingerprint store is
+        attached and the page has not changed since the previous crawl"""
+        if self.fingerprints is None:
+            return self.get_page(search_url)
+        fingerprint = self.fingerprints.get_fingerprint(search_url)
+        if not self.fetches_plain_http():
+            soup = self.get_page(search_url)
+            return soup if self.page_has_changed(search_url, fingerprint, soup) else None
+
+        resp, soup = self.load_search_page(search_url, self.get_request_headers(fingerprint))
+        if resp.status_code == 304:
+            return None
+        if resp.status_code != 200:
+            logger.error("Got response (%i): %s", resp.status_code, resp.content)
+            return soup
+        return soup if self.page_has_changed(search_url, fingerprint, soup, resp.headers) else None
+
     def get_results(self, search_url, max_pages=None):
         """Loads the exposes from the site, starting at the provided URL"""
         logger.debug("Got search URL %s", search_url)
 
         # load first page
-        soup = self.get_page(search_url)
+        soup = self.get_first_page(search_url)
+        if soup is None:
+            logger.debug("Search page is unchanged since the last crawl: %s", search_url)
+            return []
 
         # get data from first page
-        entries = self.extract_data(soup)
+        entries = self.extract_entries(soup)
         logger.debug('Number of found entries: %d', len(entries))
 
+        # load remaining pages, now that the number of results is known
+        page_urls = self.get_remaining_page_urls(search_url, soup, len(entries), max_pages)
+        if len(page_urls) > 0:
+            logger.debug('Loading up to %d more result pages', len(page_urls))
+            entries = self.merge_pages(
+                [entries] + self.fetch_remaining_pages(search_url, entries, page_urls))
         return entries
 
-    def crawl(self, url, max_pages=None):
+    def fetches_plain_http(self) -> bool:
+        """True if the search pages of this crawler are plain HTTP requests, so that
+        they can be fetched by the async HTTP client instead of in an executor"""
+        cls = type(self)
+        return cls.get_results is Crawler.get_results \
+            and cls.get_page is Crawler.get_page \
+            and cls.get_markup_from_url is Crawler.get_markup_from_url \
+            and not self.config.use_proxy()
+
+    async def get_results_async(self, search_url, max_pages=None, client=None):
+        """Asynchronous variant of get_results. Crawlers that need a browser, a proxy
+        or a custom fetch logic are run in an executor"""
+        if client is None or not self.fetches_plain_http():
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.get_results, search_url, max_pages)
+        logger.debug("Got search URL %s", search_url)
+        soup = await self.get_first_page_async(search_url, client)
+        if soup is None:
+            logger.debug("Search page is unchanged since the last crawl: %s", search_url)
+            return []
+        entries = await asyncio.get_running_loop().run_in_executor(
+            None, self.extract_entries, soup)
+        logger.debug('Number of found entries: %d', len(entries))
+
+        page_urls = self.get_remaining_page_urls(search_url, soup, len(entries), max_pages)
+        if len(page_urls) > 0:
+            logger.debug('Loading up to %d more result pages', len(page_urls))
+            pages = await self.fetch_remaining_pages_async(search_url, entries, page_urls, client)
+            entries = self.merge_pages([entries] + pages)
+        return entries
+
+    async def fetch_remaining_pages_async(self, search_url, first_page, page_urls, client):
+        """Asynchronous variant of fetch_remaining_pages"""
+        waves, stop_after = await asyncio.to_thread(
+            self.page_waves, search_url, first_page, page_urls)
+        pages = []
+        for wave in waves:
+            for page in await asyncio.gather(
+                    *[self.get_page_entries_async(search_url, page_url, client)
+                      for page_url in wave]):
+                pages.append(page)
+                if await asyncio.to_thread(stop_after, page):
+                    return pages
+        return pages
+
+    async def get_soup_async(self, url, client) -> SearchPage:
+        """Fetches the URL with the async HTTP client and parses it in an executor"""
+        await self.config.rate_limiter().acquire_async(url)
+        resp = await client.get(url, headers=self.HEADERS)
+        self.report_response(url, resp.status_code, resp.content, resp.headers)
+        if resp.status_code not in (200, 405):
+            logger.error("Got response (%i): %s", resp.status_code, resp.content)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.parse_search_page, resp.content)
+
+    async def get_first_page_async(self, search_url, client) -> Optional[SearchPage]:
+        """Asynchronous variant of get_first_page"""
+        if self.fingerprints is None:
+            return await self.get_soup_async(search_url, client)
+        # The stores are synchronous (SQLite, Firestore), so they are called from a thread
+        fingerprint = await asyncio.to_thread(self.fingerprints.get_fingerprint, search_url)
+        await self.config.rate_limiter().acquire_async(search_url)
+        resp = await client.get(search_url, headers=self.get_request_headers(fingerprint))
+        self.report_response(search_url, resp.status_code, resp.content, resp.headers)
+        if resp.status_code == 304:
+            return None
+        soup = await asyncio.get_running_loop().run_in_executor(
+            None, self.parse_search_page, resp.content)
+        if resp.status_code != 200:
+            logger.error("Got response (%i): %s", resp.status_code, resp.content)
+            return soup
+        changed = await asyncio.to_thread(
+            self.page_has_changed, search_url, fingerprint, soup, resp.headers)
+        return soup if changed else None
+
+    async def get_page_entries_async(self, search_url, page_url, client) -> List[Dict]:
+        """Loads and extracts a single result page with the async HTTP client"""
+        try:
+            soup = await self.get_soup_async(page_url, client)
+        except requests.exceptions.RequestException:
+            logger.warning("Failed to load result page %s", page_url)
+            self.discard_fingerprint(search_url)
+            return []
+        return await asyncio.get_running_loop().run_in_executor(None, self.extract_entries, soup)
+
+    def crawl(self, url, max_pages=None) -> List[Expose]:
         """Load as many exposes as possible from the provided URL"""
         if re.search(self.URL_PATTERN, url):
             try:
-                return self.get_results(url, max_pages)
+                return [Expose(entry, search_url=url)
+                        for entry in self.get_results(url, max_pages)]
+            except requests.exceptions.ConnectionError:
+                logger.warning(
+                    "Connection to %s failed. Retrying.", url.split('/')[2])
+                self.discard_fingerprint(url)
+                return []
+        return []
+
+    async def crawl_async(self, url, max_pages=None, client=None) -> List[Expose]:
+        """Asynchronous variant of crawl"""
+        if re.search(self.URL_PATTERN, url):
+            try:
+                entries = await self.get_results_async(url, max_pages, client)
+                return [Expose(entry, search_url=url) for entry in entries]
             except requests.exceptions.ConnectionError:
                 logger.warning(
                     "Connection to %s failed. Retrying.", url.split('/')[2])
+                self.discard_fingerprint(url)
                 return []
         return []
 
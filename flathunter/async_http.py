@@ -0,0 +1,72 @@
+"""Asynchronous HTTP client used by the asyncio crawl engine"""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional
+
+import requests
+
+from flathunter.logging import logger
+from flathunter.session_pool import session_pool
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+@dataclass
+class AsyncResponse:
+    """Status code, body and headers of a response fetched by the AsyncHttpClient"""
+    status_code: int
+    content: bytes
+    headers: Mapping[str, str] = field(default_factory=dict)
+
+
+class AsyncHttpClient:
+    """Async HTTP client. Uses aiohttp when it is installed, so that many requests
+    can be in flight on a single event loop. Without aiohttp, requests are sent
+    through the shared session pool in the default executor.
+
+    Errors are raised as `requests` exceptions, so that callers can handle both
+    engines in the same way."""
+
+    def __init__(self,
+                 max_connections: int = 100,
+                 max_connections_per_host: int = 10,
+                 timeout: float = 30,
+                 use_aiohttp: bool = True):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self.use_aiohttp = use_aiohttp and aiohttp is not None
+        self.session = None
+
+    async def __aenter__(self):
+        if self.use_aiohttp and aiohttp is not None:
+            connector = aiohttp.TCPConnector(limit=self.max_connections,
+                                             limit_per_host=self.max_connections_per_host)
+            self.session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        else:
+            logger.debug("aiohttp is not installed - sending async requests from executor")
+        return self
+
+    async def __aexit__(self, *args):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> AsyncResponse:
+        """Fetch the URL and return the response status and body"""
+        if self.session is None or aiohttp is None:
+            response = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: session_pool.get(url, headers=headers, timeout=self.timeout))
+            return AsyncResponse(response.status_code, response.content, response.headers)
+        try:
+            async with self.session.get(url, headers=headers) as response:
+                return AsyncResponse(response.status, await response.read(),
+                                     response.headers)
+        except asyncio.TimeoutError as error:
+            raise requests.exceptions.Timeout(f"Timeout fetching {url}") from error
+        except aiohttp.ClientError as error:
+            raise requests.exceptions.ConnectionError(f"Error fetching {url}: {error}") from error
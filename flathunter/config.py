@@ -1,6 +1,6 @@
 """Wrap configuration options as an object"""
 import os
-from typing import Optional, Dict, Any, List, Callable
+from typing import Optional, Dict, Any, List, Callable, Union
 
 import json
 import yaml
@@ -18,9 +18,12 @@ from flathunter.crawler.meinestadt import MeineStadt
 from flathunter.crawler.wggesucht import WgGesucht
 from flathunter.crawler.vrmimmo import VrmImmo
 from flathunter.crawler.subito import Subito
+from flathunter.crawler_registry import CrawlerRegistry
 from flathunter.filter import Filter
 from flathunter.logging import logger
 from flathunter.exceptions import ConfigException
+from flathunter.rate_limiter import RateLimiter
+from flathunter.response_cache import ResponseCache
 
 load_dotenv()
 
@@ -83,6 +86,22 @@ class Env:
     FLATHUNTER_FILTER_MAX_ROOMS = _read_env("FLATHUNTER_FILTER_MAX_ROOMS")
     FLATHUNTER_FILTER_MAX_PRICE_PER_SQUARE = _read_env(
         "FLATHUNTER_FILTER_MAX_PRICE_PER_SQUARE")
+    FLATHUNTER_FILTER_EXPRESSION = _read_env("FLATHUNTER_FILTER_EXPRESSION")
+
+
+# Options of the filter configuration
+FILTER_OPTIONS = {
+    'excluded_titles',
+    'min_price',
+    'max_price',
+    'min_size',
+    'max_size',
+    'min_rooms',
+    'max_rooms',
+    'max_price_per_square',
+    'expression',
+    'area',
+}
 
 
 def elide(string):
@@ -110,6 +129,9 @@ Preis: {price}
             config = {}
         self.config = config
         self.__searchers__ = []
+        self.__crawler_registry__ = CrawlerRegistry([])
+        self.__response_cache__ = None
+        self.__rate_limiter__ = None
         self.check_deprecated()
 
     def __iter__(self):
@@ -134,6 +156,7 @@ Preis: {price}
             VrmImmo(self),
             CrawIdealistaAPI(self)
         ]
+        self.__crawler_registry__ = CrawlerRegistry(self.__searchers__)
 
     def check_deprecated(self):
         """Notifies user of deprecated config items"""
@@ -173,11 +196,16 @@ Preis: {price}
     def set_searchers(self, searchers):
         """Update the active search plugins"""
         self.__searchers__ = searchers
+        self.__crawler_registry__ = CrawlerRegistry(searchers)
 
     def searchers(self):
         """Get the list of search plugins"""
         return self.__searchers__
 
+    def crawler_for_url(self, url):
+        """Get the search plugin responsible for the URL (or None)"""
+        return self.__crawler_registry__.crawler_for_url(url)
+
     def get_filter(self):
         """Read the configured filter"""
         builder = Filter.builder()
@@ -230,9 +258,120 @@ Preis: {price}
             return config_database_location
         return os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + "/..")
 
+    def url_entries(self) -> List[Union[str, Dict[str, Any]]]:
+        """Entries of the 'urls' list as configured: plain URLs, or dicts with the
+        URL and its crawl options"""
+        return list(self._read_yaml_path('urls', []) or [])
+
     def target_urls(self) -> List[str]:
         """List of target URLs for crawling"""
-        return self._read_yaml_path('urls', [])
+        return [entry['url'] if isinstance(entry, dict) else entry
+                for entry in self.url_entries()]
+
+    def url_options(self, url) -> Dict[str, Any]:
+        """Crawl options configured for a single target URL"""
+        for entry in self._read_yaml_path('urls', []) or []:
+            if isinstance(entry, dict) and entry.get('url') == url:
+                return entry
+        return {}
+
+    def url_filter_profiles(self) -> Dict[str, 'YamlConfig']:
+        """Filter settings of the target URLs with their own filter profile, by URL.
+        A profile overrides the global filter options it sets, and keeps the others"""
+        profiles = {}
+        for entry in self._read_yaml_path('urls', []) or []:
+            if not isinstance(entry, dict) or not entry.get('filters'):
+                continue
+            unknown = set(entry['filters']) - FILTER_OPTIONS
+            if unknown:
+                raise ConfigException(
+                    f"Unknown filter options for {entry['url']}: {', '.join(sorted(unknown))}")
+            filters = {option: self.filter_option(option) for option in FILTER_OPTIONS}
+            filters.update(entry['filters'])
+            profiles[entry['url']] = YamlConfig({'filters': filters})
+        return profiles
+
+    def max_pages_for_url(self, url, default: Optional[int]) -> Optional[int]:
+        """Maximum number of result pages to load for the target URL"""
+        return self.url_options(url).get('max_pages', default)
+
+    def stop_after_seen_pages(self, url) -> int:
+        """Stop paginating the target URL after this many result pages in a row that
+        contain only already processed exposes. 0 loads all pages"""
+        return int(self.url_options(url).get(
+            'stop_after_seen_pages', self._read_yaml_path('crawl.stop_after_seen_pages', 0)))
+
+    def crawl_concurrency(self) -> int:
+        """Maximum number of search URLs crawled at the same time"""
+        return int(self._read_yaml_path('crawl.concurrency', 1))
+
+    def crawl_concurrency_per_host(self) -> int:
+        """Maximum number of search URLs crawled at the same time on a single portal"""
+        return int(self._read_yaml_path('crawl.concurrency_per_host', 1))
+
+    def crawl_page_concurrency(self) -> int:
+        """Maximum number of result pages of a single search URL loaded at the same time"""
+        return int(self._read_yaml_path('crawl.page_concurrency', 4))
+
+    def skip_unchanged_pages(self) -> bool:
+        """Skip search URLs whose first result page did not change since the last crawl"""
+        return bool(self._read_yaml_path('crawl.skip_unchanged_pages', False))
+
+    def stream_search_pages(self) -> bool:
+        """Parse search pages while downloading them, keeping only the result list"""
+        return bool(self._read_yaml_path('crawl.stream_search_pages', False))
+
+    def parse_processes(self) -> int:
+        """Number of worker processes parsing search pages (0 parses in the crawling process)"""
+        return int(self._read_yaml_path('crawl.parse_processes', 0))
+
+    def crawl_engine(self) -> str:
+        """Crawl engine to use - 'sync' (threads) or 'async' (asyncio event loop)"""
+        engine = str(self._read_yaml_path('crawl.engine', 'sync')).lower()
+        if engine not in ('sync', 'async'):
+            raise ConfigException(f"Unknown crawl engine '{engine}' - use 'sync' or 'async'")
+        return engine
+
+    def response_cache_enabled(self) -> bool:
+        """Cache expose detail pages on disk"""
+        return bool(self._read_yaml_path('cache.enabled', False))
+
+    def response_cache(self) -> Optional[ResponseCache]:
+        """Shared cache for expose detail pages, or None if it is disabled"""
+        if not self.response_cache_enabled():
+            return None
+        if self.__response_cache__ is None:
+            self.__response_cache__ = ResponseCache(
+                self._read_yaml_path('cache.location',
+                                     f'{self.database_location()}/response_cache.db'),
+                float(self._read_yaml_path('cache.ttl_hours', 24)) * 3600,
+                int(float(self._read_yaml_path('cache.max_size_mb', 100)) * 1024 * 1024))
+        return self.__response_cache__
+
+    def rate_limiter(self) -> RateLimiter:
+        """Shared per-host rate limiter for requests to the portals"""
+        if self.__rate_limiter__ is None:
+            self.__rate_limiter__ = RateLimiter(
+                float(self._read_yaml_path('rate_limit.requests_per_second', 0.0)),
+                int(self._read_yaml_path('rate_limit.burst', 5)),
+                self._read_yaml_path('rate_limit.hosts', {}) or {})
+        return self.__rate_limiter__
+
+    def html_parser(self) -> str:
+        """Parser backend for HTML pages"""
+        return str(self._read_yaml_path('html_parser', 'lxml'))
+
+    def http_pool_connections(self) -> int:
+        """Number of connection pools cached per HTTP session"""
+        return int(self._read_yaml_path('http.pool_connections', 10))
+
+    def http_pool_maxsize(self) -> int:
+        """Maximum number of keep-alive connections per host"""
+        return int(self._read_yaml_path('http.pool_maxsize', 10))
+
+    def http_timeout(self) -> float:
+        """Default timeout (in seconds) for HTTP requests"""
+        return float(self._read_yaml_path('http.timeout', 30))
 
     def verbose_logging(self):
         """Return true if logging should be verbose"""
@@ -270,6 +409,20 @@ Preis: {price}
         """Name of the telegram bot used by the flathunter website to send messages"""
         return self._read_yaml_path('website.bot_name', None)
 
+    def website_user_matching(self) -> str:
+        """How the website matches new exposes to its users: 'index' (a cached index of
+        the users' filters) or 'batch' (all users' filters loaded and compared per run)"""
+        matching = str(self._read_yaml_path('website.user_matching', 'index')).lower()
+        if matching not in ('index', 'batch'):
+            raise ConfigException(
+                f"Unknown user matching '{matching}' - use 'index' or 'batch'")
+        return matching
+
+    def website_user_index_ttl(self) -> float:
+        """Seconds after which the index of the users' filters is reloaded from the
+        database, to pick up changes made by other processes"""
+        return float(self._read_yaml_path('website.user_index_ttl', 300))
+
     def google_cloud_project_id(self):
         """Google Cloud project ID for App Engine / Cloud Run deployments"""
         return self._read_yaml_path('google_cloud_project_id', None)
@@ -423,6 +576,19 @@ Preis: {price}
         """Return the configured maximum price per square meter"""
         return self._get_filter_config("max_price_per_square")
 
+    def filter_option(self, option):
+        """Return the configured value of a filter option"""
+        accessor = getattr(self, f"filter_{option}", None) or getattr(self, option)
+        return accessor()
+
+    def filter_expression(self):
+        """Return the configured filter expression"""
+        return self._get_filter_config("expression")
+
+    def filter_area(self):
+        """Return the configured polygons and radius constraints"""
+        return self._get_filter_config("area")
+
     def immoscout_cookie(self):
         """Return the precalculated immoscout cookie"""
         return self._read_yaml_path('immoscout_cookie', None)
@@ -638,5 +804,11 @@ class Config(CaptchaEnvironmentConfig):  # pylint: disable=too-many-public-metho
             return float(env_price)
         return super().max_price_per_square()
 
+    def filter_expression(self):
+        env_expression = Env.FLATHUNTER_FILTER_EXPRESSION()
+        if env_expression is not None:
+            return env_expression
+        return super().filter_expression()
+
     def immoscout_cookie(self):
         return Env.FLATHUNTER_IS24_COOKIE() or super().immoscout_cookie()
@@ -0,0 +1,65 @@
+"""Bounded worker pool for running crawl jobs concurrently"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Tuple, TypeVar
+from urllib.parse import urlparse
+
+from flathunter.logging import logger
+
+JobT = TypeVar("JobT")
+ResultT = TypeVar("ResultT")
+
+
+def host_for_url(url: str) -> str:
+    """Return the (lowercase) hostname of a URL, or an empty string if it has none"""
+    return (urlparse(url).hostname or "").lower()
+
+
+class CrawlExecutor:
+    """Runs crawl jobs on a bounded thread pool.
+
+    At most `max_workers` jobs run at the same time, and at most `max_per_host`
+    of those target the same host. Jobs for a busy host wait in a per-host queue
+    without occupying a worker, so one slow portal cannot starve the others.
+    Results are yielded in the order in which the jobs complete."""
+
+    def __init__(self, max_workers: int, max_per_host: int = 1):
+        self.max_workers = max(1, max_workers)
+        self.max_per_host = max(1, max_per_host)
+
+    def map(self,
+            func: Callable[[JobT], ResultT],
+            jobs: Iterable[Tuple[str, JobT]]) -> Iterator[ResultT]:
+        """Apply func to every job, yielding results as they become available.
+        Each job is a tuple of (url, job), where url is used to work out the host"""
+        queues: Dict[str, Deque[JobT]] = {}
+        for url, job in jobs:
+            queues.setdefault(host_for_url(url), deque()).append(job)
+        running_per_host: Dict[str, int] = {host: 0 for host in queues}
+        futures: Dict[Future, str] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="crawl") as executor:
+            def submit_ready_jobs():
+                for host, queue in queues.items():
+                    while queue and len(futures) < self.max_workers \
+                            and running_per_host[host] < self.max_per_host:
+                        futures[executor.submit(func, queue.popleft())] = host
+                        running_per_host[host] += 1
+
+            submit_ready_jobs()
+            while futures:
+                done, _ = wait(list(futures.keys()), return_when=FIRST_COMPLETED)
+                for future in done:
+                    host = futures.pop(future)
+                    running_per_host[host] -= 1
+                    logger.debug("Crawl job for %s finished", host)
+                    submit_ready_jobs()
+                    yield future.result()
+
+    def crawl(self,
+              func: Callable[[JobT], List[ResultT]],
+              jobs: Iterable[Tuple[str, JobT]]) -> Iterator[ResultT]:
+        """Apply func to every job and yield the individual items of the resulting lists"""
+        for results in self.map(func, jobs):
+            yield from results
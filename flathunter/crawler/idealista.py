@@ -1,15 +1,15 @@
 """Expose crawler for Idealista"""
 import re
-import requests
 import json
-from flathunter.logging import logger
-from flathunter.abstract_crawler import Crawler
 import urllib
-import requests as rq
 import base64
 import time
 from datetime import datetime, timedelta
 
+from flathunter.logging import logger
+from flathunter.abstract_crawler import Crawler
+from flathunter.session_pool import session_pool
+
 class CrawIdealistaAPI(Crawler):
 
     APIv3URL = 'https://api.idealista.com/3.5/es/search'
@@ -34,7 +34,7 @@ class CrawIdealistaAPI(Crawler):
         auth = base64.b64encode(final.encode())
         params = urllib.parse.urlencode({'grant_type':'client_credentials'})
         headers = {'Content-Type': 'application/x-www-form-urlencoded;charset=UTF-8','Authorization' : 'Basic ' + auth.decode()}
-        content = rq.post(url,headers = headers, params=params)
+        content = session_pool.post(url,headers = headers, params=params)
         # bearer_token = json.loads(content.text)['access_token']
         return json.loads(content.text)
     
@@ -75,7 +75,7 @@ class CrawIdealistaAPI(Crawler):
         }
         logger.info('scannig url %s\n', search_url)
         logger.info('post data %s\n', post_data)
-        resp = requests.post(search_url, files=post_data, headers=MYHEADERS, timeout=30)
+        resp = session_pool.post(search_url, files=post_data, headers=MYHEADERS)
         if resp.status_code not in (200, 405):
             user_agent = 'Unknown'
             if 'User-Agent' in self.HEADERS:
@@ -132,10 +132,7 @@ class Idealista(Crawler):
     # pylint: disable=unused-argument
     def get_page(self, search_url, driver=None, page_no=None):
         """Applies a page number to a formatted search URL and fetches the exposes at that page"""
-        if self.config.use_proxy():
-            return self.get_soup_with_proxy(search_url)
-
-        return self.get_soup_from_url(search_url)
+        return self.get_search_page_from_url(search_url)
 
     # pylint: disable=too-many-locals
     def extract_data(self, soup):
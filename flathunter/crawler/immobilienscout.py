@@ -1,8 +1,9 @@
 """Expose crawler for ImmobilienScout"""
-from typing import Optional
+from typing import Any, Dict, List, Optional
 import datetime
 import re
 
+import soupsieve
 from bs4 import BeautifulSoup, Tag
 from jsonpath_ng.ext import parse
 from selenium.common.exceptions import JavascriptException
@@ -15,24 +16,68 @@ from flathunter.exceptions import DriverLoadException
 
 STATIC_URL_PATTERN = re.compile(r'https://www\.immobilienscout24\.de')
 
+RESULT_COUNT_SELECTOR = soupsieve.compile('[data-is24-qa="resultlist-resultCount"]')
+TITLE_SELECTOR = soupsieve.compile('a.result-list-entry__brand-title-container')
+ATTRIBUTES_SELECTOR = soupsieve.compile('[data-is24-qa="attributes"]')
+ADDRESS_SELECTOR = soupsieve.compile('.result-list-entry__address')
+GALLERY_SELECTOR = soupsieve.compile('.result-list-entry__gallery-container')
+
 def get_result_count(soup: BeautifulSoup) -> int:
     """Scrape the result count from the returned page"""
-    def is_result_count_element(element) -> bool:
-        if not isinstance(element, Tag):
-            return False
-        if not element.has_attr('data-is24-qa'):
-            return False
-        return element.attrs['data-is24-qa'] == 'resultlist-resultCount'
-
-    count_element = soup.find(is_result_count_element)
+    count_element = RESULT_COUNT_SELECTOR.select_one(soup)
     if not isinstance(count_element, Tag):
         return 0
     return int(count_element.text.replace('.', ''))
 
+IMAGE_URL_PATTERN = re.compile(r'(.*\.jpe?g).*')
+
+def as_list(value) -> List[Any]:
+    """The IS24 JSON holds single elements without the surrounding list"""
+    return value if isinstance(value, list) else [value]
+
+def find_real_estates(data: Dict) -> Optional[List[Dict]]:
+    """Reads the result list entries along the known structure of the IS24 object.
+    Returns None if the object does not have that structure"""
+    try:
+        result_list = data.get('resultList', data)
+        search_response = result_list['resultListModel']['searchResponseModel']
+        entry_groups = search_response['resultlist.resultlist']['resultlistEntries']
+        return [entry['resultlist.realEstate']
+                for group in as_list(entry_groups)
+                for entry in as_list(group['resultlistEntry'])
+                if 'resultlist.realEstate' in entry]
+    except (KeyError, TypeError, AttributeError):
+        return None
+
+def original_image_url(href: str) -> Optional[str]:
+    """Strips the size placeholders following the image file name. Returns None
+    if there is nothing to strip"""
+    url = IMAGE_URL_PATTERN.sub(r'\1', href)
+    return url if url != href else None
+
+def find_images(entry: Dict) -> Optional[List[str]]:
+    """Reads the picture URLs of a result list entry along the known structure of
+    the IS24 object. Returns None if the entry does not have that structure"""
+    try:
+        pictures = entry.get('galleryAttachments', {}).get('attachment')
+        if not isinstance(pictures, list):
+            return []
+        return [url for picture in pictures
+                if isinstance(picture, dict) and picture.get('@xsi.type') == 'common:Picture'
+                for group in as_list(picture['urls'])
+                for link in as_list(group['url'])
+                if (url := original_image_url(link['@href'])) is not None]
+    except (KeyError, TypeError, AttributeError):
+        return None
+
 class Immobilienscout(Crawler):
     """Implementation of Crawler interface for ImmobilienScout"""
 
     URL_PATTERN = STATIC_URL_PATTERN
+    PAGE_PARAM = 'pagenumber'
+    RESULT_CONTAINER = "#resultListItems"
+    RESULT_EXTRAS = ['[data-is24-qa="resultlist-resultCount"]']
+    BOT_DETECTION_MARKERS = ["Warum haben wir deine Anfrage blockiert?"]
 
     JSON_PATH_PARSER_ENTRIES = parse("$..['resultlist.realEstate']")
     JSON_PATH_PARSER_IMAGES = parse("$..galleryAttachments"
@@ -76,43 +121,20 @@ class Immobilienscout(Crawler):
 
     def get_results(self, search_url, max_pages=None):
         """Loads the exposes from the ImmoScout site, starting at the provided URL"""
-        # convert to paged URL
-        # if '/P-' in search_url:
-        #     search_url = re.sub(r"/Suche/(.+?)/P-\d+", "/Suche/\1/P-{0}", search_url)
-        # else:
-        #     search_url = re.sub(r"/Suche/(.+?)/", r"/Suche/\1/P-{0}/", search_url)
-        if '&pagenumber' in search_url:
-            search_url = re.sub(r"&pagenumber=[0-9]", "&pagenumber={0}", search_url)
-        else:
-            search_url = search_url + '&pagenumber={0}'
-        logger.debug("Got search URL %s", search_url)
-
-        # load first page to get number of entries
-        page_no = 1
-        soup = self.get_page(search_url, self.get_driver(), page_no)
-
         # If we are using Selenium, just parse the results from the JSON in the page response
         if self.get_driver() is not None:
+            logger.debug("Got search URL %s", search_url)
+            self.get_page(search_url, self.get_driver())
             return self.get_entries_from_javascript()
+        return super().get_results(search_url, max_pages)
 
-        no_of_results = get_result_count(soup)
-
-        # get data from first page
-        entries = self.extract_data(soup)
-
-        # iterate over all remaining pages
-        while len(entries) < min(no_of_results, self.RESULT_LIMIT) and \
-                (max_pages is None or page_no < max_pages):
-            logger.debug(
-                '(Next page) Number of entries: %d / Number of results: %d',
-                len(entries), no_of_results)
-            page_no += 1
-            soup = self.get_page(search_url, self.get_driver(), page_no)
-            cur_entry = self.extract_data(soup)
-            if isinstance(cur_entry, list):
-                break
-            entries.extend(cur_entry)
-        return entries
+    def get_result_count(self, soup):
+        """Scrape the result count from the returned page"""
+        return get_result_count(soup)
+
+    def can_fetch_pages_concurrently(self):
+        """Pages can only be loaded concurrently without the shared driver"""
+        return self.get_driver() is None
 
     def get_entries_from_javascript(self):
         """Get entries from JavaScript"""
@@ -120,7 +142,7 @@ class Immobilienscout(Crawler):
             result_json = self.get_driver_force().execute_script('return window.IS24.resultList;')
         except JavascriptException:
             logger.warning("Unable to find IS24 variable in window")
-            if "Warum haben wir deine Anfrage blockiert?" in self.get_driver_force().page_source:
+            if self.is_blocked_response(200, self.get_driver_force().page_source):
                 logger.error(
                     "IS24 bot detection has identified our script as a bot - we've been blocked"
                 )
@@ -129,10 +151,11 @@ class Immobilienscout(Crawler):
 
     def get_entries_from_json(self, json):
         """Get entries from JSON"""
-        entries = [
-            self.extract_entry_from_javascript(entry.value)
-                for entry in self.JSON_PATH_PARSER_ENTRIES.find(json)
-        ]
+        real_estates = find_real_estates(json)
+        if real_estates is None:
+            logger.debug("Unexpected structure of IS24 result list, falling back to JSONPath")
+            real_estates = [entry.value for entry in self.JSON_PATH_PARSER_ENTRIES.find(json)]
+        entries = [self.extract_entry_from_javascript(entry) for entry in real_estates]
         logger.debug('Number of found entries: %d', len(entries))
         return entries
 
@@ -149,10 +172,12 @@ class Immobilienscout(Crawler):
         #
         # After: https://pictures.immobilienscout24.de/listings/$$IMAGE_ID$$.jpg
 
-        images = [image.value for image in self.JSON_PATH_PARSER_IMAGES.find(entry)]
+        images = find_images(entry)
+        if images is None:
+            images = [image.value for image in self.JSON_PATH_PARSER_IMAGES.find(entry)]
 
         object_id: int = int(entry.get("@id", 0))
-        return {
+        expose = {
             'id': object_id,
             'url': f"https://www.immobilienscout24.de/expose/{str(object_id)}",
             'image': images[0] if len(images) else self.FALLBACK_IMAGE_URL,
@@ -166,15 +191,24 @@ class Immobilienscout(Crawler):
             'size': str(entry.get("livingSpace", '')),
             'rooms': str(entry.get("numberOfRooms", ''))
         }
+        coordinate = entry.get("address", {}).get("wgs84Coordinate")
+        if coordinate is not None:
+            expose['lat'] = str(coordinate['latitude'])
+            expose['long'] = str(coordinate['longitude'])
+        return expose
 
     def set_cookie(self):
         """Sets request header cookie parameter to identify as a logged in user"""
         self.HEADERS['Cookie'] = f'reese84:${self.config.immoscout_cookie()}'
 
     def get_page(self, search_url, driver=None, page_no=None):
-        """Applies a page number to a formatted search URL and fetches the exposes at that page"""
-        return self.get_soup_from_url(
-            search_url.format(page_no),
+        """Applies a page number to a search URL and fetches the exposes at that page"""
+        if page_no is not None:
+            search_url = self.get_page_url(search_url, page_no) or search_url
+        if driver is None and self.streams_results():
+            return self.load_search_page(search_url, self.HEADERS)[1]
+        return self.get_search_page_from_url(
+            search_url,
             driver=driver,
             checkbox=self.checkbox,
             afterlogin_string=self.afterlogin_string,
@@ -182,7 +216,7 @@ class Immobilienscout(Crawler):
 
     def get_expose_details(self, expose):
         """Loads additional details for an expose by processing the expose detail URL"""
-        soup = self.get_soup_from_url(expose['url'])
+        soup = self.get_detail_page(expose['url'])
         date = soup.find('dd', {"class": "is24qa-bezugsfrei-ab"})
         expose['from'] = datetime.datetime.now().strftime("%2d.%2m.%Y")
         if date is not None:
@@ -197,13 +231,10 @@ class Immobilienscout(Crawler):
         entries = []
 
         results_list = soup.find(id="resultListItems")
-        title_elements = results_list.find_all(
-            lambda e: e.name == 'a' and e.has_attr('class') and \
-                      'result-list-entry__brand-title-container' in e['class']
-        ) if results_list else []
+        title_elements = TITLE_SELECTOR.select(results_list) if results_list else []
         expose_ids = []
         expose_urls = []
-        expose_id = 0
+        seen_ids = set()
         for link in title_elements:
             expose_id = int(link.get('href').split('/')[-1].replace('.html', ''))
             expose_ids.append(expose_id)
@@ -212,15 +243,9 @@ class Immobilienscout(Crawler):
             else:
                 expose_urls.append(link.get('href'))
 
-        attr_container_els = soup.find_all(
-            lambda e: e.has_attr('data-is24-qa') and e['data-is24-qa'] == "attributes"
-        )
-        address_fields = soup.find_all(
-            lambda e: e.has_attr('class') and 'result-list-entry__address' in e['class']
-        )
-        gallery_elements = soup.find_all(
-            lambda e: e.has_attr('class') and 'result-list-entry__gallery-container' in e['class']
-        )
+        attr_container_els = ATTRIBUTES_SELECTOR.select(soup)
+        address_fields = ADDRESS_SELECTOR.select(soup)
+        gallery_elements = GALLERY_SELECTOR.select(soup)
         for idx, title_el in enumerate(title_elements):
             attr_els = attr_container_els[idx].find_all('dd')
             try:
@@ -255,13 +280,8 @@ class Immobilienscout(Crawler):
                 details['price'] = ''
                 details['size'] = ''
                 details['rooms'] = ''
-            # print entries
-            exist = False
-            for expose in entries:
-                if expose_id == expose["id"]:
-                    exist = True
-                    break
-            if not exist:
+            if expose_ids[idx] not in seen_ids:
+                seen_ids.add(expose_ids[idx])
                 entries.append(details)
 
         logger.debug('Number of entries found: %d', len(entries))
@@ -12,6 +12,8 @@ class Immowelt(Crawler):
     """Implementation of Crawler interface for ImmoWelt"""
 
     URL_PATTERN = re.compile(r'https://www\.immowelt\.de')
+    PAGE_PARAM = 'cp'
+    RESULT_CONTAINER = "main"
 
     def __init__(self, config):
         super().__init__(config)
@@ -19,7 +21,7 @@ class Immowelt(Crawler):
 
     def get_expose_details(self, expose):
         """Loads additional details for an expose by processing the expose detail URL"""
-        soup = self.get_page(expose['url'])
+        soup = self.get_detail_page(expose['url'])
         date = datetime.datetime.now().strftime("%2d.%2m.%Y")
         expose['from'] = date
 
@@ -2,15 +2,19 @@
 import re
 import datetime
 
+import soupsieve
 from bs4 import Tag
 
 from flathunter.webdriver_crawler import WebdriverCrawler
 from flathunter.logging import logger
 
+TITLE_SELECTOR = soupsieve.compile('.ellipsis')
+
 class Kleinanzeigen(WebdriverCrawler):
     """Implementation of Crawler interface for Kleinanzeigen"""
 
     URL_PATTERN = re.compile(r'https://www\.kleinanzeigen\.de')
+    RESULT_CONTAINER = "#srchrslt-adtable"
     MONTHS = {
         "Januar": "01",
         "Februar": "02",
@@ -26,8 +30,18 @@ class Kleinanzeigen(WebdriverCrawler):
         "Dezember": "12"
     }
 
+    def get_page_url(self, search_url, page_no):
+        """Inserts the page segment in front of the category code of the search URL"""
+        search_url = re.sub(r'/seite:\d+/', '/', search_url)
+        match = re.match(r'(https://[^?]+)/([^/?]+)(\?.*)?$', search_url)
+        if match is None:
+            return None
+        return f"{match[1]}/seite:{page_no}/{match[2]}{match[3] or ''}"
+
     def get_expose_details(self, expose):
-        soup = self.get_page(expose['url'], self.get_driver())
+        soup = self.get_detail_page(expose['url'],
+                                    lambda: self.get_soup_from_url(expose['url'],
+                                                                   driver=self.get_driver()))
         for detail in soup.find_all('li', {"class": "addetailslist--detail"}):
             if re.match(r'Verfügbar ab', detail.text):
                 date_string = re.match(r'(\w+) (\d{4})', detail.text)
@@ -42,13 +56,11 @@ class Kleinanzeigen(WebdriverCrawler):
         """Extracts all exposes from a provided Soup object"""
         entries = []
         soup = soup.find(id="srchrslt-adtable")
-
-        try:
-            title_elements = soup.find_all(lambda e: e.has_attr('class')
-                                           and 'ellipsis' in e['class'])
-        except AttributeError:
+        if soup is None:
             return entries
 
+        title_elements = TITLE_SELECTOR.select(soup)
+
         expose_ids = soup.find_all("article", class_="aditem")
 
         for idx, title_el in enumerate(title_elements):
@@ -100,7 +112,8 @@ class Kleinanzeigen(WebdriverCrawler):
 
     def load_address(self, url):
         """Extract address from expose itself"""
-        expose_soup = self.get_page(url)
+        expose_soup = self.get_detail_page(
+            url, lambda: self.get_soup_from_url(url, driver=self.get_driver()))
         street_raw = ""
         street_el = expose_soup.find(id="street-address")
         if isinstance(street_el, Tag):
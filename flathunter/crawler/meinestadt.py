@@ -1,7 +1,7 @@
 """Expose crawler for MeineStadt"""
 import re
-import json
 
+from flathunter.embedded_json import EmbeddedJson
 from flathunter.logging import logger
 from flathunter.webdriver_crawler import WebdriverCrawler
 
@@ -9,11 +9,12 @@ class MeineStadt(WebdriverCrawler):
     """Implementation of Crawler interface for MeineStadt"""
 
     URL_PATTERN = re.compile(r'https://www\.meinestadt\.de')
+    RESULT_CONTAINER = 'script[type="application/ld+json"]'
+    EMBEDDED_JSON = EmbeddedJson("type", "application/ld+json")
 
     def extract_data(self, soup):
-        """Extracts all exposes from a provided Soup object"""
-        json_blobs = [ json.loads(node.text)
-            for node in soup.find_all("script", { "type": "application/ld+json" }) ]
+        """Extracts all exposes from a provided Soup object or embedded JSON page"""
+        json_blobs = self.EMBEDDED_JSON.documents(soup)
         entries = sum([ MeineStadt.process_json_list_to_exposes(blob) for blob in json_blobs ], [])
         logger.debug('Number of entries found: %d', len(entries))
         return entries
@@ -75,7 +76,7 @@ class MeineStadt(WebdriverCrawler):
             return None
         rooms = MeineStadt.get_number_for_quantitative_value(apartment, 'numberOfRooms')
         size = MeineStadt.get_number_for_quantitative_value(apartment, 'floorSize')
-        return {
+        expose = {
             'rooms': rooms,
             'size': size,
             'url': apartment['url'],
@@ -86,3 +87,8 @@ class MeineStadt(WebdriverCrawler):
             'address': MeineStadt.get_address(apartment),
             'price': MeineStadt.get_price(blob['@graph'])
         }
+        geo = apartment.get('geo') or {}
+        if 'latitude' in geo and 'longitude' in geo:
+            expose['lat'] = str(geo['latitude'])
+            expose['long'] = str(geo['longitude'])
+        return expose
@@ -1,14 +1,17 @@
 """Expose crawler for Subito"""
 import re
-import json
 
 from flathunter.logging import logger
 from flathunter.abstract_crawler import Crawler
+from flathunter.embedded_json import EmbeddedJson
 
 class Subito(Crawler):
     """Implementation of Crawler interface for Subito"""
 
     URL_PATTERN = re.compile(r'https://www\.subito\.it')
+    PAGE_PARAM = 'o'
+    RESULT_CONTAINER = "script#__NEXT_DATA__"
+    EMBEDDED_JSON = EmbeddedJson("id", "__NEXT_DATA__")
 
     def __init__(self, config):
         super().__init__(config)
@@ -16,13 +19,13 @@ class Subito(Crawler):
 
     # pylint: disable=too-many-locals
     def extract_data(self, soup):
-        """Extracts all exposes from a provided Soup object"""
+        """Extracts all exposes from a provided Soup object or embedded JSON page"""
         entries = []
 
         # as of today, subito provides a useful JSON that represents the state
         # of the search. Neat! We don't have to do much.
-        findings_json = soup.find("script", {"id": "__NEXT_DATA__"}).text.strip()
-        findings = json.loads(findings_json)["props"]["state"]["items"]["list"]
+        state = self.EMBEDDED_JSON.documents(soup)[0]
+        findings = state["props"]["state"]["items"]["list"]
 
         for row in findings:
             row_id = row["item"]["urn"]
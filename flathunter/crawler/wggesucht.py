@@ -2,11 +2,12 @@
 import re
 from typing import Optional, List, Dict, Any, Union
 
-import requests
+import soupsieve
 from bs4 import BeautifulSoup, Tag
 
 from flathunter.logging import logger
 from flathunter.abstract_crawler import Crawler
+from flathunter.session_pool import session_pool
 
 
 def get_title(title_row: Tag) -> str:
@@ -147,17 +148,10 @@ def parse_expose_element_to_details(row: Tag, crawler: str) -> Optional[Dict]:
     return details
 
 
-def liste_attribute_filter(element: Union[Tag, str]) -> bool:
-    """Return true for elements whose 'id' attribute starts with 'liste-' 
-    and are not contained in the 'premium_user_extra_list' container"""
-    if not isinstance(element, Tag):
-        return False
-    if not element.attrs or "id" not in element.attrs:
-        return False
-    if not element.parent or not element.parent.attrs or "class" not in element.parent.attrs:
-        return False
-    return element.attrs["id"].startswith('liste-') and \
-        'premium_user_extra_list' not in element.parent.attrs["class"]
+# Elements whose 'id' attribute starts with 'liste-', that are not hidden and
+# not contained in the 'premium_user_extra_list' container
+LISTE_SELECTOR = soupsieve.compile(
+    '[class]:not(.premium_user_extra_list) > [id^="liste-"][class]:not(.display-none)')
 
 
 class WgGesucht(Crawler):
@@ -169,17 +163,19 @@ class WgGesucht(Crawler):
         super().__init__(config)
         self.config = config
 
+    def get_page_url(self, search_url, page_no):
+        """Sets the (zero-based) page index, the last number of the search URL path"""
+        match = re.match(r'(https://[^?]+\.\d+\.\d+\.\d+\.)\d+(\.html.*)$', search_url)
+        if match is None:
+            return None
+        return f"{match[1]}{page_no - 1}{match[2]}"
+
     # pylint: disable=too-many-locals
     def extract_data(self, soup: BeautifulSoup):
         """Extracts all exposes from a provided Soup object"""
         entries = []
 
-        findings = soup.find_all(liste_attribute_filter)
-        existing_findings = [
-            e for e in findings
-            if isinstance(e, Tag) and e.has_attr('class') and not 'display-none' in e['class']
-        ]
-        for row in existing_findings:
+        for row in LISTE_SELECTOR.select(soup):
             details = parse_expose_element_to_details(row, self.get_name())
             if details is None:
                 continue
@@ -191,7 +187,7 @@ class WgGesucht(Crawler):
 
     def load_address(self, url) -> Optional[str]:
         """Extract address from expose itself"""
-        response = self.get_soup_from_url(url)
+        response = self.get_detail_page(url)
         address_div = response.find('div', {"class": "col-sm-4 mb10"})
         if not isinstance(address_div, Tag):
             logger.debug("No address in response for URL: %s", url)
@@ -202,36 +198,43 @@ class WgGesucht(Crawler):
             return None
         return ' '.join(a_element.text.strip().split())
 
-    def get_soup_from_url(
+    def get_markup_from_url(
             self,
             url: str,
             driver: Optional[Any] = None,
             checkbox: bool = False,
-            afterlogin_string: Optional[str] = None) -> BeautifulSoup:
+            afterlogin_string: Optional[str] = None) -> Union[str, bytes]:
         """
-        Creates a Soup object from the HTML at the provided URL
+        Loads the HTML at the provided URL
 
         Overwrites the method inherited from abstract_crawler. This is
         necessary as we need to reload the page once for all filters to
         be applied correctly on wg-gesucht.
         """
-        sess = requests.session()
+        # The filter cookies set by the first load belong to this search only,
+        # so both loads go through a session with its own cookies
+        session = session_pool.isolated_session(url)
         # First page load to set filters; response is discarded
-        sess.get(url, headers=self.HEADERS)
+        self.config.rate_limiter().acquire(url)
+        session_pool.get(url, session=session, headers=self.HEADERS)
         # Second page load
-        resp = sess.get(url, headers=self.HEADERS)
+        self.config.rate_limiter().acquire(url)
+        resp = session_pool.get(url, session=session, headers=self.HEADERS)
+        self.report_response(url, resp.status_code, resp.content, resp.headers)
 
         if resp.status_code not in (200, 405):
             logger.error("Got response (%i): %s",
                          resp.status_code, resp.content)
         if self.config.use_proxy():
-            return self.get_soup_with_proxy(url)
+            return self.get_markup_with_proxy(url)
         if driver is not None:
+            self.config.rate_limiter().acquire(url)
             driver.get(url)
+            self.report_response(url, 200, driver.page_source)
             if re.search("initGeetest", driver.page_source):
                 self.resolve_geetest(driver)
             elif re.search("g-recaptcha", driver.page_source):
                 self.resolve_recaptcha(
                     driver, checkbox, afterlogin_string or "")
-            return BeautifulSoup(driver.page_source, 'lxml')
-        return BeautifulSoup(resp.content, 'lxml')
+            return driver.page_source
+        return resp.content
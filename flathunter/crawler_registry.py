@@ -0,0 +1,45 @@
+"""Registry that dispatches URLs to the crawler responsible for them"""
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from flathunter.abstract_crawler import Crawler
+from flathunter.crawl_executor import host_for_url
+
+REGEX_METACHARACTERS = re.compile(r'[\^$*+?{}\[\]|()]|(?<!\\)\.')
+
+
+def host_for_pattern(pattern: re.Pattern) -> Optional[str]:
+    """Work out the hostname matched by a crawler URL_PATTERN. Returns None if
+    the pattern is not a plain (escaped) URL prefix"""
+    if REGEX_METACHARACTERS.search(pattern.pattern):
+        return None
+    prefix = re.sub(r'\\(.)', r'\1', pattern.pattern)
+    return urlparse(prefix).hostname
+
+
+class CrawlerRegistry:
+    """Maps portal hostnames to crawlers, so that the crawler for a URL can be
+    found with a single dictionary lookup instead of matching the URL against
+    the URL_PATTERN of every crawler"""
+
+    def __init__(self, crawlers: List[Crawler]):
+        self.crawlers = crawlers
+        self.crawlers_by_host: Dict[str, Crawler] = {}
+        self.unindexed_crawlers: List[Crawler] = []
+        for crawler in crawlers:
+            host = host_for_pattern(crawler.URL_PATTERN)
+            if host is None:
+                self.unindexed_crawlers.append(crawler)
+            else:
+                self.crawlers_by_host.setdefault(host.lower(), crawler)
+
+    def crawler_for_url(self, url: str) -> Optional[Crawler]:
+        """Return the crawler responsible for the URL, or None if no crawler matches"""
+        crawler = self.crawlers_by_host.get(host_for_url(url))
+        if crawler is not None and re.search(crawler.URL_PATTERN, url):
+            return crawler
+        for crawler in self.unindexed_crawlers:
+            if re.search(crawler.URL_PATTERN, url):
+                return crawler
+        return None
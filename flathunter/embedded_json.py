@@ -0,0 +1,85 @@
+"""Extraction of JSON documents that portals embed in script tags, without building a DOM"""
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, List, Optional, Union
+
+from bs4 import BeautifulSoup
+
+from flathunter.logging import logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(payload: Union[bytes, str]) -> Any:
+    """Decodes a JSON document, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+@dataclass
+class EmbeddedJsonPage:
+    """Search page whose embedded JSON documents were decoded from the raw markup.
+    Crawlers receive it in place of a soup"""
+    documents: List[Any]
+    digest: str
+
+
+class EmbeddedJson:
+    """Locates the script tags that carry an attribute value, e.g. id="__NEXT_DATA__"
+    or type="application/ld+json", by scanning the raw bytes of a page"""
+
+    def __init__(self, attribute: str, value: str):
+        self.attribute = attribute
+        self.value = value
+        self.pattern = re.compile(
+            rb'<script\b[^>]*?\s' + re.escape(attribute.encode('ascii'))
+            + rb'\s*=\s*["\']?' + re.escape(value.encode('ascii')) + rb'(?=["\'\s/>])[^>]*>',
+            re.IGNORECASE)
+
+    def find_payloads(self, markup: Union[bytes, str]) -> List[bytes]:
+        """Returns the raw contents of the matching script tags"""
+        if isinstance(markup, str):
+            markup = markup.encode('utf-8')
+        payloads = []
+        position = 0
+        while (match := self.pattern.search(markup, position)) is not None:
+            # Script contents cannot contain '</script', so there is no need to
+            # match the closing tag with the (much slower) regular expression
+            end = markup.find(b'</script', match.end())
+            if end == -1:
+                end = markup.find(b'</SCRIPT', match.end())
+            if end == -1:
+                break
+            payloads.append(markup[match.end():end].strip())
+            position = end
+        return payloads
+
+    def parse(self, markup: Union[bytes, str]) -> Optional[EmbeddedJsonPage]:
+        """Decodes the matching script tags. Returns None if there are none, or if
+        they cannot be decoded, so that the caller can fall back to the DOM"""
+        payloads = self.find_payloads(markup)
+        if len(payloads) == 0:
+            return None
+        try:
+            documents = [loads(payload) for payload in payloads]
+        except ValueError:
+            logger.debug("Embedded JSON with %s=%s is not valid JSON", self.attribute, self.value)
+            return None
+        digest = hashlib.sha256()
+        for payload in payloads:
+            digest.update(payload)
+        return EmbeddedJsonPage(documents, digest.hexdigest())
+
+    def documents(self, page: Union[EmbeddedJsonPage, BeautifulSoup]) -> List[Any]:
+        """Returns the decoded documents of a page, reading the script tags from the
+        soup if the page was parsed into a DOM"""
+        if isinstance(page, EmbeddedJsonPage):
+            return page.documents
+        return [loads(node.text.strip())
+                for node in page.find_all("script", {self.attribute: self.value})]
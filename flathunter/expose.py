@@ -0,0 +1,90 @@
+"""Expose record passed from the crawlers through the filters and processors"""
+import numbers
+import re
+from typing import Any, Callable, Optional, Tuple
+
+NUMBER_PATTERN = re.compile(r'\d+([\.,]\d+)?')
+
+
+def parse_price(text: Any) -> Optional[float]:
+    """Parses a price text, where '.' separates thousands and ',' decimals"""
+    if isinstance(text, numbers.Number):
+        return float(text)  # type: ignore
+    if not isinstance(text, str):
+        return None
+    match = NUMBER_PATTERN.search(text)
+    if match is None:
+        return None
+    return float(match[0].replace(".", "").replace(",", "."))
+
+
+def parse_decimal(text: Any) -> Optional[float]:
+    """Parses a size or room text, where '.' or ',' separate decimals"""
+    if isinstance(text, numbers.Number):
+        return float(text)  # type: ignore
+    if not isinstance(text, str):
+        return None
+    match = NUMBER_PATTERN.search(text)
+    if match is None:
+        return None
+    return float(match[0].replace(",", "."))
+
+
+class Expose(dict):
+    """An expose, as a dict of the fields read by the crawler, so that it can be
+    stored and passed to message templates unchanged. It also carries the price,
+    size and rooms parsed to numbers: they are parsed when the expose is created,
+    and again only if the text of the field is replaced.
+
+    The search URL that the expose was found at is kept outside of the fields,
+    so that it is neither stored nor sent in notifications"""
+
+    __slots__ = ('_price', '_size', '_rooms', 'search_url')
+
+    def __init__(self, *args, search_url: Optional[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.search_url = search_url
+        self._price = self._parse('price', parse_price)
+        self._size = self._parse('size', parse_decimal)
+        self._rooms = self._parse('rooms', parse_decimal)
+
+    def _parse(self, field: str, parse: Callable[[Any], Optional[float]]) \
+            -> Tuple[Any, Optional[float]]:
+        text = self.get(field)
+        return (text, parse(text))
+
+    def _current(self, parsed: Tuple[Any, Optional[float]], field: str,
+                 parse: Callable[[Any], Optional[float]]) -> Tuple[Any, Optional[float]]:
+        if parsed[0] is self.get(field):
+            return parsed
+        return self._parse(field, parse)
+
+    @property
+    def price_value(self) -> Optional[float]:
+        """Price as a number, or None if the price text has no number"""
+        self._price = self._current(self._price, 'price', parse_price)
+        return self._price[1]
+
+    @property
+    def size_value(self) -> Optional[float]:
+        """Living area as a number, or None if the size text has no number"""
+        self._size = self._current(self._size, 'size', parse_decimal)
+        return self._size[1]
+
+    @property
+    def rooms_value(self) -> Optional[float]:
+        """Number of rooms, or None if the rooms text has no number"""
+        self._rooms = self._current(self._rooms, 'rooms', parse_decimal)
+        return self._rooms[1]
+
+    @property
+    def price_per_area(self) -> Optional[float]:
+        """Price per square meter, or None if price or size are unknown"""
+        price = self.price_value
+        size = self.size_value
+        if price is None or size is None or size == 0:
+            return None
+        return price / size
+
+    def __reduce__(self):
+        return (Expose, (dict(self),), (None, {'search_url': self.search_url}))
@@ -1,175 +1,243 @@
 """Module with implementations of standard expose filters"""
-from functools import reduce
+import math
 import re
+import time
+from itertools import islice
 from abc import ABC, ABCMeta
-from typing import List, Any
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Set
+
+from flathunter.expose import Expose, parse_decimal, parse_price
+from flathunter.filter_expression import BUILTIN_EXPRESSIONS, builtin_expression, \
+    compile_expression
+from flathunter.geo import AreaIndex, locate, parse_areas
+
+# Cost classes of filters. A filter chain runs filters of cheaper classes first
+IN_MEMORY = 0
+STORAGE = 1
+REMOTE = 2
 
 
 class AbstractFilter(ABC):
     """Abstract base class for filters"""
 
+    cost = IN_MEMORY
+
     def is_interesting(self, _expose) -> bool:
         """Return True if an expose should be included in the output, False otherwise"""
         return True
 
+    def filter_batch(self, exposes: List[Dict]) -> List[Dict]:
+        """Returns the exposes of the batch that should be included in the output.
+        Filters that look up storage override this to look up the batch at once"""
+        return [expose for expose in exposes if self.is_interesting(expose)]
+
 
 class ExposeHelper:
-    """Helper functions for extracting data from expose text"""
+    """Helper functions for extracting data from expose text. Exposes loaded by the
+    crawlers carry the parsed numbers already; plain dicts are parsed on demand"""
 
     @staticmethod
     def get_price(expose):
         """Extracts the price from a price text"""
-        price_match = re.search(r'\d+([\.,]\d+)?', expose['price'])
-        if price_match is None:
-            return None
-        return float(price_match[0].replace(".", "").replace(",", "."))
+        if isinstance(expose, Expose):
+            return expose.price_value
+        return parse_price(expose['price'])
 
     @staticmethod
     def get_size(expose):
         """Extracts the size from a size text"""
-        size_match = re.search(r'\d+([\.,]\d+)?', expose['size'])
-        if size_match is None:
-            return None
-        return float(size_match[0].replace(",", "."))
+        if isinstance(expose, Expose):
+            return expose.size_value
+        return parse_decimal(expose['size'])
 
     @staticmethod
     def get_rooms(expose):
         """Extracts the number of rooms from a room text"""
-        rooms_match = re.search(r'\d+([\.,]\d+)?', expose['rooms'])
-        if rooms_match is None:
+        if isinstance(expose, Expose):
+            return expose.rooms_value
+        return parse_decimal(expose['rooms'])
+
+    @staticmethod
+    def get_price_per_area(expose):
+        """Price per square meter, or None if price or size are unknown"""
+        if isinstance(expose, Expose):
+            return expose.price_per_area
+        size = ExposeHelper.get_size(expose)
+        price = ExposeHelper.get_price(expose)
+        if size is None or price is None or size == 0:
             return None
-        return float(rooms_match[0].replace(",", "."))
+        return price / size
 
 
 class AlreadySeenFilter(AbstractFilter):
-    """Filter exposes that have already been processed"""
+    """Filter exposes that have already been processed. The filter does not mark
+    exposes as processed itself: the hunter does, once they made it through the
+    whole processor chain, so that an expose is not lost if a later processor
+    fails. Within a run, each id passes once"""
+
+    cost = STORAGE
 
     def __init__(self, id_watch):
         self.id_watch = id_watch
+        self.passed: Set[int] = set()
 
     def is_interesting(self, expose):
         """Returns true if an expose should be kept in the pipeline"""
-        if not self.id_watch.is_processed(expose['id']):
-            self.id_watch.mark_processed(expose['id'])
-            return True
-        return False
+        if expose['id'] in self.passed or self.id_watch.is_processed(expose['id']):
+            return False
+        self.passed.add(expose['id'])
+        return True
 
+    def filter_batch(self, exposes):
+        """Keeps the first of the exposes for every id that has not been processed,
+        with one lookup for the batch"""
+        unseen = set(self.id_watch.filter_unseen([expose['id'] for expose in exposes]))
+        unseen.difference_update(self.passed)
+        res = []
+        for expose in exposes:
+            if expose['id'] in unseen:
+                unseen.discard(expose['id'])
+                self.passed.add(expose['id'])
+                res.append(expose)
+        return res
 
-class MaxPriceFilter(AbstractFilter):
-    """Exclude exposes above a given price"""
 
-    def __init__(self, max_price):
-        self.max_price = max_price
+class TitleFilter(AbstractFilter):
+    """Exclude exposes whose titles match the provided terms.
 
-    def is_interesting(self, expose):
-        """True if expose is below the max price"""
-        price = ExposeHelper.get_price(expose)
-        if price is None:
-            return True
-        return price <= self.max_price
+    Terms are compiled once. Plain keywords are case folded and merged into a
+    trie-shaped pattern, so that the engine follows a single branch per title
+    position however many keywords there are. Terms using regular expression
+    syntax are combined into one case-insensitive pattern"""
 
+    REGEX_SYNTAX = set('.^$*+?{}[]\\|()')
 
-class MinPriceFilter(AbstractFilter):
-    """Exclude exposes below a given price"""
+    def __init__(self, filtered_titles):
+        self.filtered_titles = filtered_titles
+        keywords = [title.casefold() for title in filtered_titles if self._is_keyword(title)]
+        patterns = [title for title in filtered_titles if not self._is_keyword(title)]
+        self.keyword_matcher: Optional[re.Pattern] = None
+        self.pattern_matcher: Optional[re.Pattern] = None
+        if len(keywords) > 0:
+            self.keyword_matcher = re.compile(self._keyword_pattern(keywords))
+        if len(patterns) > 0:
+            self.pattern_matcher = re.compile("(" + ")|(".join(patterns) + ")", re.IGNORECASE)
+
+    @classmethod
+    def _is_keyword(cls, title: str) -> bool:
+        """True if the term is plain text rather than a regular expression"""
+        return cls.REGEX_SYNTAX.isdisjoint(title)
 
-    def __init__(self, min_price):
-        self.min_price = min_price
+    @staticmethod
+    def _keyword_pattern(keywords: List[str]) -> str:
+        """Builds a pattern matching any of the keywords from a trie of them"""
+        trie: Dict[str, Any] = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            # A keyword matches wherever any longer keyword with that prefix does
+            node.clear()
+            node[''] = True
+
+        def to_pattern(node: Dict[str, Any]) -> str:
+            if '' in node:
+                return ''
+            branches = [re.escape(char) + to_pattern(child) for (char, child) in node.items()]
+            if len(branches) == 1:
+                return branches[0]
+            return "(?:" + "|".join(branches) + ")"
+
+        return to_pattern(trie)
 
     def is_interesting(self, expose):
-        """True if expose is above the min price"""
-        price = ExposeHelper.get_price(expose)
-        if price is None:
-            return True
-        return price >= self.min_price
+        """True unless title matches the filtered titles"""
+        title = expose['title']
+        if self.keyword_matcher is not None and self.keyword_matcher.search(title.casefold()):
+            return False
+        if self.pattern_matcher is not None and self.pattern_matcher.search(title):
+            return False
+        return True
 
 
-class MaxSizeFilter(AbstractFilter):
-    """Exclude exposes above a given size"""
+class ExpressionFilter(AbstractFilter):
+    """Exclude exposes for which a filter expression is false"""
 
-    def __init__(self, max_size):
-        self.max_size = max_size
+    def __init__(self, expression):
+        self.expression = expression
+        self.predicate = compile_expression(expression)
 
     def is_interesting(self, expose):
-        """True if expose is below the max size"""
-        size = ExposeHelper.get_size(expose)
-        if size is None:
-            return True
-        return size <= self.max_size
-
-
-class MinSizeFilter(AbstractFilter):
-    """Exclude exposes below a given size"""
+        """True if the expression holds for the expose"""
+        return self.predicate(expose)
 
-    def __init__(self, min_size):
-        self.min_size = min_size
 
-    def is_interesting(self, expose):
-        """True if expose is above the min size"""
-        size = ExposeHelper.get_size(expose)
-        if size is None:
-            return True
-        return size >= self.min_size
+class GeoFilter(AbstractFilter):
+    """Exclude exposes outside of the configured polygons and radius constraints.
+    Exposes without coordinates are located by their address, if geocoding is
+    enabled, and pass if they cannot be located. Geocoding calls a remote API,
+    so the filter runs after exposes that were seen before are dropped"""
 
+    cost = REMOTE
 
-class MaxRoomsFilter(AbstractFilter):
-    """Exclude exposes above a given number of rooms"""
-
-    def __init__(self, max_rooms):
-        self.max_rooms = max_rooms
+    def __init__(self, area_config):
+        self.areas = AreaIndex()
+        self.areas.add(None, parse_areas(area_config))
 
     def is_interesting(self, expose):
-        """True if expose is below the max number of rooms"""
-        rooms = ExposeHelper.get_rooms(expose)
-        if rooms is None:
+        """True if the expose lies within one of the areas"""
+        if len(self.areas.areas) == 0:
             return True
-        return rooms <= self.max_rooms
-
-
-class MinRoomsFilter(AbstractFilter):
-    """Exclude exposes below a given number of rooms"""
-
-    def __init__(self, min_rooms):
-        self.min_rooms = min_rooms
-
-    def is_interesting(self, expose):
-        """True if expose is above the min number of rooms"""
-        rooms = ExposeHelper.get_rooms(expose)
-        if rooms is None:
+        point = locate(expose)
+        if point is None:
             return True
-        return rooms >= self.min_rooms
-
-
-class TitleFilter(AbstractFilter):
-    """Exclude exposes whose titles match the provided terms"""
-
-    def __init__(self, filtered_titles):
-        self.filtered_titles = filtered_titles
+        return len(self.areas.owners_at(point)) > 0
+
+
+class ProfileFilter(AbstractFilter):
+    """Applies the filters of one cost class from the filter profile of the target
+    URL that an expose was found at, and the global filters of that class to exposes
+    from other URLs. Each expose runs through the filters of one profile only"""
+
+    def __init__(self, default: List[AbstractFilter], profiles: Dict[str, List[AbstractFilter]],
+                 cost: int = IN_MEMORY):
+        self.default = Filter(default)
+        self.profiles = {url: Filter(filters) for (url, filters) in profiles.items()}
+        self.cost = cost
+
+    @classmethod
+    def by_cost(cls, default: List[AbstractFilter],
+                profiles: Dict[str, List[AbstractFilter]]) -> List['ProfileFilter']:
+        """Splits the filter profiles into one profile filter per cost class, so that
+        cheap filters of every profile still run before the expensive ones"""
+        costs = sorted({filter_.cost for filters in [default, *profiles.values()]
+                        for filter_ in filters})
+        return [cls([filter_ for filter_ in default if filter_.cost == cost],
+                    {url: [filter_ for filter_ in filters if filter_.cost == cost]
+                     for (url, filters) in profiles.items()},
+                    cost)
+                for cost in costs]
+
+    def profile(self, expose) -> 'Filter':
+        """Filters of the profile of the URL that the expose was found at"""
+        search_url = getattr(expose, 'search_url', None)
+        if search_url is None:
+            return self.default
+        return self.profiles.get(search_url, self.default)
 
     def is_interesting(self, expose):
-        """True unless title matches the filtered titles"""
-        combined_excludes = "(" + ")|(".join(self.filtered_titles) + ")"
-        found_objects = re.search(
-            combined_excludes, expose['title'], re.IGNORECASE)
-        # send all non matching regex patterns
-        if not found_objects:
-            return True
-        return False
-
+        """True if the expose passes the filters of its profile"""
+        return self.profile(expose).is_interesting_expose(expose)
 
-class PPSFilter(AbstractFilter):
-    """Exclude exposes above a given price per square"""
-
-    def __init__(self, max_pps):
-        self.max_pps = max_pps
-
-    def is_interesting(self, expose):
-        """True if price per square is below max price per square"""
-        size = ExposeHelper.get_size(expose)
-        price = ExposeHelper.get_price(expose)
-        if size is None or price is None:
-            return True
-        pps = price / size
-        return pps <= self.max_pps
+    def filter_batch(self, exposes):
+        """Filters the exposes of each profile in the batch together"""
+        batches: Dict[Filter, List[Dict]] = {}
+        for expose in exposes:
+            batches.setdefault(self.profile(expose), []).append(expose)
+        kept = {id(expose) for (profile, batch) in batches.items()
+                for expose in profile.filter_batch(batch)}
+        return [expose for expose in exposes if id(expose) in kept]
 
 
 class FilterBuilder:
@@ -186,18 +254,31 @@ class FilterBuilder:
         self.filters.append(filter_class(filter_config))
 
     def read_config(self, config):
-        """Adds filters from a config dictionary"""
-        self._append_filter_if_not_empty(TitleFilter, config.excluded_titles())
-        self._append_filter_if_not_empty(MinPriceFilter, config.min_price())
-        self._append_filter_if_not_empty(MaxPriceFilter, config.max_price())
-        self._append_filter_if_not_empty(MinSizeFilter, config.min_size())
-        self._append_filter_if_not_empty(MaxSizeFilter, config.max_size())
-        self._append_filter_if_not_empty(MinRoomsFilter, config.min_rooms())
-        self._append_filter_if_not_empty(MaxRoomsFilter, config.max_rooms())
-        self._append_filter_if_not_empty(
-            PPSFilter, config.max_price_per_square())
+        """Adds filters from a config dictionary. If target URLs have their own
+        filter profiles, adds filters dispatching on the URL of the expose"""
+        profiles = config.url_filter_profiles()
+        if len(profiles) == 0:
+            self.filters.extend(self.filters_for_options(config))
+            return self
+        self.filters.extend(ProfileFilter.by_cost(
+            self.filters_for_options(config),
+            {url: self.filters_for_options(profile) for (url, profile) in profiles.items()}))
         return self
 
+    @classmethod
+    def filters_for_options(cls, config) -> List[AbstractFilter]:
+        """Builds the filters for the filter options of the config. The range filters
+        and the filter expression are compiled together into a single expression filter"""
+        builder = cls()
+        builder._append_filter_if_not_empty(TitleFilter, config.excluded_titles())
+        expressions = [builtin_expression(name, getattr(config, name)())
+                       for name in BUILTIN_EXPRESSIONS if getattr(config, name)()]
+        if config.filter_expression():
+            expressions.append(f"({config.filter_expression()})")
+        builder._append_filter_if_not_empty(ExpressionFilter, " and ".join(expressions))
+        builder._append_filter_if_not_empty(GeoFilter, config.filter_area())
+        return builder.filters
+
     def filter_already_seen(self, id_watch):
         """Filter exposes that have already been seen"""
         self.filters.append(AlreadySeenFilter(id_watch))
@@ -208,22 +289,99 @@ class FilterBuilder:
         return Filter(self.filters)
 
 
+@dataclass
+class FilterStats:
+    """Number of exposes a filter was applied to and rejected, and the time it took"""
+    calls: int = 0
+    rejections: int = 0
+    seconds: float = 0.0
+
+    def cost_per_rejection(self) -> float:
+        """Time the filter takes per expose that it rejects. Filters that have
+        not run yet rank first, so that they get measured"""
+        if self.calls == 0:
+            return 0.0
+        if self.rejections == 0:
+            return math.inf
+        return self.seconds / self.rejections
+
+
 class Filter:
-    """Abstract filter object"""
+    """Abstract filter object.
+
+    Filters are applied until the first one rejects the expose. They run in
+    order of their cost class, and within a class, in order of the time they
+    have taken per rejected expose, which the filter re-measures as it goes.
+
+    A sequence of exposes is filtered in batches, about a result page each, so
+    that filters looking up storage make one lookup per batch"""
+
+    # Number of exposes after which the filters are reordered
+    REORDER_INTERVAL = 50
+
+    # Number of exposes filtered together
+    BATCH_SIZE = 50
 
     filters: List[AbstractFilter]
 
     def __init__(self, filters: List[AbstractFilter]):
         self.filters = filters
+        self.chain = list(filters)
+        self.stats: Dict[AbstractFilter, FilterStats] = {
+            filter_: FilterStats() for filter_ in filters}
+        self.exposes = 0
+        self.reorder()
+
+    def reorder(self):
+        """Sorts the chain by cost class, then by measured cost per rejection"""
+        self.chain.sort(key=lambda filter_: (filter_.cost,
+                                             self.stats[filter_].cost_per_rejection()))
 
     def is_interesting_expose(self, expose):
-        """Apply all filters to this expose"""
-        return reduce((lambda x, y: x and y),
-                      map((lambda x: x.is_interesting(expose)), self.filters), True)
+        """Apply the filters to this expose, up to the first one rejecting it"""
+        interesting = True
+        for filter_ in self.chain:
+            stats = self.stats[filter_]
+            start = time.perf_counter()
+            interesting = filter_.is_interesting(expose)
+            stats.seconds += time.perf_counter() - start
+            stats.calls += 1
+            if not interesting:
+                stats.rejections += 1
+                break
+        self.exposes += 1
+        if self.exposes % self.REORDER_INTERVAL == 0:
+            self.reorder()
+        return interesting
+
+    def filter_batch(self, exposes: List[Dict]) -> List[Dict]:
+        """Apply the filters to a batch of exposes. Each filter gets the exposes
+        that the filters before it kept"""
+        remaining = exposes
+        for filter_ in self.chain:
+            if len(remaining) == 0:
+                break
+            stats = self.stats[filter_]
+            start = time.perf_counter()
+            kept = filter_.filter_batch(remaining)
+            stats.seconds += time.perf_counter() - start
+            stats.calls += len(remaining)
+            stats.rejections += len(remaining) - len(kept)
+            remaining = kept
+        previous = self.exposes
+        self.exposes += len(exposes)
+        if self.exposes // self.REORDER_INTERVAL != previous // self.REORDER_INTERVAL:
+            self.reorder()
+        return remaining
 
     def filter(self, exposes):
-        """Apply all filters to every expose in the list"""
-        return filter(self.is_interesting_expose, exposes)
+        """Apply all filters to every expose in the sequence"""
+        exposes = iter(exposes)
+        while True:
+            batch = list(islice(exposes, self.BATCH_SIZE))
+            if len(batch) == 0:
+                return
+            yield from self.filter_batch(batch)
 
     @staticmethod
     def builder():
@@ -0,0 +1,359 @@
+"""Filter expressions, such as `price / size < 14 and rooms >= 2 and title !~ "tausch"`.
+
+An expression is parsed once and compiled to a Python function over the fields
+of an expose, so that applying it costs about as much as a hand-written filter.
+
+Numeric fields (price, size, rooms) are None when the expose does not state
+them. Like the range filters, a comparison with an unknown value is true, so
+exposes are not dropped for missing data. Text fields (title, address, crawler,
+url) can be compared with strings, or matched case-insensitively against
+regular expressions with `=~` and `!~`.
+
+Expressions can be entered by users of the website, so regular expressions
+are limited to MAX_PATTERN_LENGTH characters, and repetitions of groups that
+contain repetitions or alternatives (such as `(a+)+` or `(a|aa)*`), which can
+take exponential time to match, are rejected"""
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from flathunter.exceptions import ConfigException
+from flathunter.expose import Expose, parse_decimal, parse_price
+
+NUMBER = 'number'
+TEXT = 'text'
+BOOL = 'bool'
+
+# Code loading each field from an expose named `expose`, and the field type
+FIELDS = {
+    'price': (NUMBER, "(expose.price_value if expose.__class__ is Expose "
+                      "else parse_price(expose.get('price')))"),
+    'size': (NUMBER, "(expose.size_value if expose.__class__ is Expose "
+                     "else parse_decimal(expose.get('size')))"),
+    'rooms': (NUMBER, "(expose.rooms_value if expose.__class__ is Expose "
+                      "else parse_decimal(expose.get('rooms')))"),
+    'title': (TEXT, "(expose.get('title') or '')"),
+    'address': (TEXT, "(expose.get('address') or '')"),
+    'crawler': (TEXT, "(expose.get('crawler') or '')"),
+    'url': (TEXT, "(expose.get('url') or '')"),
+}
+
+# The range filters of the configuration, as expressions
+BUILTIN_EXPRESSIONS = {
+    'min_price': "price >= {}",
+    'max_price': "price <= {}",
+    'min_size': "size >= {}",
+    'max_size': "size <= {}",
+    'min_rooms': "rooms >= {}",
+    'max_rooms': "rooms <= {}",
+    'max_price_per_square': "price / size <= {}",
+}
+
+TOKEN_PATTERN = re.compile(r'''
+    (?:
+        (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+      | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<name>[A-Za-z_]\w*)
+      | (?P<operator><=|>=|==|!=|=~|!~|[<>+\-*/()])
+    )''', re.VERBOSE)
+
+MAX_PATTERN_LENGTH = 100
+
+KEYWORDS = {'and', 'or', 'not'}
+COMPARISONS = {'<', '<=', '>', '>=', '==', '!=', '=~', '!~'}
+
+
+class Token(NamedTuple):
+    """A token of an expression, with its kind and position"""
+    kind: str
+    text: str
+    position: int
+
+
+class Code(NamedTuple):
+    """Python code of a compiled subexpression, with its type, and whether it can be None"""
+    source: str
+    type: str
+    nullable: bool
+
+
+def tokenize(expression: str) -> List[Token]:
+    """Splits an expression into tokens"""
+    tokens = []
+    position = 0
+    while True:
+        while position < len(expression) and expression[position].isspace():
+            position += 1
+        if position == len(expression):
+            break
+        match = TOKEN_PATTERN.match(expression, position)
+        if match is None:
+            raise ConfigException(
+                f"Unexpected character at {position + 1} in filter expression: {expression}")
+        kind = match.lastgroup
+        assert kind is not None
+        text = match[kind]
+        if kind == 'name' and text in KEYWORDS:
+            kind = 'keyword'
+        tokens.append(Token(kind, text, position))
+        position = match.end()
+    tokens.append(Token('end', '', len(expression)))
+    return tokens
+
+
+def is_repetition(pattern: str, index: int) -> bool:
+    """True if a quantifier that repeats (*, + or {m,n}) starts at the index"""
+    return pattern.startswith(('*', '+'), index) \
+        or re.match(r'\{\d*,?\d*\}', pattern[index:]) is not None
+
+
+def check_pattern(pattern: str) -> Optional[str]:
+    """Returns why a regular expression is unsafe to match, or None if it is safe"""
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        return f"longer than {MAX_PATTERN_LENGTH} characters"
+    # For each open group, whether it contains a repetition or alternatives
+    groups = [False]
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\':
+            index += 2
+            continue
+        if char == '[':
+            # Skip the character class; a ']' right at its start is a literal
+            index += 2 if pattern.startswith('^', index + 1) else 1
+            index += 1
+            while index < len(pattern) and pattern[index] != ']':
+                index += 2 if pattern[index] == '\\' else 1
+        elif char == '(':
+            groups.append(False)
+        elif char == ')' and len(groups) > 1:
+            ambiguous = groups.pop()
+            repeated = is_repetition(pattern, index + 1)
+            if ambiguous and repeated:
+                return "repeats a group that contains a repetition or alternatives"
+            groups[-1] = groups[-1] or ambiguous or repeated
+        elif char == '|' or is_repetition(pattern, index):
+            groups[-1] = True
+        index += 1
+    return None
+
+
+class Compiler:
+    """Recursive descent parser, generating the Python code of an expression:
+
+        expression := conjunction ('or' conjunction)*
+        conjunction := negation ('and' negation)*
+        negation := 'not' negation | comparison
+        comparison := sum (('<' | '<=' | '>' | '>=' | '==' | '!=' | '=~' | '!~') sum)?
+        sum := product (('+' | '-') product)*
+        product := unary (('*' | '/') unary)*
+        unary := '-' unary | NUMBER | STRING | FIELD | '(' expression ')'
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.tokens = tokenize(expression)
+        self.index = 0
+        self.fields: List[str] = []
+        self.constants: Dict[str, Any] = {}
+        self.temporaries = 0
+
+    def error(self, message: str, token: Token) -> ConfigException:
+        """Builds the exception for an invalid expression"""
+        return ConfigException(
+            f"{message} at {token.position + 1} in filter expression: {self.expression}")
+
+    def peek(self) -> Token:
+        """The next token"""
+        return self.tokens[self.index]
+
+    def accept(self, *texts: str) -> bool:
+        """Consumes the next token if it is one of the given keywords or operators"""
+        token = self.peek()
+        if token.kind in ('keyword', 'operator') and token.text in texts:
+            self.index += 1
+            return True
+        return False
+
+    def temporary(self) -> str:
+        """Name of a new local variable"""
+        self.temporaries += 1
+        return f"_t{self.temporaries}"
+
+    def expect_type(self, code: Code, expected: str, token: Token):
+        """Raises unless the subexpression has the expected type"""
+        if code.type != expected:
+            raise self.error(f"Expected a {expected} value, found a {code.type} value", token)
+
+    def compile(self) -> Callable[[Dict], bool]:
+        """Compiles the expression to a function taking an expose"""
+        token = self.peek()
+        code = self.parse_expression()
+        if self.peek().kind != 'end':
+            raise self.error(f"Unexpected '{self.peek().text}'", self.peek())
+        self.expect_type(code, BOOL, token)
+        lines = ["def predicate(expose):"]
+        lines += [f"    {field} = {FIELDS[field][1]}" for field in self.fields]
+        lines.append(f"    return {code.source}")
+        namespace: Dict[str, Any] = {
+            'Expose': Expose,
+            'parse_price': parse_price,
+            'parse_decimal': parse_decimal,
+            **self.constants
+        }
+        # pylint: disable=exec-used
+        exec(compile("\n".join(lines), "<filter expression>", "exec"), namespace)
+        return namespace['predicate']
+
+    def parse_boolean(self, operator: str, parse_operand: Callable[[], Code]) -> Code:
+        """Parses operands joined by 'and' or 'or'"""
+        token = self.peek()
+        operands = [parse_operand()]
+        while self.accept(operator):
+            operands.append(parse_operand())
+        if len(operands) == 1:
+            return operands[0]
+        for operand in operands:
+            self.expect_type(operand, BOOL, token)
+        return Code("(" + f" {operator} ".join(operand.source for operand in operands) + ")",
+                    BOOL, False)
+
+    def parse_expression(self) -> Code:
+        """Parses a disjunction"""
+        return self.parse_boolean('or', self.parse_conjunction)
+
+    def parse_conjunction(self) -> Code:
+        """Parses a conjunction"""
+        return self.parse_boolean('and', self.parse_negation)
+
+    def parse_negation(self) -> Code:
+        """Parses a negated or plain comparison"""
+        token = self.peek()
+        if self.accept('not'):
+            operand = self.parse_negation()
+            self.expect_type(operand, BOOL, token)
+            return Code(f"(not {operand.source})", BOOL, False)
+        return self.parse_comparison()
+
+    def parse_comparison(self) -> Code:
+        """Parses a comparison of two values"""
+        left = self.parse_sum()
+        token = self.peek()
+        if not (token.kind == 'operator' and token.text in COMPARISONS):
+            return left
+        self.index += 1
+        right_token = self.peek()
+        right = self.parse_sum()
+        if token.text in ('=~', '!~'):
+            self.expect_type(left, TEXT, token)
+            if right_token.kind != 'string' or right.type != TEXT:
+                raise self.error("Expected a regular expression string", right_token)
+            try:
+                pattern = re.compile(self.constants[right.source], re.IGNORECASE)
+            except re.error as error:
+                raise self.error(f"Invalid regular expression ({error})", right_token) from error
+            reason = check_pattern(pattern.pattern)
+            if reason is not None:
+                raise self.error(f"Regular expression {reason}", right_token)
+            self.constants[right.source] = pattern
+            test = "is not None" if token.text == '=~' else "is None"
+            return Code(f"({right.source}.search({left.source}) {test})", BOOL, False)
+        if left.type != right.type or left.type == BOOL:
+            raise self.error(f"Cannot compare a {left.type} value with a {right.type} value",
+                             token)
+        if left.type == TEXT and token.text not in ('==', '!='):
+            raise self.error(f"Cannot compare text with '{token.text}'", token)
+        return self.guard([left, right], lambda sources: Code(
+            f"{sources[0]} {token.text} {sources[1]}", BOOL, False), "True")
+
+    def guard(self, operands: List[Code], combine: Callable[[List[str]], Code],
+              if_none: str) -> Code:
+        """Combines the operands, yielding `if_none` if any nullable operand is None"""
+        checks = []
+        sources = []
+        for operand in operands:
+            if operand.nullable:
+                name = self.temporary()
+                checks.append(f"({name} := {operand.source}) is None")
+                sources.append(name)
+            else:
+                sources.append(operand.source)
+        combined = combine(sources)
+        if len(checks) == 0:
+            return Code(f"({combined.source})", combined.type, combined.nullable)
+        if if_none == "True":
+            return Code("(" + " or ".join(checks + [combined.source]) + ")",
+                        combined.type, combined.nullable)
+        return Code(f"({if_none} if " + " or ".join(checks) + f" else {combined.source})",
+                    combined.type, True)
+
+    def parse_arithmetic(self, operators: Tuple[str, ...], parse_operand: Callable[[], Code]) \
+            -> Code:
+        """Parses numeric operands joined by the given operators"""
+        left = parse_operand()
+        while True:
+            token = self.peek()
+            if not self.accept(*operators):
+                return left
+            right = parse_operand()
+            self.expect_type(left, NUMBER, token)
+            self.expect_type(right, NUMBER, token)
+            if token.text == '/':
+                # Division by zero, like a missing value, yields None
+                divisor = self.temporary()
+                left = self.guard([left], lambda sources, right=right, divisor=divisor: Code(
+                    f"None if ({divisor} := {right.source}) is None or {divisor} == 0 "
+                    f"else {sources[0]} / {divisor}", NUMBER, True), "None")
+            else:
+                left = self.guard([left, right], lambda sources, operator=token.text: Code(
+                    f"{sources[0]} {operator} {sources[1]}", NUMBER, False), "None")
+
+    def parse_sum(self) -> Code:
+        """Parses a sum or difference"""
+        return self.parse_arithmetic(('+', '-'), self.parse_product)
+
+    def parse_product(self) -> Code:
+        """Parses a product or quotient"""
+        return self.parse_arithmetic(('*', '/'), self.parse_unary)
+
+    def parse_unary(self) -> Code:
+        """Parses a negated number, a literal, a field or a parenthesized expression"""
+        token = self.peek()
+        if self.accept('-'):
+            operand = self.parse_unary()
+            self.expect_type(operand, NUMBER, token)
+            return self.guard([operand], lambda sources: Code(f"-{sources[0]}", NUMBER, False),
+                              "None")
+        if self.accept('('):
+            code = self.parse_expression()
+            if not self.accept(')'):
+                raise self.error("Expected ')'", self.peek())
+            return code
+        self.index += 1
+        if token.kind == 'number':
+            return Code(repr(float(token.text)), NUMBER, False)
+        if token.kind == 'string':
+            name = f"_c{len(self.constants)}"
+            self.constants[name] = re.sub(r'\\(.)', r'\1', token.text[1:-1])
+            return Code(name, TEXT, False)
+        if token.kind == 'name':
+            if token.text not in FIELDS:
+                raise self.error(f"Unknown field '{token.text}'", token)
+            if token.text not in self.fields:
+                self.fields.append(token.text)
+            (field_type, _) = FIELDS[token.text]
+            return Code(token.text, field_type, field_type == NUMBER)
+        if token.kind == 'end':
+            raise self.error("Unexpected end", token)
+        raise self.error(f"Unexpected '{token.text}'", token)
+
+
+def compile_expression(expression: str) -> Callable[[Dict], bool]:
+    """Compiles a filter expression to a function, which returns True for the
+    exposes that match it. Raises a ConfigException if the expression is invalid"""
+    return Compiler(expression).compile()
+
+
+def builtin_expression(name: str, value: Any) -> str:
+    """The expression for a range filter of the configuration"""
+    return BUILTIN_EXPRESSIONS[name].format(repr(float(value)))
@@ -0,0 +1,38 @@
+"""Holds back the fingerprints of search pages until the crawl they belong to is done"""
+import threading
+from typing import Dict, Optional, Tuple
+
+
+class PendingFingerprints:
+    """Fingerprint store used by the crawlers during a hunt. Fingerprints are read
+    from the underlying store (e.g. the IdMaintainer), but new ones are only written
+    to it by `flush`, once all result pages were loaded and the exposes processed.
+    A search whose crawl failed part-way is discarded, so that it is crawled in full
+    again next time, instead of being skipped as unchanged"""
+
+    def __init__(self, store):
+        self.store = store
+        self.lock = threading.Lock()
+        self.pending: Dict[str, Tuple[Optional[str], Optional[str], Optional[str]]] = {}
+
+    def get_fingerprint(self, url):
+        """Loads the fingerprint of the search page at the URL from the previous crawl"""
+        return self.store.get_fingerprint(url)
+
+    def save_fingerprint(self, url, etag, last_modified, digest):
+        """Holds back the fingerprint of the search page at the URL"""
+        with self.lock:
+            self.pending[url] = (etag, last_modified, digest)
+
+    def discard(self, url):
+        """Drops the fingerprint of a search that could not be crawled completely"""
+        with self.lock:
+            self.pending.pop(url, None)
+
+    def flush(self):
+        """Writes the fingerprints held back to the underlying store"""
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+        for (url, (etag, last_modified, digest)) in pending.items():
+            self.store.save_fingerprint(url, etag, last_modified, digest)
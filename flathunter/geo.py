@@ -0,0 +1,286 @@
+"""Areas on the map, a spatial index over them, and the location of exposes"""
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from urllib.parse import quote_plus
+
+from flathunter.exceptions import ConfigException
+from flathunter.logging import logger
+from flathunter.session_pool import session_pool
+
+# A point as (latitude, longitude)
+Point = Tuple[float, float]
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def distance_km(first: Point, second: Point) -> float:
+    """Great-circle distance between two points"""
+    (lat1, lon1) = map(math.radians, first)
+    (lat2, lon2) = map(math.radians, second)
+    haversine = math.sin((lat2 - lat1) / 2) ** 2 \
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(haversine))
+
+
+class Area:
+    """Region on the map, with its bounding box as (min lat, min lon, max lat, max lon)"""
+
+    bounds: Tuple[float, float, float, float]
+
+    def contains(self, point: Point) -> bool:
+        """True if the point lies within the area"""
+        raise NotImplementedError
+
+
+class PolygonArea(Area):
+    """Area enclosed by a polygon, such as a district"""
+
+    def __init__(self, vertices: List[Point]):
+        self.vertices = vertices
+        lats = [lat for (lat, _) in vertices]
+        lons = [lon for (_, lon) in vertices]
+        self.bounds = (min(lats), min(lons), max(lats), max(lons))
+
+    def contains(self, point: Point) -> bool:
+        """Ray casting test: a point is inside if a ray from it crosses the edges an odd
+        number of times"""
+        (lat, lon) = point
+        (min_lat, min_lon, max_lat, max_lon) = self.bounds
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return False
+        inside = False
+        (lat2, lon2) = self.vertices[-1]
+        for (lat1, lon1) in self.vertices:
+            if (lat1 > lat) != (lat2 > lat) \
+                    and lon < lon1 + (lat - lat1) * (lon2 - lon1) / (lat2 - lat1):
+                inside = not inside
+            (lat2, lon2) = (lat1, lon1)
+        return inside
+
+
+class RadiusArea(Area):
+    """Area within a distance of a center point"""
+
+    def __init__(self, center: Point, radius_km: float):
+        self.center = center
+        self.radius_km = radius_km
+        lat_delta = radius_km / KM_PER_DEGREE
+        lon_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(center[0])), 1e-6))
+        self.bounds = (center[0] - lat_delta, center[1] - lon_delta,
+                       center[0] + lat_delta, center[1] + lon_delta)
+
+    def contains(self, point: Point) -> bool:
+        """True if the point is within the radius"""
+        return distance_km(self.center, point) <= self.radius_km
+
+
+def parse_point(value: Any) -> Point:
+    """Reads a [latitude, longitude] pair from the configuration"""
+    try:
+        (lat, lon) = value
+        return (float(lat), float(lon))
+    except (TypeError, ValueError) as error:
+        raise ConfigException(f"Expected a [latitude, longitude] pair, got {value}") from error
+
+
+def parse_areas(area_config: Optional[Dict]) -> List[Area]:
+    """Reads the polygons and radius constraints of an area filter:
+
+        polygons:
+          - [[52.54, 13.38], [52.54, 13.43], [52.51, 13.43], [52.51, 13.38]]
+        radius:
+          - center: [52.52, 13.405]
+            km: 2.5
+    """
+    if not area_config:
+        return []
+    if not isinstance(area_config, dict):
+        raise ConfigException("The area filter needs 'polygons' or 'radius' entries")
+    areas: List[Area] = []
+    for polygon in area_config.get('polygons') or []:
+        vertices = [parse_point(vertex) for vertex in polygon]
+        if len(vertices) < 3:
+            raise ConfigException(f"A polygon needs at least three points, got {polygon}")
+        areas.append(PolygonArea(vertices))
+    for radius in area_config.get('radius') or []:
+        if not isinstance(radius, dict) or 'center' not in radius or 'km' not in radius:
+            raise ConfigException(f"A radius needs a 'center' and 'km', got {radius}")
+        areas.append(RadiusArea(parse_point(radius['center']), float(radius['km'])))
+    return areas
+
+
+class AreaIndex:
+    """Spatial index of the areas of many owners, such as users. The map is divided
+    into a grid of cells, and each cell lists the areas whose bounding box overlaps
+    it, so that locating a point only tests the areas of one cell"""
+
+    # Cell size, about 5.5km north to south
+    CELL_DEGREES = 0.05
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cells: Dict[Tuple[int, int], List[Tuple[Hashable, Area]]] = {}
+        self.areas: Dict[Hashable, List[Area]] = {}
+
+    def cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Grid cell of a point"""
+        return (math.floor(lat / self.CELL_DEGREES), math.floor(lon / self.CELL_DEGREES))
+
+    def cells_of(self, area: Area) -> Iterable[Tuple[int, int]]:
+        """Grid cells overlapped by the bounding box of an area"""
+        (min_lat, min_lon, max_lat, max_lon) = area.bounds
+        (first_row, first_column) = self.cell(min_lat, min_lon)
+        (last_row, last_column) = self.cell(max_lat, max_lon)
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                yield (row, column)
+
+    def add(self, owner: Hashable, areas: List[Area]):
+        """Sets the areas of an owner, replacing any it had"""
+        with self.lock:
+            self._remove(owner)
+            if len(areas) == 0:
+                return
+            self.areas[owner] = areas
+            for area in areas:
+                for cell in self.cells_of(area):
+                    self.cells.setdefault(cell, []).append((owner, area))
+
+    def remove(self, owner: Hashable):
+        """Removes the areas of an owner"""
+        with self.lock:
+            self._remove(owner)
+
+    def _remove(self, owner: Hashable):
+        for area in self.areas.pop(owner, []):
+            for cell in self.cells_of(area):
+                entries = [entry for entry in self.cells[cell] if entry[1] is not area]
+                if entries:
+                    self.cells[cell] = entries
+                else:
+                    del self.cells[cell]
+
+    def owners_at(self, point: Point) -> Set[Hashable]:
+        """Returns the owners with an area containing the point"""
+        owners: Set[Hashable] = set()
+        with self.lock:
+            entries = self.cells.get(self.cell(*point), [])
+        for (owner, area) in entries:
+            if owner not in owners and area.contains(point):
+                owners.add(owner)
+        return owners
+
+
+class Geocoder:
+    """Looks up the coordinates of addresses with the Google Maps geocoding API.
+    Results are cached, also for addresses that were not found: in memory, and
+    in the store (e.g. the IdMaintainer), if one is attached, so that they
+    survive restarts"""
+
+    URL = "https://maps.googleapis.com/maps/api/geocode/json?address={address}&key={key}"
+    MAX_ENTRIES = 10000
+
+    def __init__(self):
+        self.key: Optional[str] = None
+        self.store = None
+        self.lock = threading.Lock()
+        self.cache: OrderedDict[str, Optional[Point]] = OrderedDict()
+
+    def configure(self, key: Optional[str], store=None):
+        """Sets the API key and the store. Without a key, addresses are not looked up"""
+        self.key = key
+        self.store = store
+
+    def remember(self, address: str, point: Optional[Point]):
+        """Adds a result to the in-memory cache"""
+        with self.lock:
+            self.cache[address] = point
+            if len(self.cache) > self.MAX_ENTRIES:
+                self.cache.popitem(last=False)
+
+    def load(self, address: str) -> Tuple[bool, Optional[Point]]:
+        """Looks the address up in the store. Returns whether it was found there,
+        and its coordinates"""
+        if self.store is None:
+            return (False, None)
+        try:
+            stored = self.store.get_geocode(address)
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning("Failed loading geocode of %s: %s", address, error)
+            return (False, None)
+        if stored is None:
+            return (False, None)
+        if stored.get('lat') is None or stored.get('lng') is None:
+            return (True, None)
+        return (True, (float(stored['lat']), float(stored['lng'])))
+
+    def save(self, address: str, point: Optional[Point]):
+        """Saves a result to the store"""
+        if self.store is None:
+            return
+        try:
+            self.store.save_geocode(address, *(point or (None, None)))
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning("Failed saving geocode of %s: %s", address, error)
+
+    def locate(self, address: Optional[str]) -> Optional[Point]:
+        """Returns the coordinates of an address, or None if they are unknown.
+        Some crawlers store the URL of the expose as its address until the
+        AddressResolver has run; those are not looked up"""
+        if not self.key or not address or address.startswith(('http://', 'https://')):
+            return None
+        address = address.strip()
+        with self.lock:
+            if address in self.cache:
+                self.cache.move_to_end(address)
+                return self.cache[address]
+        (found, point) = self.load(address)
+        if found:
+            self.remember(address, point)
+            return point
+        url = self.URL.format(address=quote_plus(address.encode('utf8')), key=self.key)
+        try:
+            result = session_pool.get(url).json()
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning("Failed geocoding address %s: %s", address, error)
+            return None
+        point = None
+        if result.get('status') == 'OK' and result.get('results'):
+            location = result['results'][0]['geometry']['location']
+            point = (float(location['lat']), float(location['lng']))
+        elif result.get('status') != 'ZERO_RESULTS':
+            logger.warning("Failed geocoding address %s: %s", address, result.get('status'))
+            return None
+        self.remember(address, point)
+        self.save(address, point)
+        return point
+
+
+geocoder = Geocoder()
+
+
+def configure_geocoder(config, store=None):
+    """Enables geocoding if the Google Maps API is configured. Results are kept in
+    the store (an IdMaintainer), if given"""
+    google_maps_api = config.get('google_maps_api') or {}
+    geocoder.configure(google_maps_api.get('key') if google_maps_api.get('enable') else None,
+                       store)
+
+
+def expose_coordinates(expose: Dict) -> Optional[Point]:
+    """Coordinates stated by the expose, as crawled from the portal"""
+    try:
+        return (float(expose['lat']), float(expose['long']))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def locate(expose: Dict) -> Optional[Point]:
+    """Coordinates of an expose, falling back to geocoding its address"""
+    point = expose_coordinates(expose)
+    if point is None:
+        point = geocoder.locate(expose.get('address'))
+    return point
@@ -2,10 +2,10 @@
 import datetime
 import time
 from urllib.parse import quote_plus
-import requests
 
 from flathunter.logging import logger
 from flathunter.abstract_processor import Processor
+from flathunter.session_pool import session_pool
 
 class GMapsDurationProcessor(Processor):
     """Implementation of Processor class to calculate travel durations"""
@@ -64,7 +64,7 @@ class GMapsDurationProcessor(Processor):
         # retrieve the result
         url = base_url.format(dest=dest, mode=mode, origin=address,
                               key=gm_key, arrival=arrival_time)
-        result = requests.get(url, timeout=30).json()
+        result = session_pool.get(url).json()
         if result['status'] != 'OK':
             logger.error("Failed retrieving distance to address %s: %s", address, result)
             return None
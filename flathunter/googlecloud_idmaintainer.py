@@ -1,5 +1,6 @@
 """Storage back-end implementation using Google Cloud Firestore"""
 import datetime
+import hashlib
 import pytz
 import firebase_admin
 from firebase_admin import credentials
@@ -8,6 +9,9 @@ from google.cloud.firestore_v1.base_query import BaseQuery
 
 from flathunter.logging import logger
 from flathunter.exceptions import PersistenceException
+from flathunter.expose import Expose
+from flathunter.user_matcher import UserIndex
+from flathunter.utils.list import chunk_list
 
 
 class GoogleCloudIdMaintainer:
@@ -22,6 +26,7 @@ class GoogleCloudIdMaintainer:
             'projectId': project_id
         })
         self.database = firestore.client()
+        self.user_index = None
 
     def mark_processed(self, expose_id):
         """Mark exposes as processed when we have processed them"""
@@ -35,6 +40,47 @@ class GoogleCloudIdMaintainer:
         doc = self.database.collection('processed').document(str(expose_id))
         return doc.get().exists
 
+    def get_processed_ids(self, expose_ids):
+        """Returns the subset of the given expose ids that have already been processed"""
+        ids_by_key = {str(expose_id): expose_id for expose_id in expose_ids}
+        refs = [self.database.collection('processed').document(key) for key in ids_by_key]
+        return {ids_by_key[doc.id] for doc in self.database.get_all(refs) if doc.exists}
+
+    def filter_unseen(self, expose_ids):
+        """Returns the given expose ids that have not been processed yet, in order"""
+        processed = self.get_processed_ids(expose_ids)
+        return [expose_id for expose_id in expose_ids if expose_id not in processed]
+
+    def mark_processed_many(self, expose_ids):
+        """Mark several exposes as processed, in write batches of up to 500 documents"""
+        logger.debug('mark_processed_many(%d ids)', len(expose_ids))
+        for chunk in chunk_list(list(expose_ids), 500):
+            batch = self.database.batch()
+            for expose_id in chunk:
+                batch.set(self.database.collection('processed').document(str(expose_id)),
+                          {'id': expose_id})
+            batch.commit()
+
+    def get_seen_ids(self, expose_ids):
+        """Returns the subset of the given expose ids that were crawled before, whether
+        they were processed or rejected by the filters"""
+        res = self.get_processed_ids(expose_ids)
+        ids_by_key = {str(expose_id): expose_id for expose_id in expose_ids
+                      if expose_id not in res}
+        refs = [self.database.collection('seen').document(key) for key in ids_by_key]
+        res.update(ids_by_key[doc.id] for doc in self.database.get_all(refs) if doc.exists)
+        return res
+
+    def mark_seen_many(self, expose_ids):
+        """Records several crawled exposes, in write batches of up to 500 documents"""
+        logger.debug('mark_seen_many(%d ids)', len(expose_ids))
+        for chunk in chunk_list(list(expose_ids), 500):
+            batch = self.database.batch()
+            for expose_id in chunk:
+                batch.set(self.database.collection('seen').document(str(expose_id)),
+                          {'id': expose_id})
+            batch.commit()
+
     def save_expose(self, expose):
         """Writes an expose to the storage backend"""
         record = expose.copy()
@@ -64,12 +110,42 @@ class GoogleCloudIdMaintainer:
         for doc in self.database.collection('exposes') \
                 .order_by('created_sort').limit(100).stream():
             expose = doc.to_dict()
+            if expose is None:
+                continue
+            expose = Expose(expose)
             if filter_set is None or filter_set.is_interesting_expose(expose):
                 res.append(expose)
                 if len(res) == count:
                     break
         return res
 
+    def get_fingerprint(self, url):
+        """Loads the fingerprint of the search page at the URL from the previous crawl"""
+        doc = self.database.collection('fingerprints').document(
+            hashlib.sha256(url.encode('utf-8')).hexdigest()).get()
+        return doc.to_dict()
+
+    def save_fingerprint(self, url, etag, last_modified, digest):
+        """Saves the fingerprint of the search page at the URL"""
+        self.database.collection('fingerprints').document(
+            hashlib.sha256(url.encode('utf-8')).hexdigest()).set({
+                'url': url, 'etag': etag, 'last_modified': last_modified, 'digest': digest
+            })
+
+    def get_geocode(self, address):
+        """Loads the stored coordinates of an address. Coordinates are None for an
+        address that was not found; None is returned if it was never looked up"""
+        doc = self.database.collection('geocodes').document(
+            hashlib.sha256(address.encode('utf-8')).hexdigest()).get()
+        return doc.to_dict()
+
+    def save_geocode(self, address, lat, lng):
+        """Saves the coordinates of an address, or None if it was not found"""
+        self.database.collection('geocodes').document(
+            hashlib.sha256(address.encode('utf-8')).hexdigest()).set({
+                'address': address, 'lat': lat, 'lng': lng
+            })
+
     def get_settings_for_user(self, user_id):
         """Loads the user settings from the database"""
         doc = self.database.collection('users').document(str(user_id)).get()
@@ -78,6 +154,8 @@ class GoogleCloudIdMaintainer:
     def save_settings_for_user(self, user_id, settings):
         """Saves the user settings to the database"""
         self.database.collection('users').document(str(user_id)).set(settings)
+        if self.user_index is not None:
+            self.user_index.update(user_id, settings)
 
     def get_user_settings(self):
         """Loads all users' settings from the database"""
@@ -88,6 +166,13 @@ class GoogleCloudIdMaintainer:
                 res.append((int(doc.id), settings))
         return res
 
+    def get_user_index(self, max_age=None):
+        """Returns the index of the users' filters, loading it on first use, and
+        reloading it once it is older than max_age seconds"""
+        self.user_index = UserIndex.from_settings(
+            self.user_index, self.get_user_settings, max_age)
+        return self.user_index
+
     def get_last_run_time(self):
         """Returns the datetime of the last run"""
 
@@ -101,6 +186,6 @@ class GoogleCloudIdMaintainer:
 
     def update_last_run_time(self):
         """Updates the time of the last run in the database"""
-        time = datetime.datetime.now()
-        self.database.collection('executions').add({'timestamp': time})
-        return time
+        now = datetime.datetime.now()
+        self.database.collection('executions').add({'timestamp': now})
+        return now
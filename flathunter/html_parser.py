@@ -0,0 +1,109 @@
+"""Construction of parsed HTML documents, with a configurable parser backend"""
+import re
+from typing import List, Mapping, Optional, Sequence
+
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+
+try:
+    from bs4.filter import SoupStrainer
+except ImportError:
+    # BeautifulSoup before 4.13
+    from bs4.element import SoupStrainer  # type: ignore
+
+from flathunter.exceptions import ConfigException
+from flathunter.logging import logger
+
+# Tree builders BeautifulSoup can use: 'lxml' is the fastest, 'html.parser' needs
+# no C extension, 'html5lib' parses like a browser
+HTML_PARSERS = ('lxml', 'html.parser', 'html5lib')
+
+html_parser = {'name': 'lxml'}
+
+SELECTOR_PART = re.compile(
+    r'([a-zA-Z][\w-]*)|#([\w-]+)|\.([\w-]+)|\[([\w:-]+)(?:=(?:"([^"]*)"|\'([^\']*)\'|([^\]]*)))?\]')
+
+
+class SimpleSelector:
+    """Compound CSS selector without combinators, e.g. 'ul.results', '#list',
+    'script[type="application/ld+json"]'. Matches elements on their tag name
+    and attributes alone, so it can be checked while the document is parsed."""
+
+    def __init__(self, selector: str):
+        self.selector = selector
+        self.tag: Optional[str] = None
+        self.classes: List[str] = []
+        self.attributes: List[tuple] = []
+        pos = 0
+        while pos < len(selector):
+            match = SELECTOR_PART.match(selector, pos)
+            if match is None:
+                raise ValueError(f"Unsupported selector: {selector}")
+            tag, element_id, cls, attribute = match.group(1, 2, 3, 4)
+            if tag is not None:
+                self.tag = tag.lower()
+            elif element_id is not None:
+                self.attributes.append(('id', element_id))
+            elif cls is not None:
+                self.classes.append(cls)
+            else:
+                value = next((v for v in match.group(5, 6, 7) if v is not None), None)
+                self.attributes.append((attribute, value))
+            pos = match.end()
+
+    def matches(self, tag, attrs: Mapping) -> bool:
+        """True if an element with the tag name and attributes matches the selector"""
+        if self.tag is not None and (not isinstance(tag, str) or tag.lower() != self.tag):
+            return False
+        for (name, value) in self.attributes:
+            if name not in attrs or (value is not None and attrs[name] != value):
+                return False
+        if len(self.classes) > 0:
+            classes = attrs.get('class', '')
+            if isinstance(classes, str):
+                classes = classes.split()
+            if not all(cls in classes for cls in self.classes):
+                return False
+        return True
+
+
+class SelectorStrainer(SoupStrainer):
+    """Restricts parsing to the elements matching any of the given selectors,
+    and their descendants. Everything outside them is skipped by the tree builder"""
+
+    def __init__(self, selectors: Sequence[str]):
+        super().__init__()
+        self.selectors = [SimpleSelector(selector) for selector in selectors]
+
+    def matches_selectors(self, name, attrs) -> bool:
+        """True if a tag with the name and attributes matches one of the selectors"""
+        return any(selector.matches(name, attrs or {}) for selector in self.selectors)
+
+    # pylint: disable=unused-argument
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        """Tag filter used by BeautifulSoup 4.13 and later"""
+        return self.matches_selectors(name, attrs)
+
+    def allow_string_creation(self, string) -> bool:
+        """Strings outside the kept elements are dropped (BeautifulSoup 4.13 and later)"""
+        return False
+
+    def search_tag(self, name, attrs=None) -> bool:
+        """Tag filter used by BeautifulSoup before 4.13"""
+        return self.matches_selectors(name, attrs)
+
+
+def make_soup(markup, parse_only=None) -> BeautifulSoup:
+    """Parses the markup with the configured parser backend"""
+    return BeautifulSoup(markup, html_parser['name'], parse_only=parse_only)
+
+
+def configure_html_parser(config):
+    """Selects the parser backend configured in the config"""
+    name = config.html_parser()
+    if name not in HTML_PARSERS:
+        raise ConfigException(f"Unknown HTML parser '{name}' - use one of {HTML_PARSERS}")
+    if builder_registry.lookup(name) is None:
+        raise ConfigException(f"HTML parser '{name}' is not installed")
+    html_parser['name'] = name
+    logger.debug("Parsing HTML with %s", name)
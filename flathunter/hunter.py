@@ -1,14 +1,22 @@
 """Default Flathunter implementation for the command line"""
+import asyncio
 import traceback
 from itertools import chain
+from typing import List
 import requests
 
 from flathunter.logging import logger
+from flathunter.async_http import AsyncHttpClient
 from flathunter.config import YamlConfig
+from flathunter.crawl_executor import CrawlExecutor, host_for_url
 from flathunter.filter import Filter
+from flathunter.fingerprints import PendingFingerprints
 from flathunter.processor import ProcessorChain
 from flathunter.captcha.captcha_solver import CaptchaUnsolvableError
 from flathunter.exceptions import ConfigException
+from flathunter.session_pool import session_pool
+
+CRAWL_ERRORS = (CaptchaUnsolvableError, requests.exceptions.RequestException)
 
 class Hunter:
     """Basic methods for crawling and processing / filtering exposes"""
@@ -19,25 +27,75 @@ class Hunter:
             raise ConfigException(
                 "Invalid config for hunter - should be a 'Config' object")
         self.id_watch = id_watch
+        self.fingerprints = None
+
+    def crawl_jobs(self, max_pages=None):
+        """List the configured URLs together with the crawler responsible for them
+        and the number of pages to load"""
+        self.fingerprints = PendingFingerprints(self.id_watch) \
+            if self.config.skip_unchanged_pages() else None
+        jobs = []
+        for url in self.config.target_urls():
+            searcher = self.config.crawler_for_url(url)
+            if searcher is None:
+                logger.warning("No crawler found for URL %s - skipping", url)
+                continue
+            searcher.fingerprints = self.fingerprints
+            searcher.seen_ids = self.id_watch
+            jobs.append((url, (searcher, url, self.config.max_pages_for_url(url, max_pages))))
+        return jobs
+
+    def crawl_failed(self, searcher, url, error) -> List:
+        """Logs a failed crawl of the URL, and forgets the fingerprint of its search page
+        so that it is crawled again in the next run"""
+        if isinstance(error, CaptchaUnsolvableError):
+            logger.info("Error while scraping url %s: the captcha was unsolvable", url)
+        else:
+            logger.info("Error while scraping url %s:\n%s", url, traceback.format_exc())
+        searcher.discard_fingerprint(url)
+        return []
 
     def crawl_for_exposes(self, max_pages=None):
         """Trigger a new crawl of the configured URLs"""
         def try_crawl(searcher, url, max_pages):
             try:
                 return searcher.crawl(url, max_pages)
-            except CaptchaUnsolvableError:
-                logger.info("Error while scraping url %s: the captcha was unsolvable", url)
-                return []
-            except requests.exceptions.RequestException:
-                logger.info("Error while scraping url %s:\n%s", url, traceback.format_exc())
-                return []
+            except CRAWL_ERRORS as error:
+                return self.crawl_failed(searcher, url, error)
 
-        return chain(*[try_crawl(searcher, url, max_pages)
-                       for searcher in self.config.searchers()
-                       for url in self.config.target_urls()])
+        jobs = self.crawl_jobs(max_pages)
+        if self.config.crawl_concurrency() > 1:
+            executor = CrawlExecutor(self.config.crawl_concurrency(),
+                                     self.config.crawl_concurrency_per_host())
+            return executor.crawl(lambda job: try_crawl(*job), jobs)
+        return chain(*[try_crawl(*job) for (_, job) in jobs])
 
-    def hunt_flats(self, max_pages: None|int = None):
-        """Crawl, process and filter exposes"""
+    async def crawl_for_exposes_async(self, max_pages=None):
+        """Crawl the configured URLs on the running event loop"""
+        concurrency = asyncio.Semaphore(self.config.crawl_concurrency())
+        host_limits = {}
+
+        async def try_crawl(searcher, url, max_pages, client):
+            host = host_for_url(url)
+            if host not in host_limits:
+                host_limits[host] = asyncio.Semaphore(self.config.crawl_concurrency_per_host())
+            async with concurrency, host_limits[host]:
+                try:
+                    return await searcher.crawl_async(url, max_pages, client)
+                except CRAWL_ERRORS as error:
+                    return self.crawl_failed(searcher, url, error)
+
+        async with AsyncHttpClient(max_connections=self.config.http_pool_connections()
+                                   * self.config.http_pool_maxsize(),
+                                   max_connections_per_host=self.config.http_pool_maxsize(),
+                                   timeout=self.config.http_timeout()) as client:
+            results = await asyncio.gather(
+                *[try_crawl(searcher, url, pages, client)
+                  for (_, (searcher, url, pages)) in self.crawl_jobs(max_pages)])
+        return list(chain(*results))
+
+    def process_exposes(self, exposes):
+        """Process and filter crawled exposes, and send notifications for new ones"""
         filter_set = Filter.builder() \
                            .read_config(self.config) \
                            .filter_already_seen(self.id_watch) \
@@ -51,10 +109,65 @@ class Hunter:
                                         .send_messages() \
                                         .build()
 
-        result = []
-        # We need to iterate over this list to force the evaluation of the pipeline
-        for expose in processor_chain.process(self.crawl_for_exposes(max_pages)):
+        result = self.run_processor_chain(processor_chain, exposes)
+        for expose in result:
             logger.info('New offer: %s', expose['title'])
-            result.append(expose)
 
+        logger.debug("HTTP connection usage: %s", session_pool.stats())
+        if self.config.response_cache() is not None:
+            logger.debug("Response cache usage: %s", self.config.response_cache().stats())
+        return result
+
+    def run_processor_chain(self, processor_chain, exposes) -> List:
+        """Runs the exposes through the processor chain, and marks the ones that came
+        out of it as processed. They are marked even if a later expose fails, while
+        the exposes that did not make it through are kept for the next run"""
+        result = []
+        try:
+            # We need to iterate over this list to force the evaluation of the pipeline
+            for expose in processor_chain.process(exposes):
+                result.append(expose)
+        finally:
+            self.id_watch.mark_processed_many([expose['id'] for expose in result])
+        return result
+
+    def save_fingerprints(self):
+        """Saves the fingerprints of the search pages, once their exposes are processed"""
+        if self.fingerprints is not None:
+            self.fingerprints.flush()
+
+    def tracks_seen_pages(self) -> bool:
+        """True if any search URL stops paginating at pages of exposes crawled before"""
+        return any(self.config.stop_after_seen_pages(url) > 0
+                   for url in self.config.target_urls())
+
+    def record_seen(self, exposes, seen_ids):
+        """Passes the crawled exposes on, collecting their ids. Exposes rejected by
+        the filters are never marked as processed, so the early stop of the
+        pagination needs a record of all crawled ids"""
+        for expose in exposes:
+            seen_ids.append(expose['id'])
+            yield expose
+
+    def finish_hunt(self, seen_ids):
+        """Saves the state of the crawl, once the exposes are processed"""
+        self.save_fingerprints()
+        if self.tracks_seen_pages():
+            self.id_watch.mark_seen_many(list(dict.fromkeys(seen_ids)))
+
+    def hunt_flats(self, max_pages: None|int = None):
+        """Crawl, process and filter exposes"""
+        seen_ids: List[int] = []
+        result = self.process_exposes(
+            self.record_seen(self.crawl_for_exposes(max_pages), seen_ids))
+        self.finish_hunt(seen_ids)
+        return result
+
+    async def hunt_flats_async(self, max_pages: None|int = None):
+        """Crawl, process and filter exposes, crawling on the running event loop"""
+        seen_ids: List[int] = []
+        exposes = await self.crawl_for_exposes_async(max_pages)
+        result = await asyncio.to_thread(
+            self.process_exposes, self.record_seen(exposes, seen_ids))
+        await asyncio.to_thread(self.finish_hunt, seen_ids)
         return result
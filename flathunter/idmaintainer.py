@@ -6,6 +6,9 @@ import json
 
 from flathunter.logging import logger
 from flathunter.abstract_processor import Processor
+from flathunter.expose import Expose
+from flathunter.user_matcher import UserIndex
+from flathunter.utils.list import chunk_list
 
 __author__ = "Nody"
 __version__ = "0.1"
@@ -31,6 +34,7 @@ class IdMaintainer:
     def __init__(self, db_name):
         self.db_name = db_name
         self.threadlocal = threading.local()
+        self.user_index = None
 
     def get_connection(self):
         """Connects to the SQLite database. Connections are thread-local"""
@@ -41,11 +45,16 @@ class IdMaintainer:
                 connection = self.threadlocal.connection
                 cur = self.threadlocal.connection.cursor()
                 cur.execute('CREATE TABLE IF NOT EXISTS processed (ID INTEGER)')
+                cur.execute('CREATE TABLE IF NOT EXISTS seen (id INTEGER PRIMARY KEY)')
                 cur.execute('CREATE TABLE IF NOT EXISTS executions (timestamp timestamp)')
                 cur.execute('CREATE TABLE IF NOT EXISTS exposes (id INTEGER, created TIMESTAMP, \
                                     crawler STRING, details BLOB, PRIMARY KEY (id, crawler))')
                 cur.execute('CREATE TABLE IF NOT EXISTS users \
                                     (id INTEGER PRIMARY KEY, settings BLOB)')
+                cur.execute('CREATE TABLE IF NOT EXISTS fingerprints (url TEXT PRIMARY KEY, \
+                                    etag TEXT, last_modified TEXT, digest TEXT, updated TIMESTAMP)')
+                cur.execute('CREATE TABLE IF NOT EXISTS geocodes (address TEXT PRIMARY KEY, \
+                                    lat REAL, lng REAL, updated TIMESTAMP)')
                 self.threadlocal.connection.commit()
             except lite.Error as error:
                 logger.error("Error %s:", error.args[0])
@@ -60,6 +69,16 @@ class IdMaintainer:
         row = cur.fetchone()
         return row is not None
 
+    def get_processed_ids(self, expose_ids):
+        """Returns the subset of the given expose ids that have already been processed"""
+        res = set()
+        cur = self.get_connection().cursor()
+        for chunk in chunk_list(list(set(expose_ids)), 500):
+            cur.execute(f'SELECT id FROM processed WHERE id IN ({",".join("?" * len(chunk))})',
+                        chunk)
+            res.update(row[0] for row in cur.fetchall())
+        return res
+
     def mark_processed(self, expose_id):
         """Mark an expose as processed in the database"""
         logger.debug('mark_processed(%d)', expose_id)
@@ -67,6 +86,43 @@ class IdMaintainer:
         cur.execute('INSERT INTO processed VALUES(?)', (expose_id,))
         self.get_connection().commit()
 
+    def filter_unseen(self, expose_ids):
+        """Returns the given expose ids that have not been processed yet, in order"""
+        processed = self.get_processed_ids(expose_ids)
+        return [expose_id for expose_id in expose_ids if expose_id not in processed]
+
+    def mark_processed_many(self, expose_ids):
+        """Mark several exposes as processed in a single transaction"""
+        logger.debug('mark_processed_many(%d ids)', len(expose_ids))
+        if len(expose_ids) == 0:
+            return
+        connection = self.get_connection()
+        connection.executemany('INSERT INTO processed VALUES(?)',
+                               [(expose_id,) for expose_id in expose_ids])
+        connection.commit()
+
+    def get_seen_ids(self, expose_ids):
+        """Returns the subset of the given expose ids that were crawled before, whether
+        they were processed or rejected by the filters"""
+        res = set()
+        cur = self.get_connection().cursor()
+        for chunk in chunk_list(list(set(expose_ids)), 250):
+            placeholders = ",".join("?" * len(chunk))
+            cur.execute(f'SELECT id FROM processed WHERE id IN ({placeholders}) \
+                          UNION SELECT id FROM seen WHERE id IN ({placeholders})', chunk + chunk)
+            res.update(row[0] for row in cur.fetchall())
+        return res
+
+    def mark_seen_many(self, expose_ids):
+        """Records several crawled exposes in a single transaction"""
+        logger.debug('mark_seen_many(%d ids)', len(expose_ids))
+        if len(expose_ids) == 0:
+            return
+        connection = self.get_connection()
+        connection.executemany('INSERT OR IGNORE INTO seen VALUES(?)',
+                               [(expose_id,) for expose_id in expose_ids])
+        connection.commit()
+
     def save_expose(self, expose):
         """Saves an expose to a database"""
         cur = self.get_connection().cursor()
@@ -98,16 +154,51 @@ class IdMaintainer:
                 next_batch = cur.fetchmany()
                 if len(next_batch) == 0:
                     break
-            expose = json.loads(next_batch.pop()[0])
+            expose = Expose(json.loads(next_batch.pop()[0]))
             if filter_set is None or filter_set.is_interesting_expose(expose):
                 res.append(expose)
         return res
 
+    def get_fingerprint(self, url):
+        """Loads the fingerprint of the search page at the URL from the previous crawl"""
+        cur = self.get_connection().cursor()
+        cur.execute('SELECT etag, last_modified, digest FROM fingerprints WHERE url = ?', (url,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'digest': row[2]}
+
+    def save_fingerprint(self, url, etag, last_modified, digest):
+        """Saves the fingerprint of the search page at the URL"""
+        cur = self.get_connection().cursor()
+        cur.execute('INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?)',
+                    (url, etag, last_modified, digest, datetime.datetime.now()))
+        self.get_connection().commit()
+
+    def get_geocode(self, address):
+        """Loads the stored coordinates of an address. Coordinates are None for an
+        address that was not found; None is returned if it was never looked up"""
+        cur = self.get_connection().cursor()
+        cur.execute('SELECT lat, lng FROM geocodes WHERE address = ?', (address,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        return {'lat': row[0], 'lng': row[1]}
+
+    def save_geocode(self, address, lat, lng):
+        """Saves the coordinates of an address, or None if it was not found"""
+        cur = self.get_connection().cursor()
+        cur.execute('INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?)',
+                    (address, lat, lng, datetime.datetime.now()))
+        self.get_connection().commit()
+
     def save_settings_for_user(self, user_id, settings):
         """Saves the user settings to the database"""
         cur = self.get_connection().cursor()
         cur.execute('INSERT OR REPLACE INTO users VALUES (?, ?)', (user_id, json.dumps(settings)))
         self.get_connection().commit()
+        if self.user_index is not None:
+            self.user_index.update(user_id, settings)
 
     def get_settings_for_user(self, user_id):
         """Loads the settings for a user from the database"""
@@ -127,6 +218,13 @@ class IdMaintainer:
             res.append((row[0], json.loads(row[1])))
         return res
 
+    def get_user_index(self, max_age=None):
+        """Returns the index of the users' filters, loading it on first use, and
+        reloading it once it is older than max_age seconds"""
+        self.user_index = UserIndex.from_settings(
+            self.user_index, self.get_user_settings, max_age)
+        return self.user_index
+
     def get_last_run_time(self):
         """Returns the time of the last hunt"""
         cur = self.get_connection().cursor()
@@ -1,11 +1,10 @@
 """Functions and classes related to sending Telegram messages"""
 import json
 
-import requests
-
 from flathunter.abstract_notifier import Notifier
 from flathunter.abstract_processor import Processor
 from flathunter.logging import logger
+from flathunter.session_pool import session_pool
 
 
 class SenderMattermost(Processor, Notifier):
@@ -37,10 +36,9 @@ class SenderMattermost(Processor, Notifier):
         """Send messages to the mattermost webhook"""
         logger.debug(('webhook_url:', self.webhook_url))
         logger.debug(('message', message))
-        resp = requests.post(
+        resp = session_pool.post(
             self.webhook_url,
-            data=json.dumps({"text": message}),
-            timeout=30
+            data=json.dumps({"text": message})
         )
         logger.debug("Got response (%i): %s", resp.status_code, resp.content)
 
@@ -2,12 +2,11 @@
 import json
 from typing import Dict
 
-import requests
-
 from flathunter.abstract_notifier import Notifier
 from flathunter.abstract_processor import Processor
 from flathunter.config import YamlConfig
 from flathunter.logging import logger
+from flathunter.session_pool import session_pool
 
 
 class SenderSlack(Processor, Notifier):
@@ -39,10 +38,9 @@ class SenderSlack(Processor, Notifier):
         """Send messages to the Slack webhook"""
         logger.debug(('webhook_url:', self.webhook_url))
         logger.debug(('message', message))
-        response = requests.post(
+        response = session_pool.post(
             self.webhook_url,
-            data=json.dumps({"text": message}),
-            timeout=30
+            data=json.dumps({"text": message})
         )
         logger.debug("Got response (%i): %s", response.status_code, response.content)
 
@@ -3,14 +3,13 @@ import json
 import time
 from typing import List, Dict, Optional
 
-import requests
-
 from flathunter.abstract_notifier import Notifier
 from flathunter.abstract_processor import Processor
 from flathunter.config import YamlConfig
 from flathunter.exceptions import BotBlockedException
 from flathunter.exceptions import UserDeactivatedException
 from flathunter.logging import logger
+from flathunter.session_pool import session_pool
 from flathunter.utils.list import chunk_list
 
 
@@ -83,7 +82,7 @@ class SenderTelegram(Processor, Notifier):
         logger.debug(('chat_id:', chat_id))
         logger.debug(('text:', message))
         logger.debug("Retrieving URL %s, payload %s", self.__text_message_url, payload)
-        response = requests.request("POST", self.__text_message_url, data=payload, timeout=30)
+        response = session_pool.post(self.__text_message_url, data=payload)
         logger.debug("Got response (%i): %s", response.status_code, response.content)
 
         # handle error
@@ -115,7 +114,7 @@ class SenderTelegram(Processor, Notifier):
             if msg.get('message_id', None):
                 payload['reply_to_message_id'] = msg.get('message_id')
 
-            response = requests.request("POST", self.__media_group_url, data=payload, timeout=30)
+            response = session_pool.post(self.__media_group_url, data=payload)
 
             if response.status_code != 200:
                 logger.warning("Error sending media group: %s", json.dumps(payload))
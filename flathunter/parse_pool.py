@@ -0,0 +1,98 @@
+"""Pool of worker processes that parse search pages outside the crawling process"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+
+from flathunter.html_parser import html_parser
+from flathunter.logging import logger
+
+
+@dataclass
+class ExtractedPage:
+    """Exposes, result count and fingerprint digest of a search page that was
+    parsed in a worker process. Crawlers receive it in place of a soup"""
+    entries: List[Dict]
+    result_count: Optional[int]
+    digest: Optional[str]
+
+
+# Crawlers used for extraction in a worker process, by crawler class
+worker_crawlers: Dict[type, Any] = {}
+
+
+def init_worker(parser_name: str):
+    """Applies the parser backend of the crawling process to a new worker"""
+    html_parser['name'] = parser_name
+
+
+def warm_up(_) -> int:
+    """Loads the crawler modules in a worker, ahead of the first page"""
+    # pylint: disable=import-outside-toplevel,unused-import
+    import flathunter.config
+    return os.getpid()
+
+
+def extract_page(crawler_class: type, markup: Union[bytes, str], digest: bool) -> ExtractedPage:
+    """Parses a search page and extracts its exposes. Runs in a worker process.
+
+    Extraction does not depend on the configuration, so the worker creates its
+    crawlers from an empty one, leaving the network and driver state behind"""
+    crawler = worker_crawlers.get(crawler_class)
+    if crawler is None:
+        # pylint: disable=import-outside-toplevel
+        from flathunter.config import YamlConfig
+        crawler = crawler_class(YamlConfig())
+        worker_crawlers[crawler_class] = crawler
+    page = crawler.parse_markup(markup)
+    return ExtractedPage(crawler.extract_data(page),
+                         crawler.get_result_count(page),
+                         crawler.get_result_digest(page) if digest else None)
+
+
+class ParsePool:
+    """Hands the raw markup of search pages to a pool of worker processes, which
+    return the extracted exposes. Parsing holds the GIL, so with many concurrent
+    crawls it is faster to spread it over several processes"""
+
+    def __init__(self):
+        self.processes = 0
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def enabled(self) -> bool:
+        """True if search pages are parsed in worker processes"""
+        return self.executor is not None
+
+    def start(self, processes: int, parser_name: str):
+        """Starts the given number of workers, replacing any running ones"""
+        self.stop()
+        if processes < 1:
+            return
+        self.processes = processes
+        self.executor = ProcessPoolExecutor(max_workers=processes, initializer=init_worker,
+                                            initargs=(parser_name,))
+        # Submitting a task per worker before any completes starts all of them
+        workers = set(self.executor.map(warm_up, range(processes)))
+        logger.debug("Started %d parser processes", len(workers))
+
+    def stop(self):
+        """Shuts the workers down"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+            self.processes = 0
+
+    def extract(self, crawler_class: type, markup: Union[bytes, str],
+                digest: bool = False) -> ExtractedPage:
+        """Parses a search page in a worker and returns what was extracted"""
+        if self.executor is None:
+            raise RuntimeError("The parse pool has not been started")
+        return self.executor.submit(extract_page, crawler_class, markup, digest).result()
+
+
+parse_pool = ParsePool()
+
+
+def configure_parse_pool(config):
+    """Starts the parser processes configured in the config"""
+    parse_pool.start(config.parse_processes(), config.html_parser())
@@ -1,13 +1,14 @@
 """ Gets proxies """
-import requests
 from lxml.html import fromstring
 
+from flathunter.session_pool import session_pool
+
 def get_proxies():
     """
     Gets random, free proxies
     """
     url = "https://free-proxy-list.net/"
-    response = requests.get(url, timeout=30)
+    response = session_pool.get(url)
     parser = fromstring(response.text)
     proxies = set()
     for i in parser.xpath('//tbody/tr')[:250]:
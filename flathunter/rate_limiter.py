@@ -0,0 +1,112 @@
+"""Per-host rate limiting of requests to the property portals"""
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+from flathunter.crawl_executor import host_for_url
+from flathunter.logging import logger
+
+
+class TokenBucket:
+    """Token bucket for a single host. Tokens are reserved in advance, so that
+    concurrent callers queue up behind each other instead of all waking up at once.
+
+    When the host starts blocking us, the bucket slows down: the refill rate is
+    divided by `slowdown`, which doubles on every block and recovers slowly on
+    every successful request."""
+
+    MAX_SLOWDOWN = 32.0
+    RECOVERY = 0.9
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.slowdown = 1.0
+        self.paused_until = 0.0
+
+    def effective_rate(self) -> float:
+        """Requests per second, taking the current slowdown into account"""
+        return self.rate / self.slowdown
+
+    def reserve(self, now: float) -> float:
+        """Takes a token and returns the number of seconds to wait before using it"""
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.updated) * self.effective_rate())
+        self.updated = now
+        self.tokens -= 1
+        delay = 0.0 if self.tokens >= 0 else -self.tokens / self.effective_rate()
+        return max(delay, self.paused_until - now)
+
+    def blocked(self, now: float, retry_after: Optional[float] = None):
+        """Slows the bucket down after the host refused or flagged a request"""
+        self.slowdown = min(self.slowdown * 2, self.MAX_SLOWDOWN)
+        self.tokens = min(self.tokens, 0.0)
+        self.paused_until = max(self.paused_until,
+                                now + (retry_after or 1 / self.effective_rate()))
+
+    def succeeded(self):
+        """Recovers some of the rate after a successful request"""
+        self.slowdown = max(1.0, self.slowdown * self.RECOVERY)
+
+
+class RateLimiter:
+    """Thread-safe rate limiter with a token bucket per host. Hosts whose rate is
+    0 (the default) are not limited"""
+
+    def __init__(self,
+                 requests_per_second: float = 0.0,
+                 burst: int = 5,
+                 hosts: Optional[Dict[str, Dict]] = None):
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.hosts = hosts or {}
+        self.lock = threading.Lock()
+        self.buckets: Dict[str, Optional[TokenBucket]] = {}
+
+    def bucket_for(self, host: str) -> Optional[TokenBucket]:
+        """Returns the token bucket for the host, or None if the host is not limited.
+        Must be called with the lock held"""
+        if host not in self.buckets:
+            settings = self.hosts.get(host, {})
+            rate = float(settings.get('requests_per_second', self.requests_per_second))
+            self.buckets[host] = TokenBucket(rate, int(settings.get('burst', self.burst))) \
+                if rate > 0 else None
+        return self.buckets[host]
+
+    def reserve(self, url: str) -> float:
+        """Reserves a request to the host of the URL, and returns the seconds to wait"""
+        with self.lock:
+            bucket = self.bucket_for(host_for_url(url))
+            return bucket.reserve(time.monotonic()) if bucket is not None else 0.0
+
+    def acquire(self, url: str):
+        """Blocks until a request to the host of the URL may be sent"""
+        delay = self.reserve(url)
+        if delay > 0:
+            logger.debug("Rate limit: waiting %.2fs before requesting %s", delay, url)
+            time.sleep(delay)
+
+    async def acquire_async(self, url: str):
+        """Waits on the event loop until a request to the host of the URL may be sent"""
+        delay = self.reserve(url)
+        if delay > 0:
+            logger.debug("Rate limit: waiting %.2fs before requesting %s", delay, url)
+            await asyncio.sleep(delay)
+
+    def report(self, url: str, blocked: bool, retry_after: Optional[float] = None):
+        """Adapts the rate for the host of the URL to the outcome of a request"""
+        host = host_for_url(url)
+        with self.lock:
+            bucket = self.bucket_for(host)
+            if bucket is None:
+                return
+            if not blocked:
+                bucket.succeeded()
+                return
+            bucket.blocked(time.monotonic(), retry_after)
+            rate = bucket.effective_rate()
+        logger.warning("Request to %s was blocked - slowing down to %.3f requests per second",
+                       host, rate)
@@ -0,0 +1,78 @@
+"""Disk-backed cache for expose detail pages, with expiry and a size limit"""
+import sqlite3 as lite
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+from flathunter.logging import logger
+
+
+class ResponseCache:
+    """SQLite cache of response bodies, keyed by URL.
+
+    Bodies are stored zlib-compressed. Entries expire after `ttl` seconds, and
+    once the compressed bodies exceed `max_bytes`, the least recently used
+    entries are evicted."""
+
+    def __init__(self, db_name: str, ttl: float, max_bytes: int):
+        self.db_name = db_name
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.connection = lite.connect(db_name, check_same_thread=False)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, \
+                                 body BLOB, size INTEGER, stored REAL, accessed REAL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed \
+                                 ON responses (accessed)')
+        self.connection.commit()
+
+    def get(self, url: str) -> Optional[bytes]:
+        """Returns the cached body for the URL, or None if it is missing or expired"""
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT body, stored FROM responses WHERE url = ?', (url,)).fetchone()
+            if row is None or row[1] < now - self.ttl:
+                self.misses += 1
+                return None
+            self.connection.execute('UPDATE responses SET accessed = ? WHERE url = ?', (now, url))
+            self.connection.commit()
+            self.hits += 1
+        return zlib.decompress(row[0])
+
+    def put(self, url: str, body: bytes):
+        """Stores the body for the URL, evicting old entries if the cache is full"""
+        compressed = zlib.compress(body)
+        now = time.time()
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                                    (url, compressed, len(compressed), now, now))
+            self.connection.execute('DELETE FROM responses WHERE stored < ?', (now - self.ttl,))
+            self.evict()
+            self.connection.commit()
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits its size limit"""
+        total = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses') \
+                               .fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for (url, size) in self.connection.execute(
+                'SELECT url, size FROM responses ORDER BY accessed ASC').fetchall():
+            if total <= self.max_bytes:
+                break
+            self.connection.execute('DELETE FROM responses WHERE url = ?', (url,))
+            total -= size
+            evicted += 1
+        logger.debug("Evicted %d responses from the cache", evicted)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of cache hits, misses, entries and stored (compressed) bytes"""
+        with self.lock:
+            entries, size = self.connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+            return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'bytes': size}
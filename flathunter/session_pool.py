@@ -0,0 +1,113 @@
+"""Shared pool of keep-alive HTTP sessions, one per host"""
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from flathunter.crawl_executor import host_for_url
+from flathunter.logging import logger
+
+
+class SessionPool:
+    """Thread-safe pool of `requests` sessions, keyed by host.
+
+    Every request to the same host goes through the same session, so the
+    underlying TCP / TLS connection is kept alive and reused instead of
+    being set up again for every page. The connection pool of each session
+    is thread-safe, so concurrent crawls of the same host can share it."""
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, timeout: float = 30):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.sessions: Dict[str, requests.Session] = {}
+        self.request_counts: Dict[str, int] = {}
+
+    def configure(self, pool_connections: int, pool_maxsize: int, timeout: float):
+        """Update the pool settings. Existing sessions are closed"""
+        with self.lock:
+            self.pool_connections = pool_connections
+            self.pool_maxsize = pool_maxsize
+            self.timeout = timeout
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+            self.request_counts = {}
+
+    def session_for_url(self, url: str) -> requests.Session:
+        """Return the shared session for the host of the URL"""
+        host = host_for_url(url)
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                                      pool_maxsize=self.pool_maxsize)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self.sessions[host] = session
+            return session
+
+    def isolated_session(self, url: str) -> requests.Session:
+        """Return a new session with its own cookies, which shares the connections
+        of the pooled session for the host of the URL. Do not close it, as that
+        would close the shared connections"""
+        adapter = self.session_for_url(url).get_adapter(url)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def request(self, method: str, url: str, session: Optional[requests.Session] = None,
+                **kwargs) -> requests.Response:
+        """Send a request through the session for the host of the URL, or through
+        the given session"""
+        kwargs.setdefault('timeout', self.timeout)
+        if session is None:
+            session = self.session_for_url(url)
+        host = host_for_url(url)
+        with self.lock:
+            self.request_counts[host] = self.request_counts.get(host, 0) + 1
+        return session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request"""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Send a POST request"""
+        return self.request('POST', url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Number of requests, opened connections and reused connections per host"""
+        res = {}
+        with self.lock:
+            for host, session in self.sessions.items():
+                connections = 0
+                for adapter in set(session.adapters.values()):
+                    poolmanager = getattr(adapter, 'poolmanager', None)
+                    if poolmanager is None:
+                        continue
+                    for key in poolmanager.pools.keys():
+                        connections += getattr(poolmanager.pools.get(key), 'num_connections', 0)
+                requests_sent = self.request_counts.get(host, 0)
+                res[host] = {
+                    'requests': requests_sent,
+                    'connections': connections,
+                    'reused': max(0, requests_sent - connections)
+                }
+        return res
+
+
+session_pool = SessionPool()
+
+
+def configure_session_pool(config):
+    """Apply the HTTP settings from the config to the shared session pool"""
+    session_pool.configure(config.http_pool_connections(),
+                           config.http_pool_maxsize(),
+                           config.http_timeout())
+    logger.debug("Configured HTTP session pool: %d connections, %d per pool, %ss timeout",
+                 session_pool.pool_connections, session_pool.pool_maxsize, session_pool.timeout)
@@ -0,0 +1,98 @@
+"""Incremental parsing of search result pages while they are downloaded"""
+from typing import Callable, List, Optional, Sequence, Set
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from flathunter.html_parser import SimpleSelector, make_soup
+
+class StreamingResultParser:
+    """Feeds chunks of an HTML document into an incremental lxml parser and keeps
+    only the result container (and optional extra elements, such as a result
+    count). Everything else is discarded as soon as it is parsed.
+
+    If a card selector is given, the HTML of each listing card in the container is
+    passed to `on_card` as soon as the card is closed, and the card is dropped from
+    the kept container. `done` is set once the result container has been closed and
+    all extra elements were found, so the rest of the download can be skipped."""
+
+    def __init__(self,
+                 container: str,
+                 extras: Sequence[str] = (),
+                 card: Optional[str] = None,
+                 on_card: Optional[Callable[[str], None]] = None,
+                 encoding: Optional[str] = None):
+        self.container = SimpleSelector(container)
+        self.extras = [SimpleSelector(extra) for extra in extras]
+        self.card = SimpleSelector(card) if card is not None else None
+        self.on_card = on_card
+        self.parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding)
+        self.kept: List[str] = []
+        self.found_extras: Set[int] = set()
+        self.container_closed = False
+        self.active = None
+        self.active_is_container = False
+        self.done = False
+
+    def feed(self, chunk: bytes):
+        """Parses the next chunk"""
+        self.parser.feed(chunk)
+        self.read_events()
+
+    def close(self):
+        """Signals the end of the document"""
+        self.parser.close()
+        self.read_events()
+
+    def start_element(self, element):
+        """Starts keeping the element if it is the container or an extra element"""
+        if not self.container_closed and self.container.matches(element.tag, element.attrib):
+            self.active = element
+            self.active_is_container = True
+            return
+        extras = {index for (index, extra) in enumerate(self.extras)
+                  if extra.matches(element.tag, element.attrib)}
+        if len(extras) > 0:
+            self.found_extras.update(extras)
+            self.active = element
+            self.active_is_container = False
+
+    def emit_card(self, element):
+        """Passes a completed listing card on, and drops it from the container"""
+        if self.on_card is not None:
+            self.on_card(etree.tostring(element, method='html', encoding='unicode',
+                                        with_tail=False))
+        element.clear(keep_tail=False)
+        parent = element.getparent()
+        if parent is not None:
+            parent.remove(element)
+
+    def read_events(self):
+        """Processes the parser events of the data fed so far"""
+        for (event, element) in self.parser.read_events():
+            if self.done:
+                break
+            if event == 'start':
+                if self.active is None:
+                    self.start_element(element)
+                continue
+            if self.active is not None and element is not self.active:
+                if self.active_is_container and self.card is not None \
+                        and self.card.matches(element.tag, element.attrib):
+                    self.emit_card(element)
+                continue
+            if element is self.active:
+                self.kept.append(etree.tostring(element, method='html', encoding='unicode',
+                                                with_tail=False))
+                self.container_closed = self.container_closed or self.active_is_container
+                self.done = self.container_closed and len(self.found_extras) == len(self.extras)
+                self.active = None
+            # Free everything that has been parsed and is not kept
+            element.clear(keep_tail=False)
+            parent = element.getparent()
+            while parent is not None and element.getprevious() is not None:
+                del parent[0]
+
+    def soup(self) -> BeautifulSoup:
+        """Returns a document containing only the kept elements"""
+        return make_soup('<html><body>' + ''.join(self.kept) + '</body></html>')
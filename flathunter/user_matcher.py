@@ -0,0 +1,231 @@
+"""Matching of new exposes against the filters of all users of the bot at once"""
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from flathunter.config import YamlConfig
+from flathunter.filter import AbstractFilter, ExposeHelper, ExpressionFilter, GeoFilter, \
+    TitleFilter
+from flathunter.geo import AreaIndex, locate, parse_areas
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Expose attributes that user filters compare against
+ATTRIBUTES = [ExposeHelper.get_price, ExposeHelper.get_size, ExposeHelper.get_rooms,
+              ExposeHelper.get_price_per_area]
+
+# User filters as (config accessor, index into ATTRIBUTES, True for lower bounds)
+CRITERIA = [
+    ('min_price', 0, True),
+    ('max_price', 0, False),
+    ('min_size', 1, True),
+    ('max_size', 1, False),
+    ('min_rooms', 2, True),
+    ('max_rooms', 2, False),
+    ('max_price_per_square', 3, False),
+]
+
+
+def other_filters(config: YamlConfig, with_area: bool = True) -> List[AbstractFilter]:
+    """Filters of a user besides the range filters: excluded titles, the filter
+    expression and, unless left out, the area filter"""
+    filters: List[AbstractFilter] = []
+    if config.excluded_titles():
+        filters.append(TitleFilter(config.excluded_titles()))
+    if config.filter_expression():
+        filters.append(ExpressionFilter(config.filter_expression()))
+    if with_area and config.filter_area():
+        filters.append(GeoFilter(config.filter_area()))
+    return filters
+
+
+def passes_all(filters: List[AbstractFilter], expose: Dict) -> bool:
+    """True if no filter rejects the expose"""
+    return all(filter_.is_interesting(expose) for filter_ in filters)
+
+
+class UserMatcher:
+    """Holds the filters of many users, and evaluates them for a batch of exposes
+    in one go. With NumPy installed, the range filters of all users are compared
+    against all exposes as a user x expose matrix; otherwise, the same comparisons
+    run in plain Python.
+
+    The range filters behave like the ones built by the FilterBuilder: a filter
+    that is not set (or 0) is not applied, and exposes without the attribute pass.
+    Excluded titles and filter expressions are applied per user afterwards"""
+
+    def __init__(self, user_settings: Iterable[Tuple[int, Dict]]):
+        self.user_ids: List[int] = []
+        self.thresholds: List[List[Optional[float]]] = []
+        self.other_filters: List[List[AbstractFilter]] = []
+        for (user_id, settings) in user_settings:
+            config = YamlConfig(settings)
+            self.user_ids.append(user_id)
+            self.thresholds.append([self.threshold(getattr(config, name)())
+                                    for (name, _, _) in CRITERIA])
+            self.other_filters.append(other_filters(config))
+
+    @staticmethod
+    def threshold(value) -> Optional[float]:
+        """Numeric value of a filter setting, or None if the filter is not set"""
+        return float(value) if value else None
+
+    def match(self, exposes: List[Dict]) -> Dict[int, List[Dict]]:
+        """Returns the exposes matching the filters of each user, by user id"""
+        exposes = list(exposes)
+        if len(self.user_ids) == 0 or len(exposes) == 0:
+            return {user_id: [] for user_id in self.user_ids}
+        values = [[attribute(expose) for attribute in ATTRIBUTES] for expose in exposes]
+        rows = self.range_matches_vectorized(values)
+        res = {}
+        for (user_id, filters, row) in zip(self.user_ids, self.other_filters, rows):
+            res[user_id] = [expose for (expose, matched) in zip(exposes, row)
+                            if matched and passes_all(filters, expose)]
+        return res
+
+    def range_matches_vectorized(self, values: List[List[Optional[float]]]) -> List[List[bool]]:
+        """User x expose matrix of the range filters, computed with NumPy if it is
+        installed"""
+        if np is None:
+            return self.range_matches(values)
+        thresholds = np.array(self.thresholds, dtype=float)
+        exposes = np.array(values, dtype=float)
+        matrix = np.ones((len(self.user_ids), len(values)), dtype=bool)
+        for (column, (_, attribute, lower_bound)) in enumerate(CRITERIA):
+            threshold = thresholds[:, column]
+            if np.isnan(threshold).all():
+                continue
+            limits = threshold[:, np.newaxis]
+            value = exposes[:, attribute][np.newaxis, :]
+            passes = value >= limits if lower_bound else value <= limits
+            matrix &= passes | np.isnan(limits) | np.isnan(value)
+        return matrix.tolist()
+
+    def range_matches(self, values: List[List[Optional[float]]]) -> List[List[bool]]:
+        """User x expose matrix of the range filters, computed in plain Python"""
+        def passes(thresholds, expose):
+            for (threshold, (_, attribute, lower_bound)) in zip(thresholds, CRITERIA):
+                value = expose[attribute]
+                if threshold is None or value is None:
+                    continue
+                if value < threshold if lower_bound else value > threshold:
+                    return False
+            return True
+        return [[passes(thresholds, expose) for expose in values]
+                for thresholds in self.thresholds]
+
+
+class UserIndex:
+    """Index of the filters of all users, to look up the users interested in a
+    single expose. For every range filter, the thresholds of the users that set
+    it are kept sorted, so that the users an expose fails for are found by
+    bisection instead of checking every user.
+
+    The areas of the users' area filters share one spatial index, so an expose
+    is located once and tested against the areas near it only.
+
+    The index is kept up to date with each change to the settings of a user,
+    so it is built from the database only once. Muted users are left out"""
+
+    def __init__(self, user_settings: Iterable[Tuple[int, Dict]] = ()):
+        self.lock = threading.Lock()
+        self.settings: Dict[int, Dict] = {}
+        self.thresholds: Dict[int, List[Optional[float]]] = {}
+        self.other_filters: Dict[int, List[AbstractFilter]] = {}
+        self.bounds: List[List[Tuple[float, int]]] = [[] for _ in CRITERIA]
+        self.areas = AreaIndex()
+        for (user_id, settings) in user_settings:
+            self.update(user_id, settings)
+        self.loaded = time.monotonic()
+
+    @classmethod
+    def from_settings(cls, index: Optional['UserIndex'],
+                      load_settings: Callable[[], Iterable[Tuple[int, Dict]]],
+                      max_age: Optional[float] = None) -> 'UserIndex':
+        """Returns the index, or a new one built from the loaded user settings if
+        there is none yet or it is older than max_age seconds"""
+        if index is None or (max_age is not None and time.monotonic() - index.loaded > max_age):
+            return cls(load_settings())
+        return index
+
+    def update(self, user_id: int, settings: Optional[Dict]):
+        """Replaces the settings of a user in the index"""
+        if settings is None or 'mute_notifications' in settings:
+            self.remove(user_id)
+            return
+        config = YamlConfig(settings)
+        thresholds = [UserMatcher.threshold(getattr(config, name)())
+                      for (name, _, _) in CRITERIA]
+        filters = other_filters(config, with_area=False)
+        areas = parse_areas(config.filter_area())
+        with self.lock:
+            self._remove(user_id)
+            for (bounds, threshold) in zip(self.bounds, thresholds):
+                if threshold is not None:
+                    bisect.insort(bounds, (threshold, user_id))
+            self.settings[user_id] = settings
+            self.thresholds[user_id] = thresholds
+            if filters:
+                self.other_filters[user_id] = filters
+            self.areas.add(user_id, areas)
+
+    def remove(self, user_id: int):
+        """Removes a user from the index"""
+        with self.lock:
+            self._remove(user_id)
+
+    def _remove(self, user_id: int):
+        thresholds = self.thresholds.pop(user_id, None)
+        if thresholds is None:
+            return
+        for (bounds, threshold) in zip(self.bounds, thresholds):
+            if threshold is not None:
+                del bounds[bisect.bisect_left(bounds, (threshold, user_id))]
+        del self.settings[user_id]
+        self.other_filters.pop(user_id, None)
+        self.areas.remove(user_id)
+
+    def settings_for_user(self, user_id: int) -> Optional[Dict]:
+        """Settings of an indexed user"""
+        return self.settings.get(user_id)
+
+    def users_for(self, expose: Dict) -> Set[int]:
+        """Returns the ids of the users whose filters the expose matches"""
+        values = [attribute(expose) for attribute in ATTRIBUTES]
+        with self.lock:
+            users = set(self.settings)
+            for (bounds, (_, attribute, lower_bound)) in zip(self.bounds, CRITERIA):
+                value = values[attribute]
+                if value is None or len(bounds) == 0:
+                    continue
+                if lower_bound:
+                    failing = bounds[bisect.bisect_right(bounds, (value, math.inf)):]
+                else:
+                    failing = bounds[:bisect.bisect_left(bounds, (value, -math.inf))]
+                users.difference_update(user_id for (_, user_id) in failing)
+            user_filters = [(user_id, filters)
+                            for (user_id, filters) in self.other_filters.items()
+                            if user_id in users]
+            area_users = users.intersection(self.areas.areas)
+        if area_users:
+            point = locate(expose)
+            if point is not None:
+                users.difference_update(area_users - self.areas.owners_at(point))
+        for (user_id, filters) in user_filters:
+            if not passes_all(filters, expose):
+                users.discard(user_id)
+        return users
+
+    def match(self, exposes: Iterable[Dict]) -> Dict[int, List[Dict]]:
+        """Returns the exposes matching the filters of each user, for the users
+        with at least one match"""
+        res: Dict[int, List[Dict]] = {}
+        for expose in exposes:
+            for user_id in self.users_for(expose):
+                res.setdefault(user_id, []).append(expose)
+        return res
@@ -0,0 +1,18 @@
+"""Utility functions for rewriting search URLs"""
+
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+
+def set_query_param(url: str, name: str, value) -> str:
+    """
+    set a query parameter of the URL, replacing an existing value
+    :param url: input URL
+    :param name: name of the parameter
+    :param value: new value of the parameter
+    :return: the rewritten URL
+    """
+    parsed = urlparse(url)
+    params = [(key, val) for (key, val) in parse_qsl(parsed.query, keep_blank_values=True)
+              if key != name]
+    params.append((name, str(value)))
+    return urlunparse(parsed._replace(query=urlencode(params, safe='[]:,')))
@@ -4,7 +4,7 @@ import json
 from flask import render_template
 
 from flathunter.web import app
-from flathunter.web.util import sanitize_float
+from flathunter.expose import Expose
 
 @app.route('/stats')
 def stats_view():
@@ -12,8 +12,9 @@ def stats_view():
     hunter = app.config["HUNTER"]
     exposes = json.dumps(
         list(
-            map(lambda e: {'price': sanitize_float(e['price']),
-                           'size': sanitize_float(e['size']),
+            map(lambda e: {'price': e.price_value,
+                           'size': e.size_value,
                            'created_at': str(e['created_at'])},
-                hunter.get_exposes_since(datetime.datetime.now() - datetime.timedelta(days=28)))))
+                map(Expose, hunter.get_exposes_since(
+                    datetime.datetime.now() - datetime.timedelta(days=28))))))
     return render_template("statistics.html", title="Statistics", exposes=exposes)
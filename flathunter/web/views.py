@@ -10,7 +10,9 @@ from flask_api import status # type: ignore
 from flathunter.web import app, log
 from flathunter.web.util import sanitize_float
 from flathunter.filter import FilterBuilder
+from flathunter.filter_expression import compile_expression
 from flathunter.config import YamlConfig
+from flathunter.exceptions import ConfigException
 
 class AuthenticationError(Exception):
     """Wrapper for authentication exceptions"""
@@ -81,6 +83,7 @@ def form_filter_values():
     if filters is not None:
         for field in ['max_price', 'min_price', 'max_size', 'min_size', 'max_rooms', 'min_rooms']:
             values[field] = int(filters[field]) if field in filters else ""
+        values['expression'] = filters.get('expression', "")
     return values
 
 def notifications_muted_for_user():
@@ -161,7 +164,15 @@ def update_filter():
     if 'user' not in session:
         return redirect('/')
     filters = {k: sanitize_float(v) for k, v in request.form.items() if v != "" \
+                                             and k != 'expression' \
                                              and sanitize_float(v) is not None}
+    expression = request.form.get('expression', "").strip()
+    if expression != "":
+        try:
+            compile_expression(expression)
+            filters['expression'] = expression
+        except ConfigException as error:
+            log.warning("Ignoring invalid filter expression: %s", error)
     app.config["HUNTER"].set_filters_for_user(session['user']['id'], filters)
     log.info("Updated filter to: %s", str(filters))
     return redirect('/')
@@ -1,9 +1,9 @@
 """Flathunter implementation for website"""
-from flathunter.config import YamlConfig
 from flathunter.logging import logger
 from flathunter.hunter import Hunter
 from flathunter.filter import Filter
 from flathunter.processor import ProcessorChain
+from flathunter.user_matcher import UserMatcher
 from flathunter.exceptions import BotBlockedException, UserDeactivatedException
 
 class WebHunter(Hunter):
@@ -13,6 +13,14 @@ class WebHunter(Hunter):
 
     def hunt_flats(self, max_pages=1):
         """Crawl all URLs, and send notifications to users of new flats"""
+        return super().hunt_flats(max_pages)
+
+    async def hunt_flats_async(self, max_pages=1):
+        """Crawl all URLs on the running event loop, and send notifications to users"""
+        return await super().hunt_flats_async(max_pages)
+
+    def process_exposes(self, exposes):
+        """Save all new exposes, and send notifications to users of new flats"""
         filter_set = Filter.builder() \
                        .read_config(self.config) \
                        .filter_already_seen(self.id_watch) \
@@ -27,20 +35,15 @@ class WebHunter(Hunter):
                                         .send_messages() \
                                         .build()
 
-        new_exposes = []
-        for expose in processor_chain.process(self.crawl_for_exposes(max_pages=max_pages)):
-            new_exposes.append(expose)
+        new_exposes = self.run_processor_chain(processor_chain, exposes)
 
-        for (user_id, settings) in self.id_watch.get_user_settings():
-            if 'mute_notifications' in settings:
-                continue
-            filter_set = Filter.builder().read_config(YamlConfig(settings)).build()
+        for (user_id, settings, user_exposes) in self.match_users(new_exposes):
+            settings = dict(settings)
             try:
                 processor_chain = ProcessorChain.builder(self.config) \
-                                                .apply_filter(filter_set) \
                                                 .send_messages([user_id]) \
                                                 .build()
-                for message in processor_chain.process(new_exposes):
+                for message in processor_chain.process(user_exposes):
                     logger.debug("Sent expose %d to user %d", message['id'], user_id)
             except BotBlockedException:
                 logger.warning("Bot has been blocked by user %d - updating settings", user_id)
@@ -55,6 +58,19 @@ class WebHunter(Hunter):
         self.id_watch.update_last_run_time()
         return list(new_exposes)
 
+    def match_users(self, exposes):
+        """Lists the users with matching exposes, as (user id, settings, exposes)"""
+        if self.config.website_user_matching() == 'batch':
+            users = {user_id: settings
+                     for (user_id, settings) in self.id_watch.get_user_settings()
+                     if 'mute_notifications' not in settings}
+            matches = UserMatcher(users.items()).match(exposes)
+            return [(user_id, users[user_id], user_exposes)
+                    for (user_id, user_exposes) in matches.items() if len(user_exposes) > 0]
+        user_index = self.id_watch.get_user_index(self.config.website_user_index_ttl())
+        return [(user_id, user_index.settings_for_user(user_id), user_exposes)
+                for (user_id, user_exposes) in user_index.match(exposes).items()]
+
     def get_last_run_time(self):
         """Return the time of last run, for display on the website"""
         return self.id_watch.get_last_run_time()
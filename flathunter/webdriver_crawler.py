@@ -2,9 +2,8 @@
 from typing import Optional
 
 from selenium.webdriver import Chrome
-from bs4 import BeautifulSoup
 
-from flathunter.abstract_crawler import Crawler
+from flathunter.abstract_crawler import Crawler, SearchPage
 from flathunter.chrome_wrapper import get_chrome_driver
 from flathunter.exceptions import DriverLoadException
 
@@ -31,6 +30,10 @@ class WebdriverCrawler(Crawler):
             raise DriverLoadException("Unable to load chrome driver when expected")
         return res
 
-    def get_page(self, search_url, driver=None, page_no=None) -> BeautifulSoup:
+    def can_fetch_pages_concurrently(self) -> bool:
+        """Pages are loaded one after another, as the driver is shared"""
+        return False
+
+    def get_page(self, search_url, driver=None, page_no=None) -> SearchPage:
         """Applies a page number to a formatted search URL and fetches the exposes at that page"""
-        return self.get_soup_from_url(search_url, driver=self.get_driver())
+        return self.get_search_page_from_url(search_url, driver=self.get_driver())
@@ -7,6 +7,10 @@ from flathunter.googlecloud_idmaintainer import GoogleCloudIdMaintainer
 from flathunter.web_hunter import WebHunter
 from flathunter.config import Config
 from flathunter.logging import configure_logging
+from flathunter.session_pool import configure_session_pool
+from flathunter.html_parser import configure_html_parser
+from flathunter.parse_pool import configure_parse_pool
+from flathunter.geo import configure_geocoder
 
 from flathunter.web import app
 
@@ -28,6 +32,10 @@ else:
     id_watch = GoogleCloudIdMaintainer(config)
 
 configure_logging(config)
+configure_session_pool(config)
+configure_html_parser(config)
+configure_parse_pool(config)
+configure_geocoder(config, id_watch)
 
 # initialize search plugins for config
 config.init_searchers()
@@ -0,0 +1,197 @@
+"""Throughput benchmarks for the search page parsers, over the crawler fixtures.
+
+Every case is run on its fixture and on copies scaled synthetically to 10x and
+100x the number of listings. For each, the benchmark reports the entries
+extracted per second, the peak memory of a run and the memory blocks held by
+the parsed page and its entries, per entry.
+
+    python -m test.benchmarks.parsers                  # compare with the baseline
+    python -m test.benchmarks.parsers --save-baseline  # store a new baseline
+
+Baselines are machine specific, so they are kept out of the repository. If one
+exists, the run fails when a case is slower or uses more memory than the
+baseline allows."""
+import argparse
+import copy
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+from flathunter.crawler.immobilienscout import Immobilienscout
+from flathunter.crawler.meinestadt import MeineStadt
+from flathunter.crawler.wggesucht import LISTE_SELECTOR, WgGesucht
+from flathunter.html_parser import make_soup
+from flathunter.logging import logger
+from test.utils.config import StringConfig
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'crawler', 'fixtures')
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), '..', '..', '.benchmarks', 'parsers.json')
+SCALES = [1, 10, 100]
+
+# Stop repeating a case once its runs have taken this many seconds
+TIME_BUDGET = 2.0
+
+# A case prepares its input for a scale, and returns a function that parses
+# the input into a page and one that extracts the entries from the page
+Case = Callable[[int], Tuple[Callable[[], Any], Callable[[Any], List[Dict]]]]
+
+
+@dataclass
+class Result:
+    """Measurements of a benchmark case at one scale"""
+    entries: int
+    entries_per_sec: float
+    peak_kb: float
+    blocks_per_entry: float
+
+
+def read_fixture(name: str) -> bytes:
+    """Reads a file from the crawler fixtures"""
+    with open(os.path.join(FIXTURES, name), 'rb') as fixture:
+        return fixture.read()
+
+
+def wggesucht_html(scale: int):
+    """WG-Gesucht search page, with the listing rows repeated"""
+    soup = make_soup(read_fixture('wg-gesucht-spotahome.html'))
+    for row in LISTE_SELECTOR.select(soup):
+        for _ in range(scale - 1):
+            row.insert_after(copy.copy(row))
+    markup = str(soup).encode('utf-8')
+    crawler = WgGesucht(StringConfig())
+    return lambda: crawler.parse_search_page(markup), crawler.extract_data
+
+
+def immobilienscout_json(scale: int):
+    """IS24 result list object, as read from the page by the driver"""
+    data = json.loads(read_fixture('immo-scout-IS24-object.json'))
+    result_list = data['resultList']['resultListModel']['searchResponseModel']
+    group = result_list['resultlist.resultlist']['resultlistEntries'][0]
+    group['resultlistEntry'] = group['resultlistEntry'] * scale
+    crawler = Immobilienscout(StringConfig())
+    return lambda: data, crawler.get_entries_from_json
+
+
+def meinestadt_page(scale: int) -> bytes:
+    """MeineStadt search page embedding the structured data of the listings"""
+    listings = json.loads(read_fixture('meinestadt.json')) * scale
+    return ('<html><head><script type="application/ld+json">' + json.dumps(listings)
+            + '</script></head><body></body></html>').encode('utf-8')
+
+
+def meinestadt_embedded_json(scale: int):
+    """MeineStadt search page, decoded from the raw markup"""
+    markup = meinestadt_page(scale)
+    crawler = MeineStadt(StringConfig())
+    return lambda: crawler.parse_search_page(markup), crawler.extract_data
+
+
+def meinestadt_dom(scale: int):
+    """MeineStadt search page, read from the parsed DOM"""
+    markup = meinestadt_page(scale)
+    crawler = MeineStadt(StringConfig())
+    return lambda: make_soup(markup), crawler.extract_data
+
+
+CASES: Dict[str, Case] = {
+    'wggesucht_html': wggesucht_html,
+    'immobilienscout_json': immobilienscout_json,
+    'meinestadt_embedded_json': meinestadt_embedded_json,
+    'meinestadt_dom': meinestadt_dom,
+}
+
+
+def measure(parse: Callable[[], Any], extract: Callable[[Any], List[Dict]],
+            repeats: int) -> Result:
+    """Times the parse and extraction of a case, then traces its memory use"""
+    entries = extract(parse())
+    timings: List[float] = []
+    while len(timings) < repeats and sum(timings) < TIME_BUDGET:
+        start = time.perf_counter()
+        extract(parse())
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        page = parse()
+        entries = extract(page)
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    count = max(len(entries), 1)
+    return Result(len(entries), len(entries) / statistics.median(timings),
+                  peak / 1024, blocks / count)
+
+
+def run(scales: List[int], repeats: int) -> Dict[str, Result]:
+    """Runs all cases at all scales"""
+    results = {}
+    for (name, case) in CASES.items():
+        for scale in scales:
+            results[f"{name}@{scale}x"] = measure(*case(scale), repeats=repeats)
+    return results
+
+
+def regressions(results: Dict[str, Result], baseline: Dict[str, Dict],
+                tolerance: float) -> List[str]:
+    """Lists the measurements that are worse than the baseline by more than the tolerance"""
+    failures = []
+    for (key, result) in results.items():
+        if key not in baseline:
+            continue
+        base = Result(**baseline[key])
+        if result.entries != base.entries:
+            failures.append(f"{key}: {result.entries} entries, baseline {base.entries}")
+        if result.entries_per_sec < base.entries_per_sec * (1 - tolerance):
+            failures.append(f"{key}: {result.entries_per_sec:.0f} entries/s, "
+                            f"baseline {base.entries_per_sec:.0f}")
+        if result.peak_kb > base.peak_kb * (1 + tolerance):
+            failures.append(f"{key}: peak {result.peak_kb:.0f} KiB, baseline {base.peak_kb:.0f}")
+        if result.blocks_per_entry > base.blocks_per_entry * (1 + tolerance):
+            failures.append(f"{key}: {result.blocks_per_entry:.0f} blocks/entry, "
+                            f"baseline {base.blocks_per_entry:.0f}")
+    return failures
+
+
+def main(argv=None) -> int:
+    """Runs the benchmarks and compares them with, or stores, the baseline"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed slowdown or memory growth, as a fraction of the baseline")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args(argv)
+
+    logger.setLevel(logging.ERROR)
+    results = run(args.scales, args.repeats)
+    print(f"{'case':36} {'entries':>8} {'entries/s':>12} {'peak KiB':>10} {'blocks/entry':>13}")
+    for (key, result) in results.items():
+        print(f"{key:36} {result.entries:8d} {result.entries_per_sec:12.0f} "
+              f"{result.peak_kb:10.0f} {result.blocks_per_entry:13.1f}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump({key: asdict(result) for (key, result) in results.items()}, file, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with - run with --save-baseline to store one")
+        return 0
+    with open(args.baseline, encoding='utf-8') as file:
+        failures = regressions(results, json.load(file), args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
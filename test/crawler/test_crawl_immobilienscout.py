@@ -3,7 +3,9 @@ import json
 import os
 import requests_mock
 import re
+from bs4 import BeautifulSoup
 
+from flathunter.crawler import immobilienscout
 from flathunter.crawler.immobilienscout import Immobilienscout
 from flathunter.captcha.captcha_solver import CaptchaBalanceEmpty
 from test.utils.config import StringConfigWithCaptchas
@@ -66,3 +68,24 @@ def test_captcha_error_no_balance(crawler):
         m.get('http://2captcha.com/res.php', text='ERROR_ZERO_BALANCE')
         with pytest.raises(CaptchaBalanceEmpty):
             assert crawler.get_page(TEST_URL, crawler.get_driver(), page_no=1)
+
+def test_compiled_traversal_matches_jsonpath(crawler, monkeypatch):
+    with open(os.path.join(os.path.dirname(os.path.realpath(__file__)), "fixtures", "immo-scout-IS24-object.json")) as fixture:
+        data = json.load(fixture)
+    entries = crawler.get_entries_from_json(data)
+    assert entries == crawler.get_entries_from_json(data['resultList'])
+    monkeypatch.setattr(immobilienscout, 'find_real_estates', lambda data: None)
+    monkeypatch.setattr(immobilienscout, 'find_images', lambda entry: None)
+    assert entries == crawler.get_entries_from_json(data)
+    assert len(entries) == 20
+    assert sum(len(entry['images']) for entry in entries) > 0
+
+def test_extract_data_skips_duplicates(crawler):
+    listing = """<li><div class="result-list-entry__gallery-container"></div>
+      <a class="result-list-entry__brand-title-container" href="/expose/%d">Flat</a>
+      <div class="result-list-entry__address">Main St 1</div>
+      <dl data-is24-qa="attributes"><dd>900 EUR</dd><dd>60 m2</dd><dd>2 Zi.</dd></dl></li>"""
+    page = '<ul id="resultListItems">' + ''.join(
+        listing % expose_id for expose_id in [123456789, 123456790, 123456789]) + '</ul>'
+    entries = crawler.extract_data(BeautifulSoup(page, 'lxml'))
+    assert [entry['id'] for entry in entries] == [123456789, 123456790]
@@ -0,0 +1,128 @@
+import asyncio
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests_mock
+
+from flathunter.abstract_crawler import Crawler
+from flathunter.async_http import AsyncHttpClient
+from flathunter.exceptions import ConfigException
+from flathunter.hunter import Hunter
+from flathunter.idmaintainer import IdMaintainer
+from test.dummy_crawler import DummyCrawler
+from test.test_util import count
+from test.utils.config import StringConfig
+
+ASYNC_CONFIG = """
+urls:
+  - https://www.example.com/search/flats-in-berlin
+  - https://www.example.com/search/flats-in-munich
+
+crawl:
+  engine: async
+  concurrency: 4
+  concurrency_per_host: 2
+"""
+
+class ListingCrawler(Crawler):
+    URL_PATTERN = re.compile(r'https://listings\.example\.org')
+
+    def extract_data(self, soup):
+        return [{ 'id': int(item['data-id']), 'title': item.text }
+                for item in soup.find_all('li')]
+
+def test_crawl_engine_config():
+    assert StringConfig().crawl_engine() == 'sync'
+    assert StringConfig(string=ASYNC_CONFIG).crawl_engine() == 'async'
+    with pytest.raises(ConfigException):
+        StringConfig(string="crawl:\n  engine: fibers\n").crawl_engine()
+
+def test_sync_crawlers_run_in_executor():
+    config = StringConfig(string=ASYNC_CONFIG)
+    config.set_searchers([DummyCrawler()])
+    hunter = Hunter(config, IdMaintainer(":memory:"))
+    exposes = asyncio.run(hunter.hunt_flats_async())
+    assert count(exposes) > 4
+
+def test_plain_http_crawlers_fetch_natively():
+    crawler = ListingCrawler(StringConfig())
+    assert crawler.fetches_plain_http()
+    assert not DummyCrawler().fetches_plain_http()
+
+    async def crawl():
+        async with AsyncHttpClient(use_aiohttp=False) as client:
+            return await crawler.crawl_async("https://listings.example.org/search", client=client)
+
+    with requests_mock.Mocker() as mock:
+        mock.get("https://listings.example.org/search",
+                 text="<ul><li data-id='1'>Flat</li><li data-id='2'>Loft</li></ul>")
+        entries = asyncio.run(crawl())
+    search_url = "https://listings.example.org/search"
+    assert entries == [{ 'id': 1, 'title': 'Flat' }, { 'id': 2, 'title': 'Loft' }]
+    assert [entry.search_url for entry in entries] == [search_url, search_url]
+
+class ListingHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b"<ul><li data-id='1'>Flat</li><li data-id='2'>Loft</li></ul>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def listing_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ListingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_plain_http_crawlers_fetch_with_aiohttp(listing_server):
+    pytest.importorskip("aiohttp")
+    crawler = ListingCrawler(StringConfig())
+    crawler.URL_PATTERN = re.compile(re.escape(listing_server))
+    search_url = listing_server + "/search"
+
+    async def crawl():
+        async with AsyncHttpClient() as client:
+            assert client.session is not None
+            return await crawler.crawl_async(search_url, client=client)
+
+    entries = asyncio.run(crawl())
+    assert entries == [{ 'id': 1, 'title': 'Flat' }, { 'id': 2, 'title': 'Loft' }]
+    assert [entry.search_url for entry in entries] == [search_url, search_url]
+
+class ThreadRecordingStore(IdMaintainer):
+    def __init__(self):
+        super().__init__(":memory:")
+        self.threads = set()
+
+    def get_fingerprint(self, search_url):
+        self.threads.add(threading.get_ident())
+        return super().get_fingerprint(search_url)
+
+    def save_fingerprint(self, search_url, etag, last_modified, digest):
+        self.threads.add(threading.get_ident())
+        return super().save_fingerprint(search_url, etag, last_modified, digest)
+
+def test_stores_are_not_called_on_the_event_loop():
+    crawler = ListingCrawler(StringConfig())
+    crawler.fingerprints = ThreadRecordingStore()
+
+    async def crawl():
+        async with AsyncHttpClient(use_aiohttp=False) as client:
+            await crawler.crawl_async("https://listings.example.org/search", client=client)
+            return threading.get_ident()
+
+    with requests_mock.Mocker() as mock:
+        mock.get("https://listings.example.org/search",
+                 text="<ul><li data-id='1'>Flat</li><li data-id='2'>Loft</li></ul>")
+        loop_thread = asyncio.run(crawl())
+    assert len(crawler.fingerprints.threads) > 0
+    assert loop_thread not in crawler.fingerprints.threads
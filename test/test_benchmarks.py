@@ -0,0 +1,18 @@
+from test.benchmarks.parsers import CASES, Result, measure, regressions
+
+def test_cases_scale_listings():
+    for name in ['immobilienscout_json', 'meinestadt_embedded_json', 'meinestadt_dom']:
+        single = measure(*CASES[name](1), repeats=1)
+        scaled = measure(*CASES[name](3), repeats=1)
+        assert single.entries == 20
+        assert scaled.entries == 60
+        assert scaled.entries_per_sec > 0
+        assert scaled.peak_kb > single.peak_kb
+
+def test_regressions_against_baseline():
+    baseline = { 'case@1x': { 'entries': 20, 'entries_per_sec': 1000.0,
+                              'peak_kb': 100.0, 'blocks_per_entry': 10.0 } }
+    assert regressions({ 'case@1x': Result(20, 900.0, 110.0, 10.0) }, baseline, 0.25) == []
+    assert regressions({ 'other@1x': Result(1, 1.0, 1e6, 1e6) }, baseline, 0.25) == []
+    failures = regressions({ 'case@1x': Result(19, 500.0, 200.0, 20.0) }, baseline, 0.25)
+    assert len(failures) == 4
@@ -88,6 +88,18 @@ class ConfigWizardTest(unittest.TestCase):
         self.assertEqual(len(urls), 1)
         self.assertEqual("http://fish.com", urls[0])
 
+    @patch("config_wizard.prompt")
+    def test_gather_urls_keeps_url_options(self, prompt_mock):
+        entry = {"url": "https://www.immowelt.de/liste/berlin/wohnungen/mieten",
+                 "max_pages": 2, "filters": {"max_price": 1000}}
+        config = YamlConfig({"urls": [entry]})
+        prompt_mock.side_effect = [
+            "http://fish.com",
+            ""
+        ]
+        urls = config_wizard.gather_urls(config)
+        self.assertEqual([entry, "http://fish.com"], urls)
+
     @patch("config_wizard.prompt")
     def test_configure_notifier(self, prompt_mock):
         prompt_mock.side_effect = [
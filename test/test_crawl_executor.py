@@ -0,0 +1,66 @@
+import threading
+import time
+
+from flathunter.crawl_executor import CrawlExecutor, host_for_url
+from flathunter.hunter import Hunter
+from flathunter.idmaintainer import IdMaintainer
+from test.dummy_crawler import DummyCrawler
+from test.test_util import count
+from test.utils.config import StringConfig
+
+CONCURRENT_CONFIG = """
+urls:
+  - https://www.example.com/search/flats-in-berlin
+  - https://www.example.com/search/flats-in-munich
+
+crawl:
+  concurrency: 4
+  concurrency_per_host: 2
+"""
+
+class ConcurrencyTracker:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = {}
+        self.max_running = {}
+        self.max_total = 0
+
+    def run(self, job):
+        host, delay = job
+        with self.lock:
+            self.running[host] = self.running.get(host, 0) + 1
+            self.max_running[host] = max(self.max_running.get(host, 0), self.running[host])
+            self.max_total = max(self.max_total, sum(self.running.values()))
+        time.sleep(delay)
+        with self.lock:
+            self.running[host] -= 1
+        return [host]
+
+def test_host_for_url():
+    assert host_for_url("https://www.Example.com/search?x=1") == "www.example.com"
+    assert host_for_url("not a url") == ""
+
+def test_executor_respects_limits():
+    tracker = ConcurrencyTracker()
+    jobs = [(f"https://{host}/search", (host, 0.05))
+            for host in ["a.example.com", "b.example.com", "c.example.com"]
+            for _ in range(4)]
+    results = list(CrawlExecutor(max_workers=4, max_per_host=2).crawl(tracker.run, jobs))
+    assert len(results) == 12
+    assert tracker.max_total <= 4
+    assert all(running <= 2 for running in tracker.max_running.values())
+
+def test_executor_yields_results_as_completed():
+    tracker = ConcurrencyTracker()
+    jobs = [("https://slow.example.com/", ("slow", 0.3)),
+            ("https://fast.example.com/", ("fast", 0.01))]
+    results = list(CrawlExecutor(max_workers=2).crawl(tracker.run, jobs))
+    assert results == ["fast", "slow"]
+
+def test_hunter_crawls_concurrently():
+    config = StringConfig(string=CONCURRENT_CONFIG)
+    config.set_searchers([DummyCrawler()])
+    hunter = Hunter(config, IdMaintainer(":memory:"))
+    exposes = hunter.hunt_flats()
+    assert count(exposes) > 4
@@ -0,0 +1,41 @@
+import re
+
+from flathunter.config import YamlConfig
+from flathunter.crawler_registry import CrawlerRegistry, host_for_pattern
+from flathunter.crawler.wggesucht import WgGesucht
+from flathunter.crawler.immowelt import Immowelt
+from test.dummy_crawler import DummyCrawler
+from test.utils.config import StringConfig
+
+class PatternCrawler(DummyCrawler):
+    URL_PATTERN = re.compile(r'https://(www\.)?flats\.example\.org')
+
+def test_host_for_pattern():
+    assert host_for_pattern(re.compile(r'https://www\.wg-gesucht\.de')) == "www.wg-gesucht.de"
+    assert host_for_pattern(re.compile(r'https://vrm-immo\.de')) == "vrm-immo.de"
+    assert host_for_pattern(PatternCrawler.URL_PATTERN) is None
+
+def test_crawler_for_url():
+    config = StringConfig()
+    wg_gesucht = WgGesucht(config)
+    immowelt = Immowelt(config)
+    registry = CrawlerRegistry([wg_gesucht, immowelt])
+    assert registry.crawler_for_url("https://www.wg-gesucht.de/wohnungen-in-Berlin.8.2.1.0.html") \
+        is wg_gesucht
+    assert registry.crawler_for_url("https://www.immowelt.de/liste/berlin") is immowelt
+    assert registry.crawler_for_url("https://www.example.com/liste/berlin") is None
+    assert registry.crawler_for_url("http://www.immowelt.de/liste/berlin") is None
+
+def test_unindexed_crawlers_are_matched_by_pattern():
+    crawler = PatternCrawler()
+    registry = CrawlerRegistry([DummyCrawler(), crawler])
+    assert registry.crawler_for_url("https://flats.example.org/search") is crawler
+
+def test_config_builds_registry():
+    config = YamlConfig()
+    config.set_searchers([Immowelt(config), WgGesucht(config)])
+    crawler = config.crawler_for_url("https://www.wg-gesucht.de/wohnungen-in-Berlin.8.2.1.0.html")
+    assert isinstance(crawler, WgGesucht)
+    config.set_searchers([DummyCrawler()])
+    assert config.crawler_for_url("https://www.wg-gesucht.de/wohnungen-in-Berlin.8.2.1.0.html") \
+        is None
@@ -0,0 +1,63 @@
+import json
+import os
+
+from flathunter.crawler.meinestadt import MeineStadt
+from flathunter.crawler.subito import Subito
+from flathunter.embedded_json import EmbeddedJson, EmbeddedJsonPage
+from flathunter.html_parser import make_soup
+from test.utils.config import StringConfig
+
+with open(os.path.join(os.path.dirname(__file__), "crawler", "fixtures", "meinestadt.json")) as f:
+    MEINESTADT_JSON = f.read()
+
+MEINESTADT_PAGE = f"""<html><head>
+<script type="application/ld+json">{MEINESTADT_JSON}</script>
+<script type='application/ld+json' data-x="1">[]</script>
+<script type="text/javascript">var x = "</html>";</script>
+</head><body><h1>Wohnungen</h1></body></html>"""
+
+SUBITO_STATE = {"props": {"state": {"items": {"list": [{"item": {
+    "urn": "id:ad:123:list:456",
+    "subject": "Bilocale in centro",
+    "urls": {"default": "https://www.subito.it/appartamenti/bilocale-456.htm"},
+    "images": [],
+    "features": {"/price": {"values": [{"key": "900 €"}]}},
+    "geo": {"town": {"value": "Milano"}, "city": {"shortName": "MI"}, "region": None}
+}}]}}}}
+
+SUBITO_PAGE = ('<html><body><div id="app"></div><script id="__NEXT_DATA__" '
+               f'type="application/json">{json.dumps(SUBITO_STATE)}</script></body></html>')
+
+def test_payloads_are_found_in_raw_markup():
+    marker = EmbeddedJson("type", "application/ld+json")
+    assert len(marker.find_payloads(MEINESTADT_PAGE.encode('utf-8'))) == 2
+    assert len(marker.find_payloads(MEINESTADT_PAGE)) == 2
+    assert EmbeddedJson("type", "application/ld").find_payloads(MEINESTADT_PAGE) == []
+
+def test_meinestadt_fast_path_matches_dom():
+    crawler = MeineStadt(StringConfig())
+    page = crawler.parse_search_page(MEINESTADT_PAGE.encode('utf-8'))
+    assert isinstance(page, EmbeddedJsonPage)
+    entries = crawler.extract_data(page)
+    assert len(entries) == 20
+    assert entries == crawler.extract_data(make_soup(MEINESTADT_PAGE))
+
+def test_subito_fast_path():
+    crawler = Subito(StringConfig())
+    page = crawler.parse_search_page(SUBITO_PAGE)
+    assert isinstance(page, EmbeddedJsonPage)
+    entries = crawler.extract_data(page)
+    assert len(entries) == 1
+    assert entries[0]['id'] == "123456"
+    assert entries[0]['price'] == "900 €"
+    assert entries[0]['address'] == "Milano, MI, "
+    assert crawler.get_result_digest(page) == page.digest
+
+def test_falls_back_to_dom_without_marker():
+    marker = EmbeddedJson("id", "__NEXT_DATA__")
+    assert marker.parse(SUBITO_PAGE.replace('id="__NEXT_DATA__" ', "")) is None
+    assert marker.parse(SUBITO_PAGE.replace('"props"', "props")) is None
+    crawler = Subito(StringConfig())
+    soup = crawler.parse_search_page(SUBITO_PAGE.replace('id="__NEXT_DATA__" ', ""))
+    assert not isinstance(soup, EmbeddedJsonPage)
+    assert crawler.extract_data(make_soup(SUBITO_PAGE))[0]['title'] == "Bilocale in centro"
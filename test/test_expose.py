@@ -0,0 +1,42 @@
+import json
+import pickle
+
+from flathunter.expose import Expose
+from flathunter.filter import ExposeHelper, ExpressionFilter
+
+EXPOSE = { 'id': 1, 'title': "Flat", 'price': "1.250 €", 'size': "62,5 m²",
+           'rooms': "2.5 Zi.", 'crawler': "Immowelt" }
+
+def test_numbers_are_parsed():
+    expose = Expose(EXPOSE)
+    assert expose.price_value == 1250
+    assert expose.size_value == 62.5
+    assert expose.rooms_value == 2.5
+    assert expose.price_per_area == 1250 / 62.5
+    assert Expose({ 'price': '', 'size': "k.A.", 'rooms': 3 }).price_value is None
+    assert Expose({ 'price': '', 'size': "k.A.", 'rooms': 3 }).rooms_value == 3.0
+    assert Expose({ 'price': "900" }).price_per_area is None
+
+def test_expose_is_a_dict():
+    expose = Expose(EXPOSE)
+    assert expose == EXPOSE
+    assert json.loads(json.dumps(expose)) == EXPOSE
+    assert "{title}: {price}".format(**expose) == "Flat: 1.250 €"
+    copy = pickle.loads(pickle.dumps(expose))
+    assert isinstance(copy, Expose) and copy.price_value == 1250
+
+def test_numbers_follow_changed_fields():
+    expose = Expose(EXPOSE)
+    expose['price'] = "800 €"
+    expose.update(size="40 m²")
+    assert expose.price_value == 800
+    assert expose.size_value == 40
+    del expose['rooms']
+    assert expose.rooms_value is None
+
+def test_filters_accept_exposes_and_dicts():
+    for expose in [EXPOSE, Expose(EXPOSE)]:
+        assert ExposeHelper.get_price(expose) == 1250
+        assert ExposeHelper.get_rooms(expose) == 2.5
+        assert ExpressionFilter("price / size <= 20.01").is_interesting(expose)
+        assert not ExpressionFilter("price / size <= 19.99").is_interesting(expose)
@@ -0,0 +1,148 @@
+import re
+
+import pytest
+
+from flathunter.exceptions import ConfigException
+from flathunter.expose import Expose
+from flathunter.filter import AlreadySeenFilter, ExpressionFilter, Filter, TitleFilter, \
+    IN_MEMORY, REMOTE, STORAGE
+from flathunter.idmaintainer import IdMaintainer
+from test.utils.config import StringConfig
+
+TITLES = [
+    "Ruhige 2-Zimmer-Wohnung im Altbau",
+    "WOHNUNGSTAUSCH gesucht",
+    "Helles WG-Zimmer zur Zwischenmiete",
+    "Nachmieter für Wohnung in der Hauptstraße",
+    "Souterrain-Wohnung, 3 Zimmer",
+    "Tauschwohnung: biete 2 Zimmer",
+    "Möbliertes Apartment, befristet",
+]
+
+def old_is_interesting(filtered_titles, title):
+    combined_excludes = "(" + ")|(".join(filtered_titles) + ")"
+    return not re.search(combined_excludes, title, re.IGNORECASE)
+
+def assert_same_as_regex(filtered_titles):
+    title_filter = TitleFilter(filtered_titles)
+    for title in TITLES:
+        assert title_filter.is_interesting({ 'title': title }) \
+            == old_is_interesting(filtered_titles, title), title
+
+def test_keywords():
+    assert_same_as_regex(["tausch"])
+    assert_same_as_regex(["ruhig", "tausch", "zwischenmiete", "souterrain", "wg-zimmer"])
+    assert_same_as_regex(["tauschwohnung", "tausch", "tau"])
+    assert_same_as_regex(["nachmieter für", "möbliert", "befristet"])
+    assert_same_as_regex(["gibt es nicht"])
+
+def test_regular_expressions():
+    assert_same_as_regex([r"\d-zimmer", "souterrain"])
+    assert_same_as_regex(["tausch(wohnung)?:", "^helles", "apartment$", "befristet"])
+
+def test_keywords_are_merged_into_a_trie():
+    title_filter = TitleFilter(["tauschwohnung", "tausch", "tag", "wg"])
+    assert title_filter.pattern_matcher is None
+    assert title_filter.keyword_matcher.pattern == "(?:ta(?:usch|g)|wg)"
+
+def test_many_keywords():
+    keywords = [f"keyword{number}" for number in range(200)] + ["altbau"]
+    title_filter = TitleFilter(keywords)
+    assert not title_filter.is_interesting({ 'title': TITLES[0] })
+    assert not title_filter.is_interesting({ 'title': "Mit KEYWORD42 im Titel" })
+    assert title_filter.is_interesting({ 'title': TITLES[1] })
+
+def test_chain_stops_at_first_rejection():
+    id_watch = IdMaintainer(":memory:")
+    filter_set = Filter([AlreadySeenFilter(id_watch), ExpressionFilter("price <= 1000")])
+    assert filter_set.chain[-1] is filter_set.filters[0]
+    exposes = [{ 'id': 1, 'price': "1.500 €" }, { 'id': 2, 'price': "900 €" }]
+    assert [expose['id'] for expose in filter_set.filter(exposes)] == [2]
+    assert filter_set.filters[0].passed == {2}
+    assert filter_set.stats[filter_set.filters[1]].rejections == 1
+    assert filter_set.stats[filter_set.filters[0]].calls == 1
+
+def test_chain_is_ordered_by_cost_per_rejection():
+    max_price = ExpressionFilter("price <= 10000")
+    min_size = ExpressionFilter("size >= 50")
+    filter_set = Filter([max_price, min_size])
+    exposes = [{ 'price': "900 €", 'size': f"{size} m²" } for size in range(1, 101)]
+    list(filter_set.filter(exposes))
+    assert filter_set.chain == [min_size, max_price]
+    assert filter_set.stats[min_size].calls == 100
+    assert filter_set.stats[min_size].rejections == 49
+    assert filter_set.stats[max_price].rejections == 0
+
+def test_url_filter_profiles():
+    config = StringConfig(string="""
+urls:
+  - https://www.example.com/search/mitte
+  - url: https://www.example.com/search/kreuzberg
+    filters:
+      max_price: 800
+      excluded_titles: []
+filters:
+  max_price: 1000
+  min_size: 40
+  excluded_titles:
+    - "tausch"
+""")
+    filter_set = Filter.builder().read_config(config).build()
+    assert len(filter_set.filters) == 1
+    exposes = [Expose({ 'id': expose_id, 'price': price, 'size': "50", 'title': title },
+                      search_url="https://www.example.com/search/" + district)
+               for (expose_id, district, price, title) in [
+                   (1, "mitte", "900", "Wohnung"),
+                   (2, "mitte", "700", "Wohnungstausch"),
+                   (3, "kreuzberg", "900", "Wohnung"),
+                   (4, "kreuzberg", "700", "Wohnungstausch"),
+                   (5, "neukoelln", "900", "Wohnung")]]
+    assert [expose['id'] for expose in filter_set.filter(exposes)] == [1, 4, 5]
+    assert not filter_set.is_interesting_expose(
+        Expose({ **exposes[3], 'size': "30" }, search_url=exposes[3].search_url))
+
+def test_profile_filters_keep_cheap_filters_first():
+    config = StringConfig(string="""
+urls:
+  - https://www.example.com/search/mitte
+  - url: https://www.example.com/search/kreuzberg
+    filters:
+      area:
+        radius:
+          - center: [52.5, 13.4]
+            km: 2
+filters:
+  max_price: 1000
+""")
+    id_watch = IdMaintainer(":memory:")
+    filter_set = Filter.builder().read_config(config).filter_already_seen(id_watch).build()
+    assert [type(filter_).__name__ for filter_ in filter_set.chain] == \
+        ["ProfileFilter", "AlreadySeenFilter", "ProfileFilter"]
+    assert [filter_.cost for filter_ in filter_set.chain] == [IN_MEMORY, STORAGE, REMOTE]
+    exposes = [Expose({ 'id': 1, 'price': "1200", 'title': "Wohnung" },
+                      search_url="https://www.example.com/search/kreuzberg")]
+    assert list(filter_set.filter(exposes)) == []
+    assert not id_watch.is_processed(1)
+
+def test_unknown_filter_options_in_profiles():
+    config = StringConfig(string="""
+urls:
+  - url: https://www.example.com/search/kreuzberg
+    filters:
+      max_prise: 800
+""")
+    with pytest.raises(ConfigException):
+        config.url_filter_profiles()
+
+def test_already_seen_filter_looks_up_a_batch_at_once(mocker):
+    id_watch = IdMaintainer(":memory:")
+    id_watch.mark_processed(3)
+    lookups = mocker.spy(id_watch, "filter_unseen")
+    writes = mocker.spy(id_watch, "mark_processed_many")
+    filter_set = Filter.builder().filter_already_seen(id_watch).build()
+    exposes = [{ 'id': expose_id } for expose_id in list(range(50)) + [1, 2]]
+    kept = [expose['id'] for expose in filter_set.filter(exposes)]
+    assert kept == [expose_id for expose_id in range(50) if expose_id != 3]
+    assert lookups.call_count == 2
+    assert writes.call_count == 0
+    assert list(filter_set.filter([{ 'id': 4 }, { 'id': 50 }])) == [{ 'id': 50 }]
@@ -0,0 +1,83 @@
+import pytest
+
+from flathunter.config import YamlConfig
+from flathunter.exceptions import ConfigException
+from flathunter.expose import Expose
+from flathunter.filter import ExposeHelper, ExpressionFilter, Filter, TitleFilter
+from flathunter.filter_expression import compile_expression
+
+EXPOSES = [
+    { 'id': 1, 'title': "Ruhige Wohnung", 'price': "900 €", 'size': "60 m²", 'rooms': "2" },
+    { 'id': 2, 'title': "Wohnungstausch", 'price': "450 €", 'size': "30 m²", 'rooms': "1" },
+    { 'id': 3, 'title': "Altbau", 'price': "1.500 €", 'size': "100 m²", 'rooms': "4" },
+    { 'id': 4, 'title': "Preis auf Anfrage", 'price': "", 'size': "75 m²", 'rooms': "3" },
+    { 'id': 5, 'title': "Loft", 'price': "1.200 €", 'size': "0", 'rooms': "" },
+]
+
+def matching_ids(expression):
+    predicate = compile_expression(expression)
+    ids = [expose['id'] for expose in EXPOSES if predicate(expose)]
+    assert ids == [expose['id'] for expose in map(Expose, EXPOSES) if predicate(expose)]
+    return ids
+
+def test_comparisons():
+    assert matching_ids("price <= 1000") == [1, 2, 4]
+    assert matching_ids("rooms >= 2 and size < 80") == [1, 4, 5]
+    assert matching_ids("price / size < 15") == [4, 5]
+    assert matching_ids("price - 100 * rooms > 700 or -size < -90") == [3, 4, 5]
+    # The comparison holds for the unknown price, so its negation does not
+    assert matching_ids("not (price > 1000)") == [1, 2]
+
+def test_text_matches():
+    assert matching_ids('title !~ "tausch"') == [1, 3, 4, 5]
+    assert matching_ids('title =~ "^(ruhig|loft)"') == [1, 5]
+    assert matching_ids('title == "Altbau" or title != \'Loft\' and price < 500') == [2, 3, 4]
+
+def range_filter(attribute, limit, lower_bound):
+    def is_interesting(expose):
+        value = attribute(expose)
+        if value is None:
+            return True
+        return value >= limit if lower_bound else value <= limit
+    return is_interesting
+
+def test_same_as_range_filters():
+    expression = 'price / size <= 15 and rooms >= 2 and price <= 1000 and size >= 50 ' \
+                 'and title !~ "tausch"'
+    filters = [range_filter(ExposeHelper.get_price_per_area, 15, False),
+               range_filter(ExposeHelper.get_rooms, 2, True),
+               range_filter(ExposeHelper.get_price, 1000, False),
+               range_filter(ExposeHelper.get_size, 50, True),
+               TitleFilter(["tausch"]).is_interesting]
+    expression_filter = ExpressionFilter(expression)
+    for expose in EXPOSES:
+        assert expression_filter.is_interesting(expose) == \
+            all(is_interesting(expose) for is_interesting in filters), expose
+
+def test_config_filters_compile_to_one_expression():
+    config = YamlConfig({ 'filters': { 'max_price': 1000, 'min_rooms': 2,
+                                       'expression': 'title !~ "ruhig"' } })
+    filter_set = Filter.builder().read_config(config).build()
+    assert len(filter_set.filters) == 1
+    assert filter_set.filters[0].expression == \
+        'price <= 1000.0 and rooms >= 2.0 and (title !~ "ruhig")'
+    assert [expose['id'] for expose in filter_set.filter(EXPOSES)] == [4]
+
+@pytest.mark.parametrize("expression", [
+    "price <", "price", "colour == 2", "title < 2", 'title =~ "("', "price > 1 and 3",
+    "price @ 2", "(price > 1", "price > 1 price", 'price =~ "1"', "title =~ title",
+])
+def test_invalid_expressions(expression):
+    with pytest.raises(ConfigException):
+        compile_expression(expression)
+
+@pytest.mark.parametrize("pattern", [
+    "(a+)+$", "(a|aa)*b", r"(\w+\s?)*$", "(?:x|y)+", "((ab)*c){2,}", "x" * 101,
+])
+def test_unsafe_regular_expressions(pattern):
+    with pytest.raises(ConfigException):
+        compile_expression(f'title =~ "{pattern}"')
+
+def test_safe_regular_expressions():
+    for pattern in ["^(ruhig|loft)", "[(]+", r"\\(a+\\)+", "(ab){3}", "w(g|ohnung)"]:
+        compile_expression(f'title =~ "{pattern}"')
@@ -0,0 +1,129 @@
+import re
+
+import requests
+import requests_mock
+
+from flathunter.abstract_crawler import Crawler
+from flathunter.fingerprints import PendingFingerprints
+from flathunter.hunter import Hunter
+from flathunter.idmaintainer import IdMaintainer
+from flathunter.session_pool import session_pool
+from test.utils.config import StringConfig
+
+SEARCH_URL = "https://listings.example.org/search"
+
+CONFIG = """
+urls:
+  - https://listings.example.org/search
+"""
+
+PAGE = """<html><body><p>Rendered at {time}</p>
+<ul id="results"><li><a href="/expose/1">Flat</a></li>{extra}</ul></body></html>"""
+
+class ListingCrawler(Crawler):
+    URL_PATTERN = re.compile(r'https://listings\.example\.org')
+    RESULT_CONTAINER = "#results"
+
+    def extract_data(self, soup):
+        return [{ 'id': int(link['href'].split('/')[-1]) } for link in soup.find_all('a')]
+
+def test_fingerprints_are_stored():
+    id_watch = IdMaintainer(":memory:")
+    assert id_watch.get_fingerprint(SEARCH_URL) is None
+    id_watch.save_fingerprint(SEARCH_URL, '"abc"', None, "1234")
+    assert id_watch.get_fingerprint(SEARCH_URL) == \
+        { 'etag': '"abc"', 'last_modified': None, 'digest': "1234" }
+
+def test_unchanged_results_are_skipped():
+    crawler = ListingCrawler(StringConfig())
+    crawler.fingerprints = PendingFingerprints(IdMaintainer(":memory:"))
+    with requests_mock.Mocker() as mock:
+        mock.get(SEARCH_URL, text=PAGE.format(time="10:00", extra=""))
+        assert len(crawler.get_results(SEARCH_URL)) == 1
+        mock.get(SEARCH_URL, text=PAGE.format(time="10:05", extra=""))
+        assert len(crawler.get_results(SEARCH_URL)) == 1
+        crawler.fingerprints.flush()
+        assert crawler.get_results(SEARCH_URL) == []
+        mock.get(SEARCH_URL, text=PAGE.format(time="10:10",
+                                              extra='<li><a href="/expose/2">Loft</a></li>'))
+        assert len(crawler.get_results(SEARCH_URL)) == 2
+
+def test_conditional_get():
+    crawler = ListingCrawler(StringConfig())
+    crawler.fingerprints = PendingFingerprints(IdMaintainer(":memory:"))
+    with requests_mock.Mocker() as mock:
+        mock.get(SEARCH_URL, text=PAGE.format(time="10:00", extra=""),
+                 headers={ 'ETag': '"v1"', 'Last-Modified': 'Wed, 21 Oct 2026 07:28:00 GMT' })
+        assert len(crawler.get_results(SEARCH_URL)) == 1
+        crawler.fingerprints.flush()
+        mock.get(SEARCH_URL, status_code=304)
+        assert crawler.get_results(SEARCH_URL) == []
+        assert mock.last_request.headers['If-None-Match'] == '"v1"'
+        assert mock.last_request.headers['If-Modified-Since'] == 'Wed, 21 Oct 2026 07:28:00 GMT'
+
+def test_hunter_attaches_fingerprints():
+    config = StringConfig(string=CONFIG + "crawl:\n  skip_unchanged_pages: true\n")
+    crawler = ListingCrawler(config)
+    config.set_searchers([crawler])
+    id_watch = IdMaintainer(":memory:")
+    Hunter(config, id_watch).crawl_jobs()
+    assert crawler.fingerprints.store is id_watch
+    config = StringConfig(string=CONFIG)
+    config.set_searchers([crawler])
+    Hunter(config, id_watch).crawl_jobs()
+    assert crawler.fingerprints is None
+
+class PagedCrawler(ListingCrawler):
+    def get_result_count(self, soup):
+        return 4
+
+    def get_page_url(self, search_url, page_no):
+        return f"{search_url}?page={page_no}"
+
+def test_fingerprints_are_saved_after_processing():
+    config = StringConfig(string=CONFIG + "crawl:\n  skip_unchanged_pages: true\n")
+    config.set_searchers([ListingCrawler(config)])
+    id_watch = IdMaintainer(":memory:")
+    hunter = Hunter(config, id_watch)
+    with requests_mock.Mocker() as mock:
+        mock.get(SEARCH_URL, text=PAGE.format(time="10:00", extra=""))
+        hunter.crawl_for_exposes()
+        assert id_watch.get_fingerprint(SEARCH_URL) is None
+        hunter.save_fingerprints()
+        assert id_watch.get_fingerprint(SEARCH_URL) is not None
+        hunter.hunt_flats()
+        assert mock.call_count == 2
+
+def test_fingerprint_is_discarded_if_a_page_fails():
+    crawler = PagedCrawler(StringConfig())
+    crawler.fingerprints = PendingFingerprints(IdMaintainer(":memory:"))
+    with requests_mock.Mocker() as mock:
+        mock.get(SEARCH_URL, text=PAGE.format(time="10:00", extra=""))
+        mock.get(SEARCH_URL + "?page=2", exc=requests.exceptions.ConnectTimeout)
+        crawler.get_results(SEARCH_URL, max_pages=2)
+        crawler.fingerprints.flush()
+        assert crawler.fingerprints.store.get_fingerprint(SEARCH_URL) is None
+        mock.get(SEARCH_URL + "?page=2", text=PAGE.format(time="10:00", extra=""))
+        crawler.get_results(SEARCH_URL, max_pages=2)
+        crawler.fingerprints.flush()
+        assert crawler.fingerprints.store.get_fingerprint(SEARCH_URL) is not None
+
+class JsonApiCrawler(Crawler):
+    URL_PATTERN = re.compile(r'https://listings\.example\.org')
+
+    def get_page(self, search_url, driver=None, page_no=None):
+        return session_pool.get(search_url).json()
+
+    def extract_data(self, soup):
+        return [{ 'id': element['id'] } for element in soup['elementList']]
+
+def test_json_results_are_fingerprinted():
+    crawler = JsonApiCrawler(StringConfig())
+    crawler.fingerprints = PendingFingerprints(IdMaintainer(":memory:"))
+    with requests_mock.Mocker() as mock:
+        mock.get(SEARCH_URL, json={ 'elementList': [{ 'id': 1 }] })
+        assert len(crawler.get_results(SEARCH_URL)) == 1
+        crawler.fingerprints.flush()
+        assert crawler.get_results(SEARCH_URL) == []
+        mock.get(SEARCH_URL, json={ 'elementList': [{ 'id': 1 }, { 'id': 2 }] })
+        assert len(crawler.get_results(SEARCH_URL)) == 2
@@ -0,0 +1,132 @@
+from collections import OrderedDict
+
+import pytest
+import requests_mock
+
+from flathunter.config import YamlConfig
+from flathunter.exceptions import ConfigException
+from flathunter.expose import Expose
+from flathunter.filter import AlreadySeenFilter, Filter, GeoFilter
+from flathunter.geo import AreaIndex, Geocoder, PolygonArea, RadiusArea, distance_km, \
+    geocoder, parse_areas
+from flathunter.idmaintainer import IdMaintainer
+
+MITTE = [(52.54, 13.37), (52.54, 13.43), (52.50, 13.43), (52.50, 13.37)]
+ALEXANDERPLATZ = (52.5219, 13.4132)
+KREUZBERG = (52.4986, 13.4030)
+TEMPELHOF = (52.4736, 13.4035)
+
+def test_areas():
+    mitte = PolygonArea(MITTE)
+    assert mitte.contains(ALEXANDERPLATZ)
+    assert not mitte.contains(KREUZBERG)
+    triangle = PolygonArea([(52.50, 13.37), (52.54, 13.37), (52.50, 13.43)])
+    assert triangle.contains((52.51, 13.38))
+    assert not triangle.contains((52.53, 13.42))
+    assert 2.5 < distance_km(ALEXANDERPLATZ, KREUZBERG) < 2.7
+    around = RadiusArea(KREUZBERG, 3)
+    assert around.contains(ALEXANDERPLATZ)
+    assert around.contains(TEMPELHOF)
+    assert not RadiusArea(KREUZBERG, 2).contains(ALEXANDERPLATZ)
+
+def test_area_index():
+    index = AreaIndex()
+    index.add(1, [PolygonArea(MITTE)])
+    index.add(2, [RadiusArea(KREUZBERG, 3)])
+    index.add(3, [RadiusArea(TEMPELHOF, 1), PolygonArea(MITTE)])
+    assert index.owners_at(ALEXANDERPLATZ) == {1, 2, 3}
+    assert index.owners_at(TEMPELHOF) == {2, 3}
+    assert index.owners_at((48.1372, 11.5756)) == set()
+    index.add(3, [RadiusArea(TEMPELHOF, 1)])
+    assert index.owners_at(ALEXANDERPLATZ) == {1, 2}
+    index.remove(2)
+    index.remove(3)
+    assert index.owners_at(TEMPELHOF) == set()
+    assert set(index.cells) == set(cell for area in index.areas[1]
+                                   for cell in index.cells_of(area))
+
+def test_invalid_areas():
+    assert parse_areas(None) == []
+    for area_config in [[MITTE], { 'polygons': [MITTE[:2]] }, { 'polygons': [[(52.5,)]] },
+                        { 'radius': [{ 'center': KREUZBERG }] }]:
+        with pytest.raises(ConfigException):
+            parse_areas(area_config)
+
+def test_geo_filter():
+    config = YamlConfig({ 'filters': { 'area': {
+        'polygons': [[list(point) for point in MITTE]],
+        'radius': [{ 'center': list(TEMPELHOF), 'km': 1 }] } } })
+    exposes = [
+        { 'id': 1, 'lat': str(ALEXANDERPLATZ[0]), 'long': str(ALEXANDERPLATZ[1]) },
+        { 'id': 2, 'lat': str(KREUZBERG[0]), 'long': str(KREUZBERG[1]) },
+        { 'id': 3, 'lat': str(TEMPELHOF[0]), 'long': str(TEMPELHOF[1]) },
+        { 'id': 4, 'address': "Unbekannt" },
+    ]
+    filter_set = Filter.builder().read_config(config).build()
+    assert [expose['id'] for expose in filter_set.filter(exposes)] == [1, 3, 4]
+
+def test_geocoder_caches_addresses():
+    geocoder = Geocoder()
+    assert geocoder.locate("Alexanderplatz, Berlin") is None
+    geocoder.configure("KEY")
+    with requests_mock.Mocker() as mock:
+        mock.get("https://maps.googleapis.com/maps/api/geocode/json", [
+            { 'json': { 'status': 'OK', 'results': [
+                { 'geometry': { 'location': { 'lat': 52.5219, 'lng': 13.4132 } } }] } },
+            { 'json': { 'status': 'ZERO_RESULTS', 'results': [] } },
+        ])
+        assert geocoder.locate("Alexanderplatz, Berlin") == ALEXANDERPLATZ
+        assert geocoder.locate("Alexanderplatz, Berlin ") == ALEXANDERPLATZ
+        assert geocoder.locate("Nirgendwo") is None
+        assert geocoder.locate("Nirgendwo") is None
+        assert mock.call_count == 2
+
+def test_user_index_areas(monkeypatch):
+    monkeypatch.setattr(geocoder, 'cache', OrderedDict(Tempelhof=TEMPELHOF, Unbekannt=None))
+    monkeypatch.setattr(geocoder, 'key', "KEY")
+    id_watch = IdMaintainer(":memory:")
+    id_watch.save_settings_for_user(1, { 'filters': { 'area': {
+        'polygons': [[list(point) for point in MITTE]] } } })
+    id_watch.save_settings_for_user(2, { 'filters': { 'area': {
+        'radius': [{ 'center': list(KREUZBERG), 'km': 3 }] } } })
+    id_watch.save_settings_for_user(3, { 'filters': { 'max_price': 1000 } })
+    index = id_watch.get_user_index()
+    assert index.users_for(Expose(address="Tempelhof", price="900")) == { 2, 3 }
+    assert index.users_for(Expose(address="Unbekannt", price="900")) == { 1, 2, 3 }
+    id_watch.save_settings_for_user(2, { 'filters': {} })
+    assert index.users_for(Expose(address="Tempelhof", price="1200")) == { 2 }
+
+GEOCODE_RESPONSES = [
+    { 'json': { 'status': 'OK', 'results': [
+        { 'geometry': { 'location': { 'lat': 52.5219, 'lng': 13.4132 } } }] } },
+    { 'json': { 'status': 'ZERO_RESULTS', 'results': [] } },
+]
+
+def test_geocodes_are_stored():
+    id_watch = IdMaintainer(":memory:")
+    with requests_mock.Mocker() as mock:
+        mock.get("https://maps.googleapis.com/maps/api/geocode/json", GEOCODE_RESPONSES)
+        geocoder = Geocoder()
+        geocoder.configure("KEY", id_watch)
+        assert geocoder.locate("Alexanderplatz, Berlin") == ALEXANDERPLATZ
+        assert geocoder.locate("Nirgendwo") is None
+        restarted = Geocoder()
+        restarted.configure("KEY", id_watch)
+        assert restarted.locate("Alexanderplatz, Berlin") == ALEXANDERPLATZ
+        assert restarted.locate("Nirgendwo") is None
+        assert mock.call_count == 2
+    assert id_watch.get_geocode("Nirgendwo") == { 'lat': None, 'lng': None }
+
+def test_urls_are_not_geocoded():
+    geocoder = Geocoder()
+    geocoder.configure("KEY")
+    with requests_mock.Mocker() as mock:
+        assert geocoder.locate("https://www.wg-gesucht.de/wohnungen-in-Berlin.1234.html") is None
+        assert mock.call_count == 0
+
+def test_geo_filter_runs_after_already_seen_filter():
+    id_watch = IdMaintainer(":memory:")
+    config = YamlConfig({ 'filters': { 'area': { 'radius': [
+        { 'center': list(TEMPELHOF), 'km': 1 }] } } })
+    filter_set = Filter.builder().read_config(config).filter_already_seen(id_watch).build()
+    assert [type(filter_) for filter_ in filter_set.chain] == [AlreadySeenFilter, GeoFilter]
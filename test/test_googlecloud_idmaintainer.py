@@ -12,10 +12,25 @@ from test.dummy_crawler import DummyCrawler
 from test.test_util import count
 from test.utils.config import StringConfig
 
+class MockWriteBatch:
+    """MockFirestore has no write batches - buffer the writes until commit"""
+
+    def __init__(self):
+        self.writes = []
+
+    def set(self, reference, data):
+        self.writes.append((reference, data))
+
+    def commit(self):
+        for (reference, data) in self.writes:
+            reference.set(data)
+
 class MockGoogleCloudIdMaintainer(GoogleCloudIdMaintainer):
 
     def __init__(self):
         self.database = MockFirestore()
+        self.database.batch = MockWriteBatch
+        self.user_index = None
 
 CONFIG_WITH_FILTERS = """
 urls:
@@ -120,3 +135,14 @@ def test_all_filters_can_be_loaded(id_watch):
     hunter.set_filters_for_user(123, filter)
     hunter.set_filters_for_user(124, filter)
     assert id_watch.get_user_settings() == [ (123, { 'filters': filter }), (124, { 'filters': filter }) ]
+
+def test_mark_processed_many(id_watch):
+    id_watch.mark_processed(1)
+    id_watch.mark_processed_many([2, 3])
+    assert id_watch.filter_unseen([4, 3, 2, 1, 5]) == [4, 5]
+
+def test_seen_ids_include_processed_ids(id_watch):
+    id_watch.mark_processed(1)
+    id_watch.mark_seen_many([2, 3])
+    assert id_watch.get_seen_ids([1, 2, 3, 4]) == {1, 2, 3}
+    assert id_watch.get_processed_ids([1, 2, 3, 4]) == {1}
@@ -0,0 +1,70 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from flathunter.crawler.immobilienscout import Immobilienscout
+from flathunter.crawler.kleinanzeigen import Kleinanzeigen
+from flathunter.exceptions import ConfigException
+from flathunter.html_parser import SelectorStrainer, configure_html_parser, html_parser, \
+    make_soup
+from test.utils.config import StringConfig
+
+IS24_PAGE = """<html><body>
+<span data-is24-qa="resultlist-resultCount">1.234</span>
+<ul id="resultListItems"><li>
+  <div class="result-list-entry__gallery-container"></div>
+  <a class="result-list-entry__brand-title-container" href="/expose/123456789">NEUFlat</a>
+  <div class="result-list-entry__address">Main St 1</div>
+  <dl data-is24-qa="attributes"><dd>900 EUR</dd><dd>60 m2</dd><dd>2 Zi.</dd></dl>
+</li></ul></body></html>"""
+
+FULL_IS24_PAGE = IS24_PAGE.replace("<body>", """<body>
+<header><nav><a href="/login">Login</a></nav></header>
+<script>window.IS24 = {};</script>
+<div class="ad"><a href="/expose/987654321">Advert</a></div>""").replace("</body>", """
+<footer><a href="/impressum">Impressum</a></footer></body>""")
+
+def test_parser_is_configurable():
+    try:
+        configure_html_parser(StringConfig(string="html_parser: html.parser"))
+        assert make_soup("<p>Flat</p>").builder.NAME == "html.parser"
+    finally:
+        configure_html_parser(StringConfig())
+    assert html_parser['name'] == "lxml"
+
+def test_unknown_parser_is_rejected():
+    with pytest.raises(ConfigException):
+        configure_html_parser(StringConfig(string="html_parser: lexbor"))
+
+def test_compiled_selectors():
+    crawler = Immobilienscout(StringConfig())
+    soup = BeautifulSoup(IS24_PAGE, 'lxml')
+    assert crawler.get_result_count(soup) == 1234
+    entries = crawler.extract_data(soup)
+    assert len(entries) == 1
+    assert entries[0]['id'] == 123456789
+    assert entries[0]['title'] == "Flat"
+    assert entries[0]['address'] == "Main St 1"
+    assert entries[0]['price'] == "900"
+    assert Kleinanzeigen(StringConfig()).extract_data(BeautifulSoup(IS24_PAGE, 'lxml')) == []
+
+def test_selector_strainer():
+    soup = make_soup(FULL_IS24_PAGE, parse_only=SelectorStrainer(
+        ["#resultListItems", '[data-is24-qa="resultlist-resultCount"]']))
+    assert [tag.name for tag in soup.find_all(recursive=False)] == ["span", "ul"]
+    assert soup.find("header") is None
+    assert soup.find("script") is None
+    assert soup.find("footer") is None
+    assert soup.find("a", {"class": "result-list-entry__brand-title-container"}) is not None
+
+def test_search_pages_are_restricted_to_result_container():
+    crawler = Immobilienscout(StringConfig())
+    soup = crawler.parse_search_page(FULL_IS24_PAGE)
+    assert soup.find("footer") is None
+    assert soup.find(class_="ad") is None
+    assert crawler.get_result_count(soup) == 1234
+    assert crawler.extract_data(soup) == crawler.extract_data(make_soup(FULL_IS24_PAGE))
+
+def test_search_pages_without_container_are_parsed_in_full():
+    crawler = Kleinanzeigen(StringConfig())
+    crawler.RESULT_CONTAINER = None
+    assert crawler.parse_search_page(FULL_IS24_PAGE).find("footer") is not None
@@ -1,7 +1,9 @@
 import unittest
 import re
 from typing import Optional, Dict, List
+from unittest.mock import patch
 from flathunter.crawler.immowelt import Immowelt
+from flathunter.default_processors import AddressResolver
 from flathunter.hunter import Hunter 
 from flathunter.idmaintainer import IdMaintainer
 from test.dummy_crawler import DummyCrawler
@@ -116,6 +118,26 @@ excluded_titles:
         exposes = hunter.hunt_flats()
         self.assertTrue(count(exposes) > 0, "Expected to find exposes")
 
+    def test_exposes_are_marked_processed_after_the_chain(self):
+        config = StringConfig(string=self.FILTER_MAX_PRICE_CONFIG)
+        config.set_searchers([DummyCrawler()])
+        id_watch = IdMaintainer(":memory:")
+        passed = []
+        def resolve(expose):
+            if len(passed) == 2:
+                raise RuntimeError("Notifier timed out")
+            passed.append(expose['id'])
+            return expose
+        with patch.object(AddressResolver, 'process_expose', side_effect=resolve):
+            with self.assertRaises(RuntimeError):
+                Hunter(config, id_watch).hunt_flats()
+        self.assertEqual(len(passed), 2)
+        self.assertTrue(all(id_watch.is_processed(expose_id) for expose_id in passed))
+        config.set_searchers([DummyCrawler()])
+        exposes = Hunter(config, id_watch).hunt_flats()
+        self.assertTrue(count(exposes) > 0, "Expected the failed exposes to be processed again")
+        self.assertFalse(any(expose['id'] in passed for expose in exposes))
+
     def test_invalid_config(self):
         with self.assertRaises(Exception) as context:
             Hunter(dict(), IdMaintainer(":memory:"))  # type: ignore
@@ -57,11 +57,12 @@ def test_ids_are_added_to_maintainer(mocker):
     config = StringConfig(string=IdMaintainerTest.DUMMY_CONFIG)
     config.set_searchers([DummyCrawler()])
     id_watch = IdMaintainer(":memory:")
-    spy = mocker.spy(id_watch, "mark_processed")
+    spy = mocker.spy(id_watch, "mark_processed_many")
     hunter = Hunter(config, id_watch)
     exposes = hunter.hunt_flats()
     assert count(exposes) > 4
-    assert spy.call_count == 24
+    assert sum(len(call.args[0]) for call in spy.call_args_list) == 24
+    assert spy.call_count == 1
 
 def test_exposes_are_saved_to_maintainer():
     config = StringConfig(string=IdMaintainerTest.CONFIG_WITH_FILTERS)
@@ -133,3 +134,24 @@ def test_all_filters_can_be_loaded():
     hunter.set_filters_for_user(123, filter)
     hunter.set_filters_for_user(124, filter)
     assert id_watch.get_user_settings() == [ (123, { 'filters': filter }), (124, { 'filters': filter }) ]
+
+def test_get_processed_ids():
+    id_watch = IdMaintainer(":memory:")
+    for expose_id in [1, 2, 3]:
+        id_watch.mark_processed(expose_id)
+    assert id_watch.get_processed_ids([2, 3, 4]) == {2, 3}
+    assert id_watch.get_processed_ids(range(1000)) == {1, 2, 3}
+
+def test_mark_processed_many():
+    id_watch = IdMaintainer(":memory:")
+    id_watch.mark_processed(1)
+    id_watch.mark_processed_many([2, 3])
+    id_watch.mark_processed_many([])
+    assert id_watch.filter_unseen([4, 3, 2, 1, 5]) == [4, 5]
+
+def test_seen_ids_include_processed_ids():
+    id_watch = IdMaintainer(":memory:")
+    id_watch.mark_processed(1)
+    id_watch.mark_seen_many([2, 3, 3])
+    assert id_watch.get_seen_ids([1, 2, 3, 4]) == {1, 2, 3}
+    assert id_watch.get_processed_ids([1, 2, 3, 4]) == {1}
@@ -0,0 +1,139 @@
+import asyncio
+import re
+
+import requests_mock
+
+from flathunter.abstract_crawler import Crawler
+from flathunter.async_http import AsyncHttpClient
+from flathunter.crawler.immobilienscout import Immobilienscout
+from flathunter.crawler.kleinanzeigen import Kleinanzeigen
+from flathunter.crawler.wggesucht import WgGesucht
+from flathunter.hunter import Hunter
+from flathunter.idmaintainer import IdMaintainer
+from flathunter.utils.url import set_query_param
+from test.utils.config import StringConfig
+
+SEARCH_URL = "https://listings.example.org/search?city=berlin"
+
+class PagedCrawler(Crawler):
+    URL_PATTERN = re.compile(r'https://listings\.example\.org')
+    PAGE_PARAM = 'page'
+
+    def get_result_count(self, soup):
+        return int(soup.find('ul')['data-count'])
+
+    def extract_data(self, soup):
+        return [{ 'id': int(item['data-id']), 'crawler': self.get_name() }
+                for item in soup.find_all('li')]
+
+def page(count, ids):
+    items = "".join(f"<li data-id='{expose_id}'></li>" for expose_id in ids)
+    return f"<ul data-count='{count}'>{items}</ul>"
+
+def mock_pages(mock):
+    mock.get(SEARCH_URL, text=page(7, [1, 2, 3]))
+    mock.get(SEARCH_URL + "&page=2", text=page(7, [3, 4, 5]))
+    mock.get(SEARCH_URL + "&page=3", text=page(7, [6, 7]))
+
+def test_set_query_param():
+    assert set_query_param("https://example.com/s?a=1&page=3", "page", 4) \
+        == "https://example.com/s?a=1&page=4"
+    assert set_query_param("https://example.com/s", "page", 2) == "https://example.com/s?page=2"
+
+def test_remaining_pages_are_loaded():
+    crawler = PagedCrawler(StringConfig())
+    with requests_mock.Mocker() as mock:
+        mock_pages(mock)
+        entries = crawler.get_results(SEARCH_URL, max_pages=5)
+        assert mock.call_count == 3
+    assert [entry['id'] for entry in entries] == [1, 2, 3, 4, 5, 6, 7]
+
+def test_pages_are_limited_by_max_pages():
+    crawler = PagedCrawler(StringConfig())
+    with requests_mock.Mocker() as mock:
+        mock_pages(mock)
+        assert len(crawler.get_results(SEARCH_URL, max_pages=2)) == 5
+        assert len(crawler.get_results(SEARCH_URL)) == 3
+        assert mock.call_count == 3
+
+def test_pages_are_loaded_async():
+    crawler = PagedCrawler(StringConfig())
+
+    async def crawl():
+        async with AsyncHttpClient(use_aiohttp=False) as client:
+            return await crawler.get_results_async(SEARCH_URL, 5, client)
+
+    with requests_mock.Mocker() as mock:
+        mock_pages(mock)
+        entries = asyncio.run(crawl())
+    assert [entry['id'] for entry in entries] == [1, 2, 3, 4, 5, 6, 7]
+
+def test_portal_page_urls():
+    config = StringConfig()
+    assert PagedCrawler(config).get_page_url(SEARCH_URL, 2) == SEARCH_URL + "&page=2"
+    assert Immobilienscout(config).get_page_url(
+        "https://www.immobilienscout24.de/Suche/de/berlin/wohnung-mieten?sorting=2&pagenumber=1", 3) \
+        == "https://www.immobilienscout24.de/Suche/de/berlin/wohnung-mieten?sorting=2&pagenumber=3"
+    assert WgGesucht(config).get_page_url(
+        "https://www.wg-gesucht.de/wohnungen-in-Berlin.8.2.1.0.html?offer_filter=1", 3) \
+        == "https://www.wg-gesucht.de/wohnungen-in-Berlin.8.2.1.2.html?offer_filter=1"
+    assert Kleinanzeigen(config).get_page_url(
+        "https://www.kleinanzeigen.de/s-wohnung-mieten/berlin/c203l3331", 2) \
+        == "https://www.kleinanzeigen.de/s-wohnung-mieten/berlin/seite:2/c203l3331"
+    assert Kleinanzeigen(config).get_page_url(
+        "https://www.kleinanzeigen.de/s-wohnung-mieten/berlin/seite:2/c203l3331", 3) \
+        == "https://www.kleinanzeigen.de/s-wohnung-mieten/berlin/seite:3/c203l3331"
+
+EARLY_STOP_CONFIG = """
+urls:
+  - url: https://listings.example.org/search?city=berlin
+    max_pages: 5
+    stop_after_seen_pages: 1
+  - https://listings.example.org/search?city=munich
+"""
+
+def test_url_options():
+    config = StringConfig(string=EARLY_STOP_CONFIG)
+    assert config.target_urls() == [SEARCH_URL, "https://listings.example.org/search?city=munich"]
+    assert config.max_pages_for_url(SEARCH_URL, None) == 5
+    assert config.max_pages_for_url("https://listings.example.org/search?city=munich", 2) == 2
+    assert config.stop_after_seen_pages(SEARCH_URL) == 1
+    assert config.stop_after_seen_pages("https://listings.example.org/search?city=munich") == 0
+
+def test_pagination_stops_at_seen_page():
+    config = StringConfig(string=EARLY_STOP_CONFIG + "crawl:\n  page_concurrency: 1\n")
+    crawler = PagedCrawler(config)
+    crawler.seen_ids = IdMaintainer(":memory:")
+    for expose_id in [3, 4, 5]:
+        crawler.seen_ids.mark_processed(expose_id)
+    with requests_mock.Mocker() as mock:
+        mock_pages(mock)
+        entries = crawler.get_results(SEARCH_URL, max_pages=5)
+        assert mock.call_count == 2
+    assert [entry['id'] for entry in entries] == [1, 2, 3, 4, 5]
+
+def test_seen_first_page_stops_pagination():
+    crawler = PagedCrawler(StringConfig(string=EARLY_STOP_CONFIG))
+    crawler.seen_ids = IdMaintainer(":memory:")
+    for expose_id in [1, 2, 3]:
+        crawler.seen_ids.mark_processed(expose_id)
+    with requests_mock.Mocker() as mock:
+        mock_pages(mock)
+        crawler.get_results(SEARCH_URL, max_pages=5)
+        assert mock.call_count == 1
+
+def test_pages_of_rejected_exposes_stop_pagination():
+    config = StringConfig(string=EARLY_STOP_CONFIG + "filters:\n  expression: 'url == \"none\"'\n")
+    crawler = PagedCrawler(config)
+    config.set_searchers([crawler])
+    id_watch = IdMaintainer(":memory:")
+    hunter = Hunter(config, id_watch)
+    with requests_mock.Mocker() as mock:
+        mock_pages(mock)
+        mock.get("https://listings.example.org/search?city=munich", text=page(0, []))
+        assert hunter.hunt_flats() == []
+        assert id_watch.get_processed_ids(range(1, 8)) == set()
+        assert id_watch.get_seen_ids(range(1, 8)) == set(range(1, 8))
+        calls = mock.call_count
+        hunter.hunt_flats()
+        assert mock.call_count - calls == 2
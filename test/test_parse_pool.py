@@ -0,0 +1,48 @@
+import os
+
+import pytest
+import requests_mock
+
+from flathunter.crawler.meinestadt import MeineStadt
+from flathunter.crawler.wggesucht import WgGesucht
+from flathunter.html_parser import make_soup
+from flathunter.parse_pool import ExtractedPage, configure_parse_pool, parse_pool
+from test.utils.config import StringConfig
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "crawler", "fixtures", "wg-gesucht-spotahome.html")
+SEARCH_URL = "https://www.wg-gesucht.de/wg-zimmer-in-Berlin.8.0.1.0.html"
+
+@pytest.fixture
+def pool():
+    configure_parse_pool(StringConfig(string="crawl:\n  parse_processes: 2"))
+    yield parse_pool
+    parse_pool.stop()
+
+def read_fixture():
+    with open(FIXTURE, 'rb') as fixture:
+        return fixture.read()
+
+def test_pool_is_disabled_by_default():
+    configure_parse_pool(StringConfig())
+    assert not parse_pool.enabled()
+
+def test_pages_are_extracted_in_worker(pool):
+    crawler = WgGesucht(StringConfig())
+    markup = read_fixture()
+    page = crawler.parse_search_page(markup)
+    assert isinstance(page, ExtractedPage)
+    assert page.digest is None
+    assert crawler.extract_entries(page) == crawler.extract_data(make_soup(markup))
+    digested = pool.extract(WgGesucht, markup, digest=True)
+    assert digested.digest == crawler.get_result_digest(make_soup(markup))
+
+def test_embedded_json_is_extracted_in_worker(pool):
+    page = '<script type="application/ld+json">[]</script>'
+    assert MeineStadt(StringConfig()).parse_search_page(page).entries == []
+
+def test_get_results_uses_pool(pool):
+    crawler = WgGesucht(StringConfig())
+    with requests_mock.Mocker() as mock:
+        mock.get(SEARCH_URL, content=read_fixture())
+        entries = crawler.get_results(SEARCH_URL, max_pages=1)
+    assert len(entries) == 20
@@ -0,0 +1,75 @@
+import pytest
+import requests_mock
+
+from flathunter.crawler.immobilienscout import Immobilienscout
+from flathunter.rate_limiter import RateLimiter, TokenBucket
+from test.utils.config import StringConfig
+
+RATE_LIMIT_CONFIG = """
+rate_limit:
+  requests_per_second: 2
+  burst: 3
+  hosts:
+    www.immobilienscout24.de:
+      requests_per_second: 0.5
+      burst: 1
+"""
+
+def test_bucket_allows_burst_then_spaces_requests():
+    bucket = TokenBucket(rate=2.0, burst=3)
+    now = bucket.updated
+    assert [bucket.reserve(now) for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve(now) == 0.5
+    assert bucket.reserve(now) == 1.0
+    assert bucket.reserve(now + 1.0) == 0.5
+
+def test_bucket_slows_down_when_blocked():
+    bucket = TokenBucket(rate=2.0, burst=1)
+    now = bucket.updated
+    bucket.blocked(now)
+    assert bucket.effective_rate() == 1.0
+    assert bucket.reserve(now) == 1.0
+    bucket.blocked(now, retry_after=30)
+    assert bucket.reserve(now) >= 30
+    for _ in range(20):
+        bucket.succeeded()
+    assert bucket.effective_rate() == 2.0
+
+def test_limits_are_configured_per_host():
+    limiter = StringConfig(string=RATE_LIMIT_CONFIG).rate_limiter()
+    assert isinstance(limiter, RateLimiter)
+    assert limiter.reserve("https://www.immobilienscout24.de/Suche/a") == 0
+    assert limiter.reserve("https://www.immobilienscout24.de/Suche/b") == pytest.approx(2.0, abs=0.01)
+    assert limiter.reserve("https://www.wg-gesucht.de/a") == 0
+
+def test_bot_detection_slows_down_host():
+    config = StringConfig(string=RATE_LIMIT_CONFIG)
+    crawler = Immobilienscout(config)
+    url = "https://www.immobilienscout24.de/expose/1"
+    with requests_mock.Mocker() as mock:
+        mock.get(url, text="<p>Warum haben wir deine Anfrage blockiert?</p>")
+        crawler.get_soup_from_url(url)
+    bucket = config.rate_limiter().buckets["www.immobilienscout24.de"]
+    assert bucket.effective_rate() == 0.25
+
+def test_requests_are_not_limited_by_default():
+    limiter = StringConfig().rate_limiter()
+    assert [limiter.reserve("https://www.wg-gesucht.de/a") for _ in range(20)] == [0] * 20
+    limiter.report("https://www.wg-gesucht.de/a", blocked=True)
+    assert limiter.reserve("https://www.wg-gesucht.de/a") == 0
+
+def test_proxy_failures_do_not_slow_down_host(mocker):
+    config = StringConfig(string=RATE_LIMIT_CONFIG + "use_proxy_list: true\n")
+    crawler = Immobilienscout(config)
+    url = "https://www.immobilienscout24.de/expose/1"
+    mocker.patch("flathunter.proxies.get_proxies",
+                 return_value=["http://proxy1:8080", "http://proxy2:8080"])
+    acquire = mocker.spy(config.rate_limiter(), "acquire")
+    with requests_mock.Mocker() as mock:
+        mock.get(url, [{ 'status_code': 403, 'text': "Forbidden" },
+                       { 'status_code': 200, 'text': "<p>Flat</p>" }])
+        crawler.get_soup_with_proxy(url)
+        assert mock.call_count == 2
+    assert acquire.call_count == 1
+    bucket = config.rate_limiter().buckets["www.immobilienscout24.de"]
+    assert bucket.effective_rate() == 0.5
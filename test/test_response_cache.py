@@ -0,0 +1,67 @@
+import os
+import re
+import time
+
+import requests_mock
+
+from flathunter.crawler.wggesucht import WgGesucht
+from flathunter.response_cache import ResponseCache
+from test.utils.config import StringConfig
+
+CACHE_CONFIG = """
+cache:
+  enabled: true
+  location: ":memory:"
+"""
+
+def test_cache_roundtrip():
+    cache = ResponseCache(":memory:", ttl=60, max_bytes=1024 * 1024)
+    assert cache.get("https://www.example.com/expose/1") is None
+    cache.put("https://www.example.com/expose/1", b"<html>Flat</html>")
+    assert cache.get("https://www.example.com/expose/1") == b"<html>Flat</html>"
+    assert cache.stats() == { 'hits': 1, 'misses': 1, 'entries': 1,
+                              'bytes': cache.stats()['bytes'] }
+
+def test_entries_expire():
+    cache = ResponseCache(":memory:", ttl=0.05, max_bytes=1024 * 1024)
+    cache.put("https://www.example.com/expose/1", b"Flat")
+    time.sleep(0.1)
+    assert cache.get("https://www.example.com/expose/1") is None
+
+def test_least_recently_used_entries_are_evicted():
+    body = os.urandom(1000)
+    cache = ResponseCache(":memory:", ttl=60, max_bytes=2500)
+    cache.put("https://www.example.com/expose/1", body)
+    time.sleep(0.01)
+    cache.put("https://www.example.com/expose/2", body)
+    time.sleep(0.01)
+    assert cache.get("https://www.example.com/expose/1") is not None
+    time.sleep(0.01)
+    cache.put("https://www.example.com/expose/3", body)
+    assert cache.get("https://www.example.com/expose/2") is None
+    assert cache.get("https://www.example.com/expose/1") is not None
+    assert cache.get("https://www.example.com/expose/3") is not None
+
+def test_detail_pages_are_cached():
+    config = StringConfig(string=CACHE_CONFIG)
+    crawler = WgGesucht(config)
+    page = '<div class="col-sm-4 mb10"><a href="#mapContainer">Main St 1</a></div>'
+    with requests_mock.Mocker() as mock:
+        mock.get(re.compile("wg-gesucht.de"), text=page)
+        assert crawler.load_address("https://www.wg-gesucht.de/expose/1") == "Main St 1"
+        calls = mock.call_count
+        assert crawler.load_address("https://www.wg-gesucht.de/expose/1") == "Main St 1"
+        assert mock.call_count == calls
+    assert config.response_cache().stats()['hits'] == 1
+
+def test_failed_detail_pages_are_not_cached():
+    config = StringConfig(string=CACHE_CONFIG)
+    crawler = WgGesucht(config)
+    crawler.BOT_DETECTION_MARKERS = ["Are you a robot?"]
+    url = "https://www.wg-gesucht.de/expose/1"
+    with requests_mock.Mocker() as mock:
+        mock.get(re.compile("wg-gesucht.de"), text="Server error", status_code=500)
+        crawler.get_detail_page(url)
+        mock.get(re.compile("wg-gesucht.de"), text="Are you a robot?")
+        crawler.get_detail_page(url)
+    assert config.response_cache().get(url) is None
@@ -0,0 +1,79 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests_mock
+
+from flathunter.session_pool import SessionPool, configure_session_pool, session_pool
+from test.utils.config import StringConfig
+
+HTTP_CONFIG = """
+http:
+  pool_connections: 2
+  pool_maxsize: 4
+  timeout: 5
+"""
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_sessions_are_shared_per_host():
+    pool = SessionPool()
+    first = pool.session_for_url("https://www.example.com/a")
+    assert pool.session_for_url("https://www.example.com/b?x=1") is first
+    assert pool.session_for_url("https://www.example.org/a") is not first
+
+def test_connections_are_reused(server_url):
+    pool = SessionPool()
+    for _ in range(5):
+        assert pool.get(server_url + "/page").text == "ok"
+    stats = pool.stats()["127.0.0.1"]
+    assert stats == { 'requests': 5, 'connections': 1, 'reused': 4 }
+
+def test_default_timeout_is_applied():
+    pool = SessionPool(timeout=7)
+    with requests_mock.Mocker() as mock:
+        mock.get("https://www.example.com/", text="ok")
+        pool.get("https://www.example.com/")
+        assert mock.last_request.timeout == 7
+        pool.get("https://www.example.com/", timeout=(20, 0.1))
+        assert mock.last_request.timeout == (20, 0.1)
+
+def test_configure_session_pool():
+    configure_session_pool(StringConfig(string=HTTP_CONFIG))
+    try:
+        assert session_pool.pool_connections == 2
+        assert session_pool.pool_maxsize == 4
+        assert session_pool.timeout == 5
+    finally:
+        configure_session_pool(StringConfig())
+
+def test_isolated_sessions_share_connections_but_not_cookies(server_url):
+    pool = SessionPool()
+    pooled = pool.session_for_url(server_url)
+    isolated = pool.isolated_session(server_url)
+    assert isolated is not pooled
+    assert isolated.get_adapter(server_url) is pooled.get_adapter(server_url)
+    isolated.cookies.set("filter", "1")
+    assert pool.get(server_url + "/page", session=isolated).text == "ok"
+    assert "filter" not in pooled.cookies
+    assert pool.stats()["127.0.0.1"]["requests"] == 1
@@ -0,0 +1,139 @@
+import re
+
+import pytest
+import requests_mock
+
+from flathunter.abstract_crawler import Crawler
+from flathunter.fingerprints import PendingFingerprints
+from flathunter.idmaintainer import IdMaintainer
+from flathunter.parse_pool import ExtractedPage
+from flathunter.streaming_parser import SimpleSelector, StreamingResultParser
+from test.utils.config import StringConfig
+
+PAGE = b"""<html><head><script>var tracking = 1;</script></head><body>
+<header><nav>Menu</nav><span class="count">3 results</span></header>
+<ul class="results list">
+  <li class="card" data-id="1"><a href="/expose/1">Flat</a></li>
+  <li class="card" data-id="2"><a href="/expose/2">Loft</a></li>
+  <li class="card" data-id="3"><a href="/expose/3">House</a></li>
+</ul>
+<footer>""" + b"<p>Footer</p>" * 2000 + b"""</footer></body></html>"""
+
+STREAMING_CONFIG = """
+crawl:
+  stream_search_pages: true
+"""
+
+class StreamingCrawler(Crawler):
+    URL_PATTERN = re.compile(r'https://listings\.example\.org')
+    RESULT_CONTAINER = "ul.results"
+    RESULT_EXTRAS = ["span.count"]
+    STREAM_CHUNK_SIZE = 64
+
+    def get_result_count(self, soup):
+        return int(soup.select_one("span.count").text.split()[0])
+
+    def extract_data(self, soup):
+        return [{ 'id': int(item['data-id']) } for item in soup.select("li.card")]
+
+def chunks(data, size):
+    return [data[pos:pos + size] for pos in range(0, len(data), size)]
+
+def test_simple_selector():
+    assert SimpleSelector("ul.results").matches("ul", { 'class': "list results" })
+    assert not SimpleSelector("ul.results").matches("div", { 'class': "results" })
+    assert SimpleSelector("#resultListItems").matches("ul", { 'id': "resultListItems" })
+    assert SimpleSelector('script[type="application/ld+json"]') \
+        .matches("script", { 'type': "application/ld+json" })
+    assert SimpleSelector("[data-is24-qa]").matches("span", { 'data-is24-qa': "x" })
+    with pytest.raises(ValueError):
+        SimpleSelector("ul > li")
+
+def test_parsing_stops_at_the_end_of_the_container():
+    parser = StreamingResultParser("ul.results")
+    fed = 0
+    for chunk in chunks(PAGE, 50):
+        parser.feed(chunk)
+        fed += len(chunk)
+        if parser.done:
+            break
+    assert parser.done
+    assert fed < len(PAGE) / 2
+    assert len(parser.soup().select("li.card")) == 3
+
+def test_cards_are_emitted_while_parsing():
+    cards = []
+    emitted = []
+    parser = StreamingResultParser("ul.results", card="li.card", on_card=cards.append)
+    for chunk in chunks(PAGE, 50):
+        parser.feed(chunk)
+        emitted.append(len(cards))
+        if parser.done:
+            break
+    assert len(cards) == 3
+    assert len(set(emitted)) > 2
+    assert 'data-id="1"' in cards[0]
+    assert parser.soup().select("li.card") == []
+
+def test_extras_after_the_container_are_kept():
+    page = PAGE.replace(b'<span class="count">3 results</span>', b'') \
+        .replace(b'<footer>', b'<footer><span class="count">3 results</span>')
+    parser = StreamingResultParser("ul.results", extras=["span.count"])
+    for chunk in chunks(page, 100):
+        parser.feed(chunk)
+        if parser.done:
+            break
+    assert parser.done
+    assert parser.soup().select_one("span.count").text == "3 results"
+
+def test_only_kept_elements_are_returned():
+    parser = StreamingResultParser("ul.results", extras=["span.count"])
+    for chunk in chunks(PAGE, 100):
+        parser.feed(chunk)
+        if parser.done:
+            break
+    soup = parser.soup()
+    assert soup.find("nav") is None
+    assert soup.find("footer") is None
+    assert soup.find("script") is None
+    assert soup.select_one("span.count").text == "3 results"
+    assert len(soup.select("li.card")) == 3
+
+def test_crawler_streams_search_pages():
+    crawler = StreamingCrawler(StringConfig(string=STREAMING_CONFIG))
+    assert crawler.streams_results()
+    with requests_mock.Mocker() as mock:
+        mock.get("https://listings.example.org/search", content=PAGE)
+        entries = crawler.get_results("https://listings.example.org/search")
+    assert [entry['id'] for entry in entries] == [1, 2, 3]
+    assert not StreamingCrawler(StringConfig()).streams_results()
+
+class CardCrawler(StreamingCrawler):
+    RESULT_CARD = "li.card"
+
+    def extract_card(self, card):
+        return { 'id': int(card.find("li")['data-id']) }
+
+    def extract_data(self, soup):
+        raise AssertionError("Streamed pages are extracted card by card")
+
+def test_crawler_extracts_cards_while_streaming():
+    crawler = CardCrawler(StringConfig(string=STREAMING_CONFIG))
+    with requests_mock.Mocker() as mock:
+        mock.get("https://listings.example.org/search", content=PAGE)
+        page = crawler.get_page("https://listings.example.org/search")
+    assert isinstance(page, ExtractedPage)
+    assert page.result_count == 3
+    assert [entry['id'] for entry in crawler.extract_entries(page)] == [1, 2, 3]
+
+def test_streamed_cards_are_fingerprinted():
+    crawler = CardCrawler(StringConfig(string=STREAMING_CONFIG))
+    crawler.fingerprints = PendingFingerprints(IdMaintainer(":memory:"))
+    with requests_mock.Mocker() as mock:
+        mock.get("https://listings.example.org/search", content=PAGE)
+        assert len(crawler.get_results("https://listings.example.org/search")) == 3
+        crawler.fingerprints.flush()
+        assert crawler.get_results("https://listings.example.org/search") == []
+        mock.get("https://listings.example.org/search",
+                 content=PAGE.replace(b'/expose/3', b'/expose/4'))
+        assert len(crawler.get_results("https://listings.example.org/search")) == 3
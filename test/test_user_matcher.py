@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from flathunter import user_matcher
+from flathunter.config import YamlConfig
+from flathunter.expose import Expose
+from flathunter.filter import Filter
+from flathunter.idmaintainer import IdMaintainer
+from flathunter.user_matcher import UserIndex, UserMatcher
+from flathunter.web_hunter import WebHunter
+from test.utils.config import StringConfig
+
+EXPOSES = [Expose(expose) for expose in [
+    { 'id': 1, 'title': "Ruhige Wohnung", 'price': "900 €", 'size': "60 m²", 'rooms': "2" },
+    { 'id': 2, 'title': "Wohnungstausch", 'price': "450 €", 'size': "30 m²", 'rooms': "1" },
+    { 'id': 3, 'title': "Altbau", 'price': "1.500 €", 'size': "100 m²", 'rooms': "4" },
+    { 'id': 4, 'title': "Preis auf Anfrage", 'price': "", 'size': "75 m²", 'rooms': "3" },
+    { 'id': 5, 'title': "Loft", 'price': "1.200 €", 'size': "", 'rooms': "" },
+]]
+
+USERS = [
+    (1, { 'filters': { 'max_price': 1000 } }),
+    (2, { 'filters': { 'min_size': 50, 'max_size': 90, 'min_rooms': 2 } }),
+    (3, { 'filters': { 'max_price_per_square': 14.0, 'excluded_titles': ["altbau"] } }),
+    (4, { 'filters': { 'min_price': 0, 'max_rooms': 3.0 } }),
+    (5, {}),
+    (6, { 'filters': { 'max_price': 1300, 'expression': 'rooms >= 2 or title =~ "loft"' } }),
+]
+
+def expected_matches():
+    return { user_id: [expose for expose in EXPOSES
+                       if Filter.builder().read_config(YamlConfig(settings)).build()
+                                .is_interesting_expose(expose)]
+             for (user_id, settings) in USERS }
+
+def test_matches_equal_per_user_filters(monkeypatch):
+    monkeypatch.setattr(user_matcher, 'np', None)
+    matches = UserMatcher(USERS).match(EXPOSES)
+    assert matches == expected_matches()
+    assert [expose['id'] for expose in matches[2]] == [1, 4, 5]
+
+def test_vectorized_matches_equal_per_user_filters():
+    pytest.importorskip("numpy")
+    assert UserMatcher(USERS).match(EXPOSES) == expected_matches()
+
+def test_no_exposes_or_users():
+    assert UserMatcher(USERS).match([]) == { user_id: [] for (user_id, _) in USERS }
+    assert UserMatcher([]).match(EXPOSES) == {}
+
+def test_index_matches_equal_per_user_filters():
+    index = UserIndex(USERS)
+    expected = expected_matches()
+    for expose in EXPOSES:
+        assert index.users_for(expose) == \
+            { user_id for (user_id, matches) in expected.items() if expose in matches }
+
+def test_index_leaves_out_muted_users():
+    index = UserIndex([(1, { 'mute_notifications': True }), (2, {})])
+    assert index.match(EXPOSES) == { 2: EXPOSES }
+
+def test_index_is_updated_on_save():
+    id_watch = IdMaintainer(":memory:")
+    id_watch.save_settings_for_user(1, { 'filters': { 'max_price': 1000 } })
+    index = id_watch.get_user_index()
+    assert index.users_for(EXPOSES[2]) == set()
+    id_watch.save_settings_for_user(1, { 'filters': { 'min_price': 1000 } })
+    id_watch.save_settings_for_user(2, { 'filters': { 'max_size': 50 } })
+    assert id_watch.get_user_index() is index
+    assert index.users_for(EXPOSES[2]) == { 1 }
+    assert index.users_for(EXPOSES[1]) == { 2 }
+    id_watch.save_settings_for_user(1, { 'mute_notifications': True })
+    assert index.users_for(EXPOSES[2]) == set()
+    assert index.bounds[0] == []
+
+def test_index_is_reloaded_after_max_age():
+    id_watch = IdMaintainer(":memory:")
+    id_watch.save_settings_for_user(1, { 'filters': { 'max_price': 1000 } })
+    index = id_watch.get_user_index(max_age=300)
+    # A change made by another process, which the index does not see
+    id_watch.get_connection().execute('INSERT OR REPLACE INTO users VALUES (?, ?)',
+                                      (2, json.dumps({ 'filters': { 'max_size': 50 } })))
+    assert id_watch.get_user_index(max_age=300) is index
+    index.loaded -= 301
+    reloaded = id_watch.get_user_index(max_age=300)
+    assert reloaded is not index
+    assert reloaded.users_for(EXPOSES[1]) == { 1, 2 }
+
+@pytest.mark.parametrize("matching", ["index", "batch"])
+def test_web_hunter_user_matching(matching):
+    config = StringConfig(string=f"website:\n  user_matching: {matching}\n")
+    id_watch = IdMaintainer(":memory:")
+    for (user_id, settings) in USERS + [(7, { 'mute_notifications': True })]:
+        id_watch.save_settings_for_user(user_id, settings)
+    matches = WebHunter(config, id_watch).match_users(EXPOSES)
+    expected = { user_id: (dict(settings), exposes)
+                 for ((user_id, settings), exposes) in zip(USERS, expected_matches().values())
+                 if len(exposes) > 0 }
+    assert { user_id: (settings, exposes) for (user_id, settings, exposes) in matches } \
+        == expected